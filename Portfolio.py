@@ -1,15 +1,24 @@
 import datetime
 from StockData import StockData
-from datetime import datetime, timedelta
+from benchmark import benchmark_service
+from price_matrix import PriceMatrix
+from position_ledger import PositionLedger, PositionView
+from trade_ledger import TradeLedger
+from time_series import TimeSeriesBuffer
+import analytics
+from streaming_risk import RollingBeta, StreamingRisk
+from datetime import datetime
 import matplotlib.pyplot as plt
 import matplotlib.dates as mdates
 import numpy as np
+import pandas as pd
 
 class Portfolio:
     def __init__(self, cash, var1, var2 = None, positions = None, past_trades = None): 
         self.cash = cash     # Starting cash
         self.var1 = var1 
         self.var2 = var2
+        self.ledger = PositionLedger()  # Long and short shares per ticker, array-backed
 
         if positions is not None:
             self.positions = positions
@@ -17,19 +26,58 @@ class Portfolio:
             self.positions = {}       # {ticker: shares held}
         
         if past_trades is not None:
-            self.past_trades = past_trades
+            self.past_trades = past_trades if isinstance(past_trades, TradeLedger) else TradeLedger.from_records(past_trades)
         else:
-            self.past_trades = []
+            self.past_trades = TradeLedger()  # Columnar, append-only
         
         self.cash = cash     # Starting cash
         self.original_value = cash  #keep track of original value fo the portfolio
-        self.change_over_time = {}  # {timestamp: portfolio_value}
+        self.change_over_time = TimeSeriesBuffer()  # portfolio value by timestamp, time-ordered
+        self._performance_version = None  # change_over_time version the cached metrics were computed at
+        self._performance = {}
+        self.risk = StreamingRisk()  # Risk metrics updated once per simulation bar
+        self.beta_estimator = RollingBeta()  # Beta the hedger acts on, fed with the same bars
         
         # Hedge margin tracking (separate from regular cash)
         self.hedge_margin_used = 0.0  # Amount of margin used for hedging
         self.hedge_margin_available = cash * 0.5  # 50% of portfolio can be used for hedge margin
-        self.hedge_trades = []  # Track all hedge transactions
+        self.hedge_trades = TradeLedger(hedge=True)  # Track all hedge transactions
         self.short_positions = {}  # Track short positions for hedging
+        self.prices = None  # Optional shared PriceMatrix (set by the simulator)
+        self._stocks = {}  # StockData per ticker for prices the matrix doesn't cover
+    
+    @property
+    def positions(self):
+        """{ticker: shares held}, backed by the ledger"""
+        return PositionView(self.ledger, 0)
+    
+    @positions.setter
+    def positions(self, positions):
+        # Replacing the dict wholesale (e.g. hedge impact analysis) reloads that side of the ledger
+        self.ledger.load(0, dict(positions))
+    
+    @property
+    def short_positions(self):
+        """{ticker: shares shorted}, backed by the ledger"""
+        return PositionView(self.ledger, 1)
+    
+    @short_positions.setter
+    def short_positions(self, short_positions):
+        self.ledger.load(1, dict(short_positions))
+    
+    def use_price_matrix(self, prices):
+        """Read market prices from a simulation's shared PriceMatrix where it covers the
+        requested time and ticker, instead of loading StockData for every lookup"""
+        self.prices = prices
+    
+    def _market_price(self, ticker, timestamp):
+        if self.prices is not None and self.prices.covers(timestamp, ticker):
+            return self.prices.price_at(timestamp, ticker)
+        sd = self._stocks.get(ticker)
+        if sd is None:
+            sd = self._stocks[ticker] = StockData(ticker, self.var1, self.var2)
+        sd.curtime = timestamp  # Set the current time for the stock data
+        return sd.get_price()
     
     def get_total_portfolio_value(self, timestamp):
         """Get the total portfolio value (cash + positions) at a given timestamp"""
@@ -51,39 +99,20 @@ class Portfolio:
         return True, "Purchase allowed"
     
     def get_value(self, timestamp):
-        position_val = self.cash
-        market_closed = False
-        
-        for position in self.positions.keys():
-            sd = StockData(position, self.var1, self.var2)
-            sd.curtime = timestamp  # Set the current time for the stock data
-            market_price = sd.get_price()
-            if(market_price is None):
-                market_closed = True
-                break
-            position_val += (market_price * self.positions[position])
-        
-        # Handle short positions if they exist
-        for position, short_shares in self.short_positions.items():
-            if short_shares > 0:  # Only process if we have short shares
-                sd = StockData(position, self.var1, self.var2)
-                sd.curtime = timestamp
-                market_price = sd.get_price()
-                if(market_price is None):
-                    market_closed = True
-                    break
-                # Short positions: we owe shares at current market price
-                # If price goes up, we lose money (owe more)
-                # If price goes down, we make money (owe less)
-                # The cash from shorting is already in self.cash, so we subtract current value
-                position_val -= (market_price * short_shares)
+        # Cash plus net shares (longs minus shorts) times price, as one dot product.
+        # The cash from shorting is already in self.cash, so shorts subtract their current value.
+        row = None
+        if isinstance(self.prices, PriceMatrix):
+            row = self.prices.row_of(timestamp)
+        position_val = self.ledger.value(
+            self.cash, lambda ticker: self._market_price(ticker, timestamp), self.prices, row
+        )
         
         # If market is closed, use the last known portfolio value
-        if market_closed:
+        if position_val is None:
             if self.change_over_time:
                 # Get the most recent portfolio value
-                last_timestamp = max(self.change_over_time.keys())
-                position_val = self.change_over_time[last_timestamp]
+                position_val = self.change_over_time.last()
                 print(f"Market closed at {timestamp}. Using last known value: ${position_val:,.2f}")
             else:
                 # If no previous data, just return cash value
@@ -94,6 +123,20 @@ class Portfolio:
         self.change_over_time[timestamp] = position_val
         return position_val
 
+    def update_risk(self, timestamp, value, benchmark_ticker='^GSPC'):
+        """Feed one bar's value (and the benchmark's price then) to the streaming risk metrics.
+        The benchmark comes from the simulation's price matrix when it has the ticker,
+        so intraday steps see intraday benchmark bars, else from the shared daily series."""
+        if self.prices is not None and self.prices.covers(timestamp, benchmark_ticker):
+            benchmark_price = self.prices.price_at(timestamp, benchmark_ticker)
+        else:
+            benchmark_price = benchmark_service.price(benchmark_ticker, timestamp)
+        self.risk.update(value, benchmark_price)
+        portfolio_return, benchmark_return = self.risk.last_return
+        if portfolio_return is not None and benchmark_return is not None:
+            self.beta_estimator.update(portfolio_return, benchmark_return)
+        return self.risk.snapshot()
+
     def get_PNL(self, timestamp):
         value = self.get_value(timestamp)
         if value is not None:
@@ -120,16 +163,7 @@ class Portfolio:
                 self.short_positions[ticker] = self.short_positions.get(ticker, 0) + shares
                 
                 # Record hedge trade
-                hedge_trade = {
-                    'timestamp': timestamp,
-                    'ticker': ticker,
-                    'action': 'short',
-                    'shares': shares,
-                    'price': price,
-                    'value': trade_value,
-                    'margin_used': margin_required
-                }
-                self.hedge_trades.append(hedge_trade)
+                self.hedge_trades.append('SHORT', ticker, shares, price, timestamp, self.cash, margin_required)
                 
                 return True, f"Hedged: Shorted {shares} {ticker} @ ${price:.2f} (margin: ${margin_required:.2f})"
             else:
@@ -162,16 +196,7 @@ class Portfolio:
             self.hedge_margin_used = max(0, self.hedge_margin_used - margin_released)
             
             # Record hedge trade
-            hedge_trade = {
-                'timestamp': timestamp,
-                'ticker': ticker,
-                'action': 'buy',
-                'shares': shares,
-                'price': price,
-                'value': trade_value,
-                'margin_released': margin_released
-            }
-            self.hedge_trades.append(hedge_trade)
+            self.hedge_trades.append('COVER', ticker, shares, price, timestamp, self.cash, -margin_released)
             
             return True, f"Hedged: Bought back {shares} {ticker} @ ${price:.2f} (margin released: ${margin_released:.2f})"
         
@@ -181,9 +206,7 @@ class Portfolio:
         print(f"CASH: ${self.cash}")
         print("POSITIONS:")
         for ticker, shares in self.positions.items():
-            sd = StockData(ticker, self.var1, self.var2)
-            sd.curtime = timestamp  # Set the current time for the stock data
-            market_price = sd.get_price()
+            market_price = self._market_price(ticker, timestamp)
             print(f"  {ticker}: {shares} shares @ ${market_price}")
         print(f"P&L: ${self.get_PNL(timestamp):,.2f}")
         print(f"Current Value: ${self.get_value(timestamp):,.2f}")
@@ -192,9 +215,7 @@ class Portfolio:
         """
         Buy shares of a stock with cash validation to prevent exceeding initial portfolio value.
         """
-        sd = StockData(ticker, self.var1, self.var2)
-        sd.curtime = timestamp  # Set the current time for the stock data
-        market_price = sd.get_price()
+        market_price = self._market_price(ticker, timestamp)
         if(market_price is None):
             print(f"Market closed - cannot get price for {ticker}")
             return
@@ -218,16 +239,7 @@ class Portfolio:
         self.positions[ticker] = self.positions.get(ticker, 0) + shares
         
         # Record the trade
-        trade_record = {
-            'action': 'BUY', 
-            'ticker': ticker, 
-            'price': execution_price, 
-            'shares': shares, 
-            'total_value': cost,
-            'timestamp': timestamp,
-            'cash_after': self.cash
-        }
-        self.past_trades.append(trade_record)
+        self.past_trades.append('BUY', ticker, shares, execution_price, timestamp, self.cash)
         
         print(f"✅ Bought {shares} shares of {ticker} at ${execution_price:.2f} (Total: ${cost:,.2f})")
         print(f"   Cash remaining: ${self.cash:,.2f}")
@@ -267,9 +279,7 @@ class Portfolio:
         return True, "Portfolio is within valid limits"
     
     def sell(self, ticker, price, shares, timestamp):
-        sd = StockData(ticker, self.var1, self.var2)
-        sd.curtime = timestamp  # Set the current time for the stock data
-        market_price = sd.get_price()
+        market_price = self._market_price(ticker, timestamp)
         if(market_price is None):
             return
 
@@ -281,7 +291,7 @@ class Portfolio:
         if self.positions.get(ticker, 0) >= shares:
             self.positions[ticker] -= shares
             self.cash += price * shares
-            self.past_trades.append({'action': 'SELL', 'ticker': ticker, 'price': price, 'shares': shares, 'timestamp': timestamp})
+            self.past_trades.append('SELL', ticker, shares, price, timestamp, self.cash)
         else:
             print(f"Not enough shares to sell {shares} of {ticker}")
 
@@ -299,13 +309,13 @@ class Portfolio:
             print("No portfolio value data available. Call get_value() with timestamps first.")
             return
         
-        # Sort timestamps and values
-        timestamps = sorted(self.change_over_time.keys())
-        values = [self.change_over_time[ts] for ts in timestamps]
+        # Time-ordered views of the value history
+        timestamps = self.change_over_time.index
+        values = self.change_over_time.values
         
         # Calculate percentage changes if requested
         if show_percentage:
-            values = [((val - self.original_value) / self.original_value) * 100 for val in values]
+            values = (values - self.original_value) / self.original_value * 100
             ylabel = 'Portfolio Value Change (%)'
             title += " (Percentage Change)"
         else:
@@ -349,9 +359,8 @@ class Portfolio:
         
         # Highlight constant value periods with different styling
         for start_ts, end_ts, const_val in constant_periods:
-            period_timestamps = [ts for ts in timestamps if start_ts <= ts <= end_ts]
-            period_values = [self.change_over_time[ts] for ts in period_timestamps]
-            plt.plot(period_timestamps, period_values, '--', color='gray', alpha=0.7, linewidth=1)
+            in_period = (timestamps >= start_ts) & (timestamps <= end_ts)
+            plt.plot(timestamps[in_period], values[in_period], '--', color='gray', alpha=0.7, linewidth=1)
         
         # Add horizontal line for original value
         if show_percentage:
@@ -438,9 +447,9 @@ class Portfolio:
             print("No portfolio value data available. Call get_value() with timestamps first.")
             return
         
-        # Sort timestamps and calculate P&L
-        timestamps = sorted(self.change_over_time.keys())
-        pnl_values = [self.change_over_time[ts] - self.original_value for ts in timestamps]
+        # Time-ordered history and P&L
+        timestamps = self.change_over_time.index
+        pnl_values = self.change_over_time.values - self.original_value
         
         # Determine plot styling based on data size
         num_points = len(timestamps)
@@ -501,6 +510,26 @@ class Portfolio:
         if show_plot:
             plt.show()
 
+    def performance(self, risk_free_rate=0.02, period='daily'):
+        """
+        Return and risk metrics for the value history (see analytics.performance).
+        
+        Computed in one vectorized pass and memoized until the history changes,
+        so repeated metric calls on a finished run are dictionary lookups.
+        
+        Returns:
+            dict: Metrics, or None if there are fewer than 2 returns
+        """
+        history = self.change_over_time
+        if self._performance_version != history.version:
+            self._performance_version = history.version
+            self._performance = {}
+        periods = analytics.periods_per_year(period)
+        key = (risk_free_rate, periods)
+        if key not in self._performance:
+            self._performance[key] = analytics.performance(history.timestamps, history.values, risk_free_rate, periods)
+        return self._performance[key]
+
     def calculate_sharpe_ratio(self, risk_free_rate=0.02, period='daily'):
         """
         Calculate the Sharpe ratio for the portfolio.
@@ -519,52 +548,14 @@ class Portfolio:
             print("Insufficient data for Sharpe ratio calculation. Need at least 2 data points.")
             return None
         
-        # Get sorted values and calculate returns
-        timestamps = sorted(self.change_over_time.keys())
-        values = [self.change_over_time[ts] for ts in timestamps]
-        
-        # Calculate percentage returns
-        returns = []
-        for i in range(1, len(values)):
-            if values[i-1] != 0:  # Avoid division by zero
-                daily_return = (values[i] - values[i-1]) / values[i-1]
-                returns.append(daily_return)
-        
-        if len(returns) < 2:
+        metrics = self.performance(risk_free_rate, period)
+        if metrics is None:
             print("Insufficient return data for Sharpe ratio calculation.")
             return None
         
-        # Convert to numpy array for easier calculations
-        returns = np.array(returns)
-        
-        # Calculate annualized metrics based on period
-        if period == 'daily':
-            periods_per_year = 252  # Trading days per year
-        elif period == 'weekly':
-            periods_per_year = 52
-        elif period == 'monthly':
-            periods_per_year = 12
-        elif period == 'annual':
-            periods_per_year = 1
-        else:
-            print(f"Invalid period '{period}'. Using 'daily'.")
-            periods_per_year = 252
-        
-        # Annualize the risk-free rate
-        daily_risk_free_rate = risk_free_rate / periods_per_year
-        
-        # Calculate excess returns
-        excess_returns = returns - daily_risk_free_rate
-        
-        # Calculate Sharpe ratio
-        if np.std(returns) == 0:
+        if metrics['sharpe_ratio'] is None:
             print("Portfolio has zero volatility. Sharpe ratio is undefined.")
-            return None
-        
-        # Annualized Sharpe ratio
-        sharpe_ratio = (np.mean(excess_returns) * periods_per_year) / (np.std(returns) * np.sqrt(periods_per_year))
-        
-        return sharpe_ratio
+        return metrics['sharpe_ratio']
     
     def calculate_volatility(self, period='daily'):
         """
@@ -580,41 +571,13 @@ class Portfolio:
             print("Insufficient data for volatility calculation. Need at least 2 data points.")
             return None
         
-        # Get sorted values and calculate returns
-        timestamps = sorted(self.change_over_time.keys())
-        values = [self.change_over_time[ts] for ts in timestamps]
-        
-        # Calculate percentage returns
-        returns = []
-        for i in range(1, len(values)):
-            if values[i-1] != 0:  # Avoid division by zero
-                daily_return = (values[i] - values[i-1]) / values[i-1]
-                returns.append(daily_return)
-        
-        if len(returns) < 2:
+        metrics = self.performance(period=period)
+        if metrics is None:
             print("Insufficient return data for volatility calculation.")
             return None
         
-        # Convert to numpy array
-        returns = np.array(returns)
-        
-        # Calculate annualized volatility based on period
-        if period == 'daily':
-            periods_per_year = 252  # Trading days per year
-        elif period == 'weekly':
-            periods_per_year = 52
-        elif period == 'monthly':
-            periods_per_year = 12
-        elif period == 'annual':
-            periods_per_year = 1
-        else:
-            print(f"Invalid period '{period}'. Using 'daily'.")
-            periods_per_year = 252
-        
         # Annualized volatility
-        volatility = np.std(returns) * np.sqrt(periods_per_year)
-        
-        return volatility
+        return metrics['volatility']
     
     def calculate_returns_summary(self, risk_free_rate=0.02):
         """Calculate a comprehensive summary of portfolio returns and risk metrics.
@@ -629,47 +592,27 @@ class Portfolio:
             print("Insufficient data for returns summary. Need at least 2 data points.")
             return None
         
-        # Get sorted values and calculate returns
-        timestamps = sorted(self.change_over_time.keys())
-        values = [self.change_over_time[ts] for ts in timestamps]
-        
-        # Calculate percentage returns
-        returns = []
-        for i in range(1, len(values)):
-            if values[i-1] != 0:  # Avoid division by zero
-                daily_return = (values[i] - values[i-1]) / values[i-1]
-                returns.append(daily_return)
-        
-        if len(returns) < 2:
+        metrics = self.performance(risk_free_rate)
+        if metrics is None:
             print("Insufficient return data for summary calculation.")
             return None
         
-        returns = np.array(returns)
-        
-        # Calculate metrics
-        total_return = (values[-1] - values[0]) / values[0] * 100
-        annualized_return = (1 + total_return/100) ** (252/len(returns)) - 1
-        volatility = np.std(returns) * np.sqrt(252) * 100
-        sharpe_ratio = self.calculate_sharpe_ratio(risk_free_rate)
-        
-        # Calculate maximum drawdown
-        peak = values[0]
-        max_drawdown = 0
-        for value in values:
-            if value > peak:
-                peak = value
-            drawdown = (peak - value) / peak * 100
-            if drawdown > max_drawdown:
-                max_drawdown = drawdown
+        def rounded(value, digits=2, scale=100):
+            return round(value * scale, digits) if value is not None else None
         
         summary = {
-            'total_return_pct': round(total_return, 2),
-            'annualized_return_pct': round(annualized_return * 100, 2),
-            'volatility_pct': round(volatility, 2),
-            'sharpe_ratio': round(sharpe_ratio, 3) if sharpe_ratio else None,
-            'max_drawdown_pct': round(max_drawdown, 2),
-            'data_points': len(values),
-            'time_period_days': (timestamps[-1] - timestamps[0]).days
+            'total_return_pct': rounded(metrics['total_return']),
+            'annualized_return_pct': rounded(metrics['annualized_return']),
+            'cagr_pct': rounded(metrics['cagr']),
+            'volatility_pct': rounded(metrics['volatility']),
+            'sharpe_ratio': rounded(metrics['sharpe_ratio'], 3, 1),
+            'sortino_ratio': rounded(metrics['sortino_ratio'], 3, 1),
+            'calmar_ratio': rounded(metrics['calmar_ratio'], 3, 1),
+            'max_drawdown_pct': rounded(metrics['max_drawdown']),
+            'max_drawdown_days': round(metrics['max_drawdown_days'], 2),
+            'hit_rate_pct': rounded(metrics['hit_rate']),
+            'data_points': metrics['data_points'],
+            'time_period_days': metrics['time_period_days']
         }
         
         return summary
@@ -697,70 +640,31 @@ class Portfolio:
         
         try:
             # Get portfolio data
-            timestamps = sorted(self.change_over_time.keys())
-            portfolio_values = [self.change_over_time[ts] for ts in timestamps]
+            timestamps = self.change_over_time.timestamps
+            portfolio_values = self.change_over_time.values
             
-            # Get benchmark data with extended period to ensure we have enough data
-            benchmark_start = (timestamps[0] - timedelta(days=5)).strftime('%Y-%m-%d')
-            benchmark_end = (timestamps[-1] + timedelta(days=5)).strftime('%Y-%m-%d')
+            # Benchmark prices come from the process-wide series (loaded once)
+            benchmark_prices = benchmark_service.prices(benchmark_ticker, timestamps)
             
-            benchmark_data = StockData(benchmark_ticker, benchmark_start, benchmark_end)
-            
-            if benchmark_data.stock_data.empty:
+            if np.isnan(benchmark_prices).all():
                 print(f"Could not retrieve benchmark data for {benchmark_ticker}")
                 return None
             
-            # Align portfolio and benchmark data by matching available trading days
-            aligned_portfolio_returns = []
-            aligned_benchmark_returns = []
-            
-            for i in range(1, len(timestamps)):
-                # Get portfolio return for this period
-                portfolio_return = (portfolio_values[i] - portfolio_values[i-1]) / portfolio_values[i-1]
-                
-                # Try to get benchmark prices for both dates
-                benchmark_data.curtime = timestamps[i-1]
-                price_start = benchmark_data.get_price()
-                
-                benchmark_data.curtime = timestamps[i]
-                price_end = benchmark_data.get_price()
-                
-                # Only include if we have valid benchmark data for both dates
-                if price_start is not None and price_end is not None and price_start > 0:
-                    benchmark_return = (price_end - price_start) / price_start
-                    aligned_portfolio_returns.append(portfolio_return)
-                    aligned_benchmark_returns.append(benchmark_return)
+            # Returns over the periods where the as-of benchmark price is known at both ends
+            portfolio_returns, benchmark_returns, _ = analytics.aligned_returns(portfolio_values, benchmark_prices)
             
             # Need at least 3 data points for meaningful beta calculation
-            if len(aligned_portfolio_returns) < 3:
-                print(f"Insufficient aligned data points: {len(aligned_portfolio_returns)} (need at least 3)")
+            if len(portfolio_returns) < 3:
+                print(f"Insufficient aligned data points: {len(portfolio_returns)} (need at least 3)")
                 return None
             
-            # Convert to numpy arrays
-            portfolio_returns = np.array(aligned_portfolio_returns)
-            benchmark_returns = np.array(aligned_benchmark_returns)
-            
-            # Calculate covariance and variance
-            covariance = np.cov(portfolio_returns, benchmark_returns)[0, 1]
-            benchmark_variance = np.var(benchmark_returns)
-            
             # Beta = Covariance(Portfolio, Benchmark) / Variance(Benchmark)
-            if benchmark_variance == 0:
+            stats = analytics.beta(portfolio_returns, benchmark_returns)
+            if stats is None:
                 print("Benchmark variance is zero - cannot calculate beta")
                 return None
             
-            beta = covariance / benchmark_variance
-            
-            # Calculate correlation coefficient
-            if len(portfolio_returns) > 1 and np.std(portfolio_returns) > 0 and np.std(benchmark_returns) > 0:
-                correlation = np.corrcoef(portfolio_returns, benchmark_returns)[0, 1]
-                if np.isnan(correlation):
-                    correlation = 0.0
-            else:
-                correlation = 0.0
-            
-            # Calculate R-squared (coefficient of determination)
-            r_squared = correlation ** 2
+            beta = stats['beta']
             
             # Interpret beta with more nuanced ranges
             if beta > 1.5:
@@ -778,13 +682,13 @@ class Portfolio:
             
             result = {
                 'beta': round(beta, 3),
-                'correlation': round(correlation, 3),
-                'r_squared': round(r_squared, 3),
+                'correlation': round(stats['correlation'], 3),
+                'r_squared': round(stats['r_squared'], 3),
                 'benchmark_ticker': benchmark_ticker,
-                'data_points': len(aligned_portfolio_returns),
+                'data_points': stats['data_points'],
                 'interpretation': beta_interpretation,
-                'portfolio_volatility': round(np.std(portfolio_returns) * np.sqrt(252), 3),  # Annualized
-                'benchmark_volatility': round(np.std(benchmark_returns) * np.sqrt(252), 3)  # Annualized
+                'portfolio_volatility': round(stats['portfolio_volatility'], 3),  # Annualized
+                'benchmark_volatility': round(stats['benchmark_volatility'], 3)  # Annualized
             }
             
             return result
@@ -795,6 +699,28 @@ class Portfolio:
             traceback.print_exc()
             return None
 
+    def calculate_rolling_beta(self, window=20, benchmark_ticker='^GSPC'):
+        """Beta to the benchmark over each trailing window of `window` aligned returns.
+        
+        Returns:
+            pd.Series: Beta indexed by the end of each return period (NaN until
+            the first full window), or None if there is no benchmark data
+        """
+        if len(self.change_over_time) < 3:
+            return None
+        
+        history = self.change_over_time
+        benchmark_prices = benchmark_service.prices(benchmark_ticker, history.timestamps)
+        if np.isnan(benchmark_prices).all():
+            print(f"Could not retrieve benchmark data for {benchmark_ticker}")
+            return None
+        
+        portfolio_returns, benchmark_returns, kept = analytics.aligned_returns(history.values, benchmark_prices)
+        return pd.Series(
+            analytics.rolling_beta(portfolio_returns, benchmark_returns, window),
+            index=history.index[1:][kept], name=f'beta_{window}'
+        )
+
 def main():
     A = Portfolio(100000, "60d", "2m")
     
@@ -1,31 +1,41 @@
+import os
 from datetime import datetime, timedelta
+import numpy as np
 import pandas as pd
 import yfinance as yf
-import requests
+from bar_cache import bar_cache, negative_cache, BarCache
+from bar_intervals import base_interval, resample_bars
+from bar_store import bar_store
+from fetch_executor import fetch_executor
+from single_flight import history_flight
+from data_provider import get_provider, DataProviderError
+from indicators import IndicatorEngine
 
-# Set up a session with proper browser headers to avoid IP blocking
-session = requests.Session()
-session.headers.update({
+# Proper browser headers to avoid IP blocking
+YAHOO_HEADERS = {
     'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
     'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
     'Accept-Language': 'en-US,en;q=0.5',
     'Accept-Encoding': 'gzip, deflate',
     'Connection': 'keep-alive',
     'Upgrade-Insecure-Requests': '1',
-})
+}
+
+def get_stock_data_with_retry(ticker_symbol, start_date=None, end_date=None, interval='1d', max_retries=3, period=None):
+    """Get stock data with retry logic, paced by the shared Yahoo rate limiter.
+    Requests go out as soon as the limiter has a token; after a failure the
+    bucket is drained so the retry waits for a refill instead of a fixed sleep."""
+    bucket = fetch_executor.bucket('yahoo')
+    thread_session = fetch_executor.session('yahoo', YAHOO_HEADERS)
 
-def get_stock_data_with_retry(ticker_symbol, start_date=None, end_date=None, interval='1d', max_retries=3):
-    """Get stock data with retry logic and delays to avoid rate limiting"""
-    import time
-    import random
-    
     for attempt in range(max_retries):
         try:
-            stock = yf.Ticker(ticker_symbol, session=session)
+            bucket.acquire()
+            stock = yf.Ticker(ticker_symbol, session=thread_session)
             if start_date and end_date:
                 data = stock.history(start=start_date, end=end_date, interval=interval)
             else:
-                data = stock.history(period="1d", interval=interval)
+                data = stock.history(period=period or "1d", interval=interval)
             
             if not data.empty:
                 return data
@@ -33,14 +43,168 @@ def get_stock_data_with_retry(ticker_symbol, start_date=None, end_date=None, int
         except Exception as e:
             print(f"DEBUG: Attempt {attempt + 1} failed for {ticker_symbol}: {str(e)}")
             if attempt < max_retries - 1:
-                delay = random.uniform(1, 3)  # Random delay between 1-3 seconds
-                print(f"DEBUG: Waiting {delay:.1f} seconds before retry...")
-                time.sleep(delay)
+                bucket.drain()
             else:
                 raise e
     
     return pd.DataFrame()  # Return empty DataFrame if all retries fail
 
+def data_source():
+    """Name of the provider StockData reads from: Yahoo unless DATA_PROVIDER selects
+    another data_provider.get_provider() implementation (alpha_vantage, synthetic, replay)"""
+    return os.environ.get('DATA_PROVIDER', 'yahoo').lower()
+
+def _fetch_bars(key, ticker_symbol, start_date, end_date, interval, period):
+    """Fill the bar cache for one key from the bar store / Yahoo, or the selected provider"""
+    source = key[0]
+    if source != 'yahoo':
+        try:
+            data = get_provider(source).get_history(ticker_symbol, start_date, end_date, period, interval)
+        except DataProviderError as e:
+            print(f"DEBUG: {source} provider failed for {ticker_symbol}: {e}")
+            data = pd.DataFrame()
+    elif start_date and end_date:
+        def fetch_gap(gap_start, gap_end):
+            return get_stock_data_with_retry(ticker_symbol, gap_start.strftime('%Y-%m-%d'),
+                                             gap_end.strftime('%Y-%m-%d'), interval)
+        data = bar_store.read_through('yahoo', ticker_symbol, interval, start_date, end_date, fetch_gap)
+    elif bar_store.offline:
+        # Relative periods can't be served from disk
+        print(f"DEBUG: Offline mode - skipping period request for {ticker_symbol}")
+        data = pd.DataFrame()
+    else:
+        data = get_stock_data_with_retry(ticker_symbol, start_date, end_date, interval, period=period)
+
+    if not data.empty:
+        if data.index.tz is not None:
+            data.index = data.index.tz_localize(None)
+        bar_cache.put(key, data)
+    else:
+        negative_cache.add(key)
+    return data
+
+def load_bars(ticker_symbol, start_date=None, end_date=None, interval='1d', period=None):
+    """Get stock data through the shared in-memory bar cache and on-disk bar store.
+    Only goes to Yahoo for date ranges that are on neither, and concurrent
+    callers asking for the same window share a single fetch. The returned
+    frame is a private copy with a timezone-naive index."""
+    key = BarCache.make_key(ticker_symbol, period if period else start_date, end_date, interval, data_source())
+    data = bar_cache.get(key)
+    if data is not None:
+        return data
+    if key in negative_cache:
+        # Came back empty recently - don't pay for the retries again
+        return pd.DataFrame()
+
+    base = _derivation_base(key[0], interval, start_date, end_date, period)
+    if base:
+        data = history_flight.do(key, _derive_bars, key, ticker_symbol, start_date, end_date, interval, base)
+        if not data.empty:
+            return data.copy()
+        print(f"DEBUG: No {base} bars to derive {interval} from for {ticker_symbol}, fetching {interval} directly")
+
+    data = history_flight.do(key, _fetch_bars, key, ticker_symbol, start_date, end_date, interval, period)
+    return data.copy()
+
+def _derivation_base(source, interval, start_date, end_date, period=None):
+    """Interval to download instead of `interval`, or None to download it directly.
+    Only Yahoo windows are derived - other providers cap intraday history by bar
+    count, so a finer interval would cover less time."""
+    if source != 'yahoo' or period or not (start_date and end_date):
+        return None
+    return base_interval(interval, start_date, end_date)
+
+def _derive_bars(key, ticker_symbol, start_date, end_date, interval, base):
+    """Build `interval` bars from the (cached / stored / fetched once) base interval"""
+    base_data = load_bars(ticker_symbol, start_date, end_date, base)
+    if base_data.empty:
+        return base_data
+    data = resample_bars(base_data, interval)
+    bar_cache.put(key, data)
+    return data
+
+def download_many(tickers, start_date, end_date, interval='1d'):
+    """Download several tickers in a single batched Yahoo request.
+    Returns {ticker: DataFrame}; tickers Yahoo had nothing for map to an empty frame."""
+    fetch_executor.bucket('yahoo').acquire()
+    raw = yf.download(list(tickers), start=start_date, end=end_date, interval=interval,
+                      group_by='ticker', auto_adjust=True, actions=True, threads=True,
+                      progress=False, session=fetch_executor.session('yahoo', YAHOO_HEADERS))
+    frames = {}
+    for ticker in tickers:
+        if raw is None or raw.empty:
+            frames[ticker] = pd.DataFrame()
+            continue
+        if isinstance(raw.columns, pd.MultiIndex):
+            if ticker not in raw.columns.get_level_values(0):
+                frames[ticker] = pd.DataFrame()
+                continue
+            frame = raw[ticker]
+        else:
+            frame = raw
+        frame = frame.dropna(how='all')
+        if not frame.empty and frame.index.tz is not None:
+            frame.index = frame.index.tz_localize(None)
+        frames[ticker] = frame
+    return frames
+
+def load_many(tickers, start_date, end_date, interval='1d'):
+    """Load every ticker a simulation needs with as few network requests as possible.
+    Tickers already in the bar cache or fully on disk are served locally; the rest
+    are fetched together in one batched download.
+    Returns:
+        (dict, dict): {ticker: StockData} for every requested ticker (empty data on
+        failure) and {ticker: reason} for the tickers that could not be loaded"""
+    tickers = list(dict.fromkeys(t.upper().strip() for t in tickers))
+    source = data_source()
+    to_fetch = []
+    # Intraday intervals are derived from one download of the finest available interval
+    fetch_interval = _derivation_base(source, interval, start_date, end_date) or interval
+    for ticker in tickers:
+        key = BarCache.make_key(ticker, start_date, end_date, interval, source)
+        # Batching only applies to Yahoo; other providers go straight to load_bars
+        if (source == 'yahoo' and key not in negative_cache and key not in bar_cache
+                and bar_store.missing('yahoo', ticker, fetch_interval, start_date, end_date)):
+            to_fetch.append(ticker)
+
+    failures = {}
+    if to_fetch and not bar_store.offline:
+        print(f"DEBUG: Batch downloading {fetch_interval} data for {to_fetch} from {start_date} to {end_date}")
+        try:
+            frames = download_many(to_fetch, start_date, end_date, fetch_interval)
+        except Exception as e:
+            # Leave these to load_bars below, which retries ticker by ticker
+            print(f"DEBUG: Batch download failed, falling back to per-ticker requests: {e}")
+            frames = {}
+        for ticker, frame in frames.items():
+            if not frame.empty:
+                bar_store.write('yahoo', ticker, fetch_interval, frame, start_date, end_date)
+                bar_cache.put(BarCache.make_key(ticker, start_date, end_date, fetch_interval, source), frame)
+
+    # Whatever is still missing is fetched concurrently at the provider's allowed rate
+    futures = fetch_executor.map(load_bars, tickers, start_date, end_date, interval)
+    result = {}
+    for ticker in tickers:
+        try:
+            frame = futures[ticker].result()
+        except Exception as e:
+            frame = pd.DataFrame()
+            failures[ticker] = str(e)
+        if frame.empty and ticker not in failures:
+            failures[ticker] = f"No {interval} data between {start_date} and {end_date}"
+        result[ticker] = StockData.from_frame(ticker, frame)
+
+    # Same fallback as StockData.get_stock_data: use daily bars when intraday is missing
+    if interval != '1d' and failures:
+        daily, _ = load_many(list(failures), start_date, end_date, '1d')
+        for ticker, stock in daily.items():
+            if not stock.stock_data.empty:
+                print(f"DEBUG: Got {len(stock.stock_data)} daily data points as fallback for {ticker}")
+                result[ticker] = stock
+                del failures[ticker]
+
+    return result, failures
+
 '''Code for the data struture storing stock time series and analysis functions'''
 
 class StockData:
@@ -57,6 +221,75 @@ class StockData:
         else:
             self.get_stock_data_for_time_interval(stock_symbol, var1, var2)
 
+    @classmethod
+    def from_frame(cls, stock_symbol, frame):
+        """Wrap already-loaded bars without fetching anything"""
+        stock = cls.__new__(cls)
+        stock.ticker = stock_symbol
+        stock.stock_data = frame
+        if not frame.empty:
+            stock.curtime = frame.index[0]
+        return stock
+
+    @property
+    def stock_data(self):
+        """Bar frame; bars added with append_bar are folded in on first access"""
+        if self.__dict__.get('_pending_bars'):
+            self._flush_bars()
+        return self._stock_data
+
+    @stock_data.setter
+    def stock_data(self, frame):
+        self._stock_data = frame
+        self._pending_bars = []
+
+    def append_bar(self, time, open, high, low, close, volume=0.0):
+        """Add one new bar (live / replay mode) without refetching anything.
+        The lookup arrays and any indicator engine are extended in place, so
+        each bar costs O(1) amortized; the DataFrame itself is only rebuilt
+        when stock_data is next read. Bars at or before the last one are ignored."""
+        times, _ = self._bar_arrays()
+        time_ns = int(self._to_ns([time])[0])
+        if len(times) and time_ns <= times[-1]:
+            return False
+        n = len(times)
+        if getattr(self, '_times_buf', None) is None or self._times.base is not self._times_buf or len(self._times_buf) <= n:
+            capacity = max(64, 2 * (n + 1))
+            self._times_buf = np.empty(capacity, dtype=np.int64)
+            self._mids_buf = np.empty(capacity, dtype=np.float64)
+            self._times_buf[:n] = self._times
+            self._mids_buf[:n] = self._mids
+        self._times_buf[n] = time_ns
+        self._mids_buf[n] = (high + low) / 2
+        self._times = self._times_buf[:n + 1]
+        self._mids = self._mids_buf[:n + 1]
+        if n + 1 == 2:
+            is_intraday = (self._times[1] - self._times[0]) <= timedelta(hours=1).total_seconds() * 1e9
+            max_diff = timedelta(hours=2) if is_intraday else timedelta(days=1)
+            self._max_diff_ns = int(max_diff.total_seconds() * 1e9)
+
+        if getattr(self, '_indicator_frame', None) is self.__dict__.get('_stock_data') and hasattr(self, '_indicators'):
+            self._indicators.update(time, close)
+        self._pending_bars.append((pd.Timestamp(time_ns), open, high, low, close, volume))
+        self.curtime = pd.Timestamp(time_ns)
+        return True
+
+    def _flush_bars(self):
+        pending, self._pending_bars = self._pending_bars, []
+        new = pd.DataFrame(
+            [row[1:] for row in pending],
+            index=pd.DatetimeIndex([row[0] for row in pending]),
+            columns=['Open', 'High', 'Low', 'Close', 'Volume'],
+        )
+        frame = self._stock_data
+        merged = new if frame is None or frame.empty else pd.concat([frame, new])
+        # The arrays and indicators already include these bars
+        if getattr(self, '_indexed_frame', None) is frame:
+            self._indexed_frame = merged
+        if getattr(self, '_indicator_frame', None) is frame:
+            self._indicator_frame = merged
+        self._stock_data = merged
+
     # print error when no data is found
     def stock_error_message(self, stock_symbol, date):
         print(f"${stock_symbol}: No data found for {date}")
@@ -79,12 +312,12 @@ class StockData:
             print("Error: End date is the same as start date")
     
         print(f"DEBUG: Fetching {interval} data for {stock_symbol} from {start_date} to {end_date}")
-        self.stock_data = get_stock_data_with_retry(stock_symbol, start_date, end_date, interval)
+        self.stock_data = load_bars(stock_symbol, start_date, end_date, interval)
         
         # If no data for intraday interval, try daily data as fallback
         if self.stock_data.empty and interval in ['60m', '30m', '15m', '5m', '1m']:
             print(f"DEBUG: No {interval} data available, trying daily data as fallback")
-            self.stock_data = get_stock_data_with_retry(stock_symbol, start_date, end_date, '1d')
+            self.stock_data = load_bars(stock_symbol, start_date, end_date, '1d')
             if not self.stock_data.empty:
                 print(f"DEBUG: Got {len(self.stock_data)} daily data points as fallback for {stock_symbol}")
         
@@ -93,7 +326,6 @@ class StockData:
             self.stock_error_message(stock_symbol, start_date)
         else:
             print(f"DEBUG: Got {len(self.stock_data)} data points for {stock_symbol}")
-            self.stock_data.index = self.stock_data.index.tz_localize(None)
             self.curtime = self.stock_data.index[0]
         
 
@@ -106,15 +338,12 @@ class StockData:
         Returns:
             pandas.DataFrame: Stock data for the specific date"""
 
-        stock = yf.Ticker(stock_symbol, session=session)
         date_obj = datetime.strptime(date, '%Y-%m-%d')
         new_date = date_obj + timedelta(days=1)
-        self.stock_data = stock.history(start=date, end=new_date.strftime('%Y-%m-%d'))
+        self.stock_data = load_bars(stock_symbol, date, new_date.strftime('%Y-%m-%d'))
         
         if self.stock_data.empty:
             self.stock_error_message(stock_symbol, date)
-        else:
-            self.stock_data.index = self.stock_data.index.tz_localize(None)
 
     # retrive stock data for minute time intervals 
     def get_stock_data_for_time_interval(self, stock_symbol, period, interval):
@@ -133,111 +362,153 @@ class StockData:
         elif int(period[0:-1]) > 8 and interval == "1m":
             return "Error: Period cannot be greater than 8 days for 1-minute intervals"
     
-        stock = yf.Ticker(stock_symbol, session=session)
-        self.stock_data = stock.history(period=period, interval=interval)
+        self.stock_data = load_bars(stock_symbol, interval=interval, period=period)
         
         if self.stock_data.empty:
             self.stock_error_message(stock_symbol, period)
-        else:
-            self.stock_data.index = self.stock_data.index.tz_localize(None)
     
-    def get_price(self):
-        time = self.curtime
-        if time in self.stock_data.index:
-            mid_price = (float(self.stock_data.loc[time, "High"]) + float(self.stock_data.loc[time, "Low"]))/2
-            return mid_price
+    def _index_bars(self):
+        """Keep the bars as contiguous arrays (epoch-ns times, mid prices) for fast lookups"""
+        frame = getattr(self, 'stock_data', None)
+        self._indexed_frame = frame
+        self._times_buf = None
+        if frame is None or frame.empty:
+            self._times = np.empty(0, dtype=np.int64)
+            self._mids = np.empty(0, dtype=np.float64)
+            self._max_diff_ns = int(timedelta(hours=2).total_seconds() * 1e9)
+            return
+
+        self._times = np.ascontiguousarray(frame.index.as_unit('ns').asi8)
+        self._mids = np.ascontiguousarray(
+            (frame['High'].to_numpy(dtype=np.float64) + frame['Low'].to_numpy(dtype=np.float64)) / 2
+        )
+        # Only use closest time if it's within 2 hours (for intraday) or 1 day (for daily)
+        # Check if this is intraday data by looking at the time difference between consecutive points
+        if len(self._times) > 1:
+            is_intraday = (self._times[1] - self._times[0]) <= timedelta(hours=1).total_seconds() * 1e9
         else:
-            # Try to find the closest available timestamp
-            available_times = self.stock_data.index
-            if len(available_times) == 0:
+            is_intraday = True  # Assume intraday if we can't determine
+        max_diff = timedelta(hours=2) if is_intraday else timedelta(days=1)
+        self._max_diff_ns = int(max_diff.total_seconds() * 1e9)
+
+    def _bar_arrays(self):
+        if getattr(self, '_indexed_frame', None) is not self.__dict__.get('_stock_data'):
+            self._index_bars()
+        return self._times, self._mids
+
+    @staticmethod
+    def _to_ns(times):
+        index = pd.DatetimeIndex(pd.to_datetime(times))
+        if index.tz is not None:
+            index = index.tz_localize(None)
+        return index.as_unit('ns').asi8
+
+    def _nearest(self, times_ns):
+        """Index of the closest bar for each requested time (ties go to the earlier bar)"""
+        times, _ = self._bar_arrays()
+        right = np.searchsorted(times, times_ns, side='left')
+        right = np.minimum(right, len(times) - 1)
+        left = np.maximum(right - 1, 0)
+        use_left = np.abs(times_ns - times[left]) <= np.abs(times[right] - times_ns)
+        return np.where(use_left, left, right)
+
+    def get_price(self):
+        time = pd.Timestamp(self.curtime)
+        times, mids = self._bar_arrays()
+        if len(times) == 0:
+            if not getattr(self, '_empty_reported', False):
                 print(f"DEBUG: No stock data available for {self.ticker}")
-                return None
-            
-            # Debug: Print available times for first few calls
-            if not hasattr(self, '_debug_printed'):
-                print(f"DEBUG: Available times for {self.ticker}: {available_times[:5].tolist()}...")
-                print(f"DEBUG: Requested time: {time}")
-                self._debug_printed = True
-            
-            # Find the closest time (within reasonable range)
-            time_diff = abs(available_times - time)
-            closest_idx = time_diff.argmin()
-            closest_time = available_times[closest_idx]
-            
-            # Only use closest time if it's within 2 hours (for intraday) or 1 day (for daily)
-            # Check if this is intraday data by looking at the time difference between consecutive points
-            if len(available_times) > 1:
-                time_gap = available_times[1] - available_times[0]
-                is_intraday = time_gap <= timedelta(hours=1)
-            else:
-                is_intraday = True  # Assume intraday if we can't determine
-            
-            max_diff = timedelta(hours=2) if is_intraday else timedelta(days=1)
-            if abs(closest_time - time) <= max_diff:
-                mid_price = (float(self.stock_data.loc[closest_time, "High"]) + float(self.stock_data.loc[closest_time, "Low"]))/2
-                # Debug: print when we're using closest time
-                if abs(closest_time - time) > timedelta(minutes=5):  # Only print if significant difference
-                    print(f"Using closest available time {closest_time} for requested time {time} (diff: {abs(closest_time - time)})")
-                return mid_price
-            else:
-                # Market is truly closed (no data within reasonable range)
-                print(f"No data available within {max_diff} of requested time {time} for {self.ticker}")
-                return None
-    
+                self._empty_reported = True
+            return None
+
+        t = self._to_ns([time])
+        idx = int(self._nearest(t)[0])
+        diff_ns = abs(int(t[0]) - int(times[idx]))
+        if diff_ns == 0:
+            return float(mids[idx])
+
+        # Debug: Print available times for first few calls
+        if not hasattr(self, '_debug_printed'):
+            print(f"DEBUG: Available times for {self.ticker}: {self.stock_data.index[:5].tolist()}...")
+            print(f"DEBUG: Requested time: {time}")
+            self._debug_printed = True
+
+        closest_time = pd.Timestamp(int(times[idx]))
+        if diff_ns <= self._max_diff_ns:
+            # Debug: print when we're using closest time
+            if diff_ns > timedelta(minutes=5).total_seconds() * 1e9:  # Only print if significant difference
+                print(f"Using closest available time {closest_time} for requested time {time} (diff: {abs(closest_time - time)})")
+            return float(mids[idx])
+        else:
+            # Market is truly closed (no data within reasonable range)
+            max_diff = timedelta(microseconds=self._max_diff_ns // 1000)
+            print(f"No data available within {max_diff} of requested time {time} for {self.ticker}")
+            return None
+
+    def get_prices(self, times):
+        """Mid prices for many timestamps at once.
+        Args:
+            times: sequence of datetimes / Timestamps / datetime64 values
+        Returns:
+            numpy.ndarray: float64 prices, NaN where no bar is within tolerance"""
+        bar_times, mids = self._bar_arrays()
+        times_ns = self._to_ns(times)
+        if len(bar_times) == 0:
+            return np.full(len(times_ns), np.nan)
+        idx = self._nearest(times_ns)
+        within = np.abs(times_ns - bar_times[idx]) <= self._max_diff_ns
+        return np.where(within, mids[idx], np.nan)
+
+    def get_prices_asof(self, times):
+        """Mid price of the last bar at or before each timestamp (no look-ahead).
+        Args:
+            times: sequence of datetimes / Timestamps / datetime64 values
+        Returns:
+            numpy.ndarray: float64 prices, NaN before the first bar or when the
+            last bar is further back than the lookup tolerance"""
+        bar_times, mids = self._bar_arrays()
+        times_ns = self._to_ns(times)
+        if len(bar_times) == 0:
+            return np.full(len(times_ns), np.nan)
+        idx = np.searchsorted(bar_times, times_ns, side='right') - 1
+        safe_idx = np.maximum(idx, 0)
+        within = (idx >= 0) & (times_ns - bar_times[safe_idx] <= self._max_diff_ns)
+        return np.where(within, mids[safe_idx], np.nan)
+
+    @property
+    def indicators(self):
+        """IndicatorEngine over the Close column, rebuilt only when stock_data is replaced"""
+        frame = getattr(self, 'stock_data', None)  # folds in appended bars first
+        if getattr(self, '_indicator_frame', None) is not frame or not hasattr(self, '_indicators'):
+            self._indicators = IndicatorEngine(frame)
+            self._indicator_frame = frame
+        return self._indicators
+
     def moving_average(self, window='1h'):
-        self.stock_data["SMA"] = self.stock_data['Close'].rolling(window=window).mean()
-        return self.stock_data.loc[self.curtime, "SMA"]
+        """Simple moving average of Close as of curtime (the frame is left untouched)"""
+        return self.indicators.at('sma', self.curtime, window=window)
 
     def price_increase(self):
+        """Percent change of Close from the first bar to the last bar at or before curtime"""
+        engine = self.indicators
+        if len(engine) == 0:
+            print("No data available for start time")
+            return None
+        changes = engine.compute('change')
+        if np.isnan(changes[0]):
+            print("Start price is zero, cannot calculate percentage change")
+            return None
+
         current_time = self.curtime
-        start_time = self.stock_data.index[0]
-        # Get the start price
-        if start_time in self.stock_data.index:
-            start_price = self.stock_data.loc[start_time, 'Close']
-        else:
-            # Find the closest available time to start_time
-            available_times = self.stock_data.index
-            if len(available_times) == 0:
-                print("No data available for start time")
-                return None
-            
-            # Find the closest time after or equal to start_time
-            valid_times = available_times[available_times >= start_time]
-            if len(valid_times) == 0:
-                print(f"No data available after start time {start_time}")
-                return None
-            
-            closest_start_time = valid_times[0]
-            start_price = self.stock_data.loc[closest_start_time, 'Close']
-        
-        # Get the current price
         if current_time is None:
             # Use the latest available time
-            current_price = self.stock_data['Close'].iloc[-1]
-            current_time = self.stock_data.index[-1]
+            i = len(engine) - 1
         else:
-            if current_time in self.stock_data.index:
-                current_price = self.stock_data.loc[current_time, 'Close']
-            else:
-                # Find the closest available time to current_time
-                available_times = self.stock_data.index
-                valid_times = available_times[available_times <= current_time]
-                if len(valid_times) == 0:
-                    print(f"No data available before current time {current_time}")
-                    return None
-                
-                closest_current_time = valid_times[-1]
-                current_price = self.stock_data.loc[closest_current_time, 'Close']
-                current_time = closest_current_time
-        
-        # Calculate percentage change
-        if start_price == 0:
-            print("Start price is zero, cannot calculate percentage change")
-            return None
-        
-        change_pct = (current_price - start_price) / start_price * 100
-        
-        return change_pct
+            i = engine.index_at(current_time)
+            if i is None:
+                print(f"No data available before current time {current_time}")
+                return None
+        return float(changes[i])
 
 
 def main():
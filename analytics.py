@@ -0,0 +1,122 @@
+import numpy as np
+
+'''Vectorized performance analytics over a portfolio value history'''
+
+PERIODS_PER_YEAR = {'daily': 252, 'weekly': 52, 'monthly': 12, 'annual': 1}
+NS_PER_YEAR = 365.25 * 24 * 3600 * 1e9
+
+
+def periods_per_year(period):
+    if period not in PERIODS_PER_YEAR:
+        print(f"Invalid period '{period}'. Using 'daily'.")
+        return 252
+    return PERIODS_PER_YEAR[period]
+
+
+def performance(timestamps, values, risk_free_rate=0.02, periods=252):
+    """Return and risk metrics from one pass over the history.
+
+    timestamps is datetime64[ns] and values float64, oldest first (e.g. the
+    views of a TimeSeriesBuffer). Returns are simple period-over-period
+    returns, skipping periods that start from a zero value. Ratios that are
+    undefined (zero volatility, no drawdown, ...) are None. Returns None
+    when there are fewer than 2 returns.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    previous, current = values[:-1], values[1:]
+    valid = previous != 0
+    returns = (current[valid] - previous[valid]) / previous[valid]
+    if len(returns) < 2:
+        return None
+
+    std = float(returns.std())
+    excess = returns - risk_free_rate / periods
+    mean_excess = float(excess.mean())
+    downside = float(np.sqrt(np.mean(np.minimum(excess, 0) ** 2)))
+
+    # Drawdown from the running peak; its duration runs from that peak
+    peaks = np.maximum.accumulate(values)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        drawdowns = np.where(peaks != 0, (peaks - values) / peaks, 0.0)
+    positions = np.arange(len(values))
+    peak_at = np.maximum.accumulate(np.where(values >= peaks, positions, 0))
+    underwater = positions - peak_at
+    times = np.asarray(timestamps, dtype='datetime64[ns]').view(np.int64)
+    max_drawdown = float(drawdowns.max())
+
+    elapsed = times[-1] - times[0]
+    cagr = None
+    if elapsed > 0 and values[0] > 0 and values[-1] > 0:
+        cagr = float((values[-1] / values[0]) ** (NS_PER_YEAR / elapsed) - 1)
+    total_return = float((values[-1] - values[0]) / values[0]) if values[0] else None
+
+    return {
+        'returns': len(returns),
+        'data_points': len(values),
+        'time_period_days': int(elapsed // (24 * 3600 * 10 ** 9)),
+        'total_return': total_return,
+        'annualized_return': (1 + total_return) ** (periods / len(returns)) - 1 if total_return is not None else None,
+        'cagr': cagr,
+        'volatility': std * periods ** 0.5,
+        'sharpe_ratio': mean_excess * periods / (std * periods ** 0.5) if std else None,
+        'sortino_ratio': mean_excess * periods / (downside * periods ** 0.5) if downside else None,
+        'max_drawdown': max_drawdown,
+        'max_drawdown_periods': int(underwater.max()),
+        'max_drawdown_days': float((times - times[peak_at]).max() / (24 * 3600 * 1e9)),
+        'calmar_ratio': cagr / max_drawdown if cagr is not None and max_drawdown else None,
+        'hit_rate': float(np.mean(returns > 0)),
+    }
+
+
+def aligned_returns(values, benchmark_prices):
+    """Portfolio and benchmark returns over the periods where both are known.
+
+    benchmark_prices is aligned to the value history's timestamps (an as-of
+    lookup such as BenchmarkService.prices, NaN where there is no price).
+    Returns (portfolio returns, benchmark returns, mask of the periods kept).
+    """
+    values = np.asarray(values, dtype=np.float64)
+    prices = np.asarray(benchmark_prices, dtype=np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        portfolio = values[1:] / values[:-1] - 1
+        benchmark = prices[1:] / prices[:-1] - 1
+    keep = (values[:-1] != 0) & (prices[:-1] > 0) & ~np.isnan(prices[1:])
+    return portfolio[keep], benchmark[keep], keep
+
+
+def beta(portfolio_returns, benchmark_returns, periods=252):
+    """Beta, correlation and R² of portfolio on benchmark returns (population
+    moments throughout), or None when the benchmark doesn't move"""
+    r = portfolio_returns - portfolio_returns.mean()
+    b = benchmark_returns - benchmark_returns.mean()
+    benchmark_variance = float(b @ b) / len(b)
+    if benchmark_variance <= 1e-18:  # Flat up to rounding in the mean
+        return None
+    portfolio_variance = float(r @ r) / len(r)
+    covariance = float(r @ b) / len(r)
+    correlation = covariance / np.sqrt(portfolio_variance * benchmark_variance) if portfolio_variance > 0 else 0.0
+    return {
+        'beta': covariance / benchmark_variance,
+        'correlation': correlation,
+        'r_squared': correlation ** 2,
+        'data_points': len(r),
+        'portfolio_volatility': np.sqrt(portfolio_variance * periods),
+        'benchmark_volatility': np.sqrt(benchmark_variance * periods),
+    }
+
+
+def rolling_beta(portfolio_returns, benchmark_returns, window):
+    """Beta over each trailing window of `window` aligned returns (NaN for the
+    first window - 1 and where the benchmark is flat over the window)"""
+    out = np.full(len(portfolio_returns), np.nan)
+    if len(portfolio_returns) < window or window < 2:
+        return out
+    windows = np.lib.stride_tricks.sliding_window_view
+    r = windows(portfolio_returns, window)
+    b = windows(benchmark_returns, window)
+    b = b - b.mean(axis=1, keepdims=True)
+    covariance = np.einsum('ij,ij->i', r - r.mean(axis=1, keepdims=True), b)
+    variance = np.einsum('ij,ij->i', b, b)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        out[window - 1:] = np.where(variance > 1e-18 * window, covariance / variance, np.nan)
+    return out
@@ -1,9 +1,23 @@
 from flask import Flask, render_template, jsonify, request
 from Portfolio import Portfolio
-from StockData import StockData
+from StockData import StockData, load_many
+from bar_cache import bar_cache, negative_cache
+from single_flight import history_flight
+from ticker_validation import ticker_validator
+from symbol_universe import DEFAULT_PATH as SYMBOL_UNIVERSE_DEFAULT_PATH, refresh_in_background, symbol_universe
+from bar_store import bar_store
+from trading_calendar import trading_calendar, session_days
+from price_matrix import PriceMatrix
+from quote_feed import QuoteBook, check_stream_config, create_feed
+from rule_book import RuleBook
+from benchmark import benchmark_service
+from streaming_risk import RollingBeta, default_hedge_beta, parse_hedge_beta
 from datetime import datetime, timedelta
 from dateutil.relativedelta import relativedelta
+import asyncio
 import json
+import numpy as np
+import pandas as pd
 import time
 import threading
 import uuid
@@ -38,6 +52,15 @@ load_dotenv()
 
 app = Flask(__name__)
 
+# Build (or rebuild a week-old) full symbol listing off the request path, so
+# validation and autocomplete don't have to ask the data provider
+if not bar_store.offline:
+    refresh_in_background(
+        symbol_universe,
+        os.environ.get('SYMBOL_UNIVERSE_PATH', SYMBOL_UNIVERSE_DEFAULT_PATH),
+        float(os.environ.get('SYMBOL_UNIVERSE_MAX_AGE_DAYS', 7))
+    )
+
 # Store active simulations
 active_simulations = {}
 
@@ -509,7 +532,7 @@ Please provide a focused analysis that directly addresses their question. Be spe
 advisor = AIAdvisor()
 
 class SimulationManager:
-    def __init__(self, simulation_id, initial_cash, start_date, duration_days, trading_frequency, tickers, trading_rules, beta_hedge_enabled=False):
+    def __init__(self, simulation_id, initial_cash, start_date, duration_days, trading_frequency, tickers, trading_rules, beta_hedge_enabled=False, hedge_beta=None):
         self.simulation_id = simulation_id
         self.initial_cash = initial_cash
         self.start_date = start_date
@@ -518,11 +541,26 @@ class SimulationManager:
         self.tickers = tickers
         self.trading_rules = trading_rules
         self.beta_hedge_enabled = beta_hedge_enabled
+        # Beta estimator the hedger acts on: {"window": bars} for a rolling beta,
+        # {"halflife": bars} for an EWMA beta, neither for the whole run so far
+        self.hedge_beta = parse_hedge_beta(hedge_beta) if hedge_beta is not None else default_hedge_beta()
+        self.rule_book = RuleBook(trading_rules)
+        self.step_delay = 0.1  # Seconds between steps, for the live progress view
         self.results = []
+        self.total_intervals = None  # Number of market sessions/bars, known once the schedule is built
         self.is_running = False
         self.is_complete = False
         self.thread = None
         
+    def progress(self):
+        """Fraction of the simulation's trading intervals processed so far"""
+        if self.is_complete:
+            return 1.0
+        if not self.total_intervals:
+            return 0
+        # results[0] is the initial state recorded before the first interval
+        return min(max(len(self.results) - 1, 0) / self.total_intervals, 1.0)
+        
     def run_simulation(self):
         """Run the portfolio simulation"""
         try:
@@ -533,10 +571,11 @@ class SimulationManager:
             # Initialize portfolio and stock data
             currtime = datetime.strptime(self.start_date, '%Y-%m-%d')
             
-            # If start date is a weekend, move to next weekday
-            while currtime.weekday() >= 5:  # Saturday=5, Sunday=6
-                currtime += timedelta(days=1)
-                print(f"Start date was weekend, moving to {currtime.strftime('%Y-%m-%d')}")
+            # If start date is not a trading session (weekend, holiday), move to the next one
+            first_session = trading_calendar.next_session(currtime).to_pydatetime()
+            if first_session != currtime:
+                currtime = first_session
+                print(f"Start date was not a trading day, moving to {currtime.strftime('%Y-%m-%d')}")
             
             # For intraday simulations, start at market open (9:30 AM)
             if self.trading_frequency == 'intraday':
@@ -546,14 +585,37 @@ class SimulationManager:
             end_date_str = (currtime + timedelta(days=self.duration_days + 30)).strftime('%Y-%m-%d')
             
             port = Portfolio(self.initial_cash, start_date_str, end_date_str)
+            port.beta_estimator = self._beta_estimator()
             
-            # Initialize stock data with appropriate interval
-            data = {}
+            # Load every ticker the simulation touches up front, in one batched request
             interval = '60m' if self.trading_frequency == 'intraday' else '1d'
-            for ticker in self.tickers.keys():
-                data[ticker] = StockData(ticker, start_date_str, end_date_str)
-                # Update the stock data with the correct interval
-                data[ticker].get_stock_data(ticker, start_date_str, end_date_str, interval)
+            needed = list(self.tickers.keys()) + list(self.trading_rules.keys())
+            if self.beta_hedge_enabled:
+                needed.append('VOO')
+            needed.append('^GSPC')  # Benchmark for the risk metrics, at the simulation's own interval
+            data, self.data_failures = load_many(needed, start_date_str, end_date_str, interval)
+            for ticker, reason in self.data_failures.items():
+                print(f"Warning: Could not load data for {ticker}: {reason}")
+            
+            # Run simulation over real market sessions only (no weekends, holidays or after-hours slots)
+            if self.trading_frequency == 'intraday':
+                # For intraday: every 60-minute bar of each session
+                schedule = trading_calendar.intraday_schedule(currtime, self.duration_days, '60m')
+            else:
+                # For daily: one step per session
+                schedule = trading_calendar.daily_schedule(currtime, self.duration_days)
+            schedule_days = session_days(schedule)
+            self.total_intervals = len(schedule)
+            
+            # Align every ticker (portfolio, rules, benchmarks) onto the steps once;
+            # rules, hedging and valuation all read prices from this matrix
+            matrix_tickers = [ticker for ticker in dict.fromkeys(needed) if ticker in data]
+            prices = PriceMatrix.build(
+                pd.DatetimeIndex([currtime]).append(schedule),
+                {ticker: data[ticker] for ticker in matrix_tickers}
+            )
+            port.use_price_matrix(prices)
+            cursor = prices.cursor()  # row 0 is the starting point, before the first step
             
             # Initial purchases with real market prices using the same stock data objects
             print(f"Starting with cash: ${port.cash:,.2f}")
@@ -582,364 +644,381 @@ class SimulationManager:
             print(f"Final cash after all purchases: ${port.cash:,.2f}")
             print(f"Final positions after all purchases: {port.positions}")
             
-            # Calculate portfolio value right after initial purchases
-            initial_portfolio_value = port.get_value(currtime)
-            print(f"Portfolio value after initial purchases: ${initial_portfolio_value:,.2f}")
-            
-            # Record initial state (after purchases) as first result
-            initial_interval_label = 'Day 0 (Initial)' if self.trading_frequency == 'daily' else 'Day 0, Initial'
-            initial_result = {
-                'day': 0,
-                'interval_label': initial_interval_label,
-                'date': currtime.strftime('%Y-%m-%d %H:%M') if self.trading_frequency == 'intraday' else currtime.strftime('%Y-%m-%d'),
-                'prices': {ticker: data[ticker].get_price() for ticker in self.tickers.keys() if data[ticker].get_price() is not None},
-                'portfolio_value': initial_portfolio_value,
-                'trades': [],
-                'positions': port.positions.copy(),
-                'cash': port.cash,
-                'pnl': port.get_PNL(currtime)
-            }
-            self.results.append(initial_result)
-            print(f"Recorded initial result: positions={port.positions}, value=${initial_portfolio_value:,.2f}")
+            self._record_initial_state(port, currtime, cursor.prices(self.tickers.keys()))
             
-            # Run simulation based on trading frequency
-            if self.trading_frequency == 'intraday':
-                # For intraday: simulate 60-minute intervals within each day
-                total_intervals = self.duration_days * 6  # 6 intervals per day (6 hours / 60 min)
-                interval_delta = timedelta(hours=1)
-            else:
-                # For daily: simulate day by day
-                total_intervals = self.duration_days
-                interval_delta = timedelta(days=1)
-            
-            for i in range(total_intervals):
+            for i, currtime in enumerate(schedule.to_pydatetime()):
                 if not self.is_running:  # Check if simulation was stopped
                     break
-                    
-                # Move to next interval
-                currtime = currtime + interval_delta
-                
-                # Update current time for all stock data objects
-                for ticker in self.tickers.keys():
-                    data[ticker].curtime = currtime
-                
-                # Get current prices for portfolio tickers
-                current_prices = {}
-                for ticker in self.tickers.keys():
-                    price = data[ticker].get_price()
-                    if price is not None:
-                        current_prices[ticker] = price
-                
-                # Also fetch VOO price for hedging if beta hedge is enabled
-                if self.beta_hedge_enabled and 'VOO' not in current_prices:
-                    voo_price = self._get_voo_price(currtime)
-                    if voo_price:
-                        current_prices['VOO'] = voo_price
-                
-                # Get current prices for trading rule tickers (if not already fetched)
-                for ticker in self.trading_rules.keys():
-                    if ticker not in current_prices:
-                        # Fetch real stock data for trading rule tickers
-                        try:
-                            temp_data = StockData(ticker, start_date_str, end_date_str)
-                            interval = '60m' if self.trading_frequency == 'intraday' else '1d'
-                            temp_data.get_stock_data(ticker, start_date_str, end_date_str, interval)
-                            temp_data.curtime = currtime
-                            price = temp_data.get_price()
-                            if price is not None:
-                                current_prices[ticker] = price
-                                print(f"DEBUG: Fetched real price for {ticker}: ${price}")
-                            else:
-                                print(f"DEBUG: No price available for {ticker}, using dummy price")
-                                current_prices[ticker] = 100.0  # Fallback dummy price
-                        except Exception as e:
-                            print(f"DEBUG: Error fetching data for {ticker}: {e}, using dummy price")
-                            current_prices[ticker] = 100.0  # Fallback dummy price
-                
-                # Check trading conditions and execute trades
-                trades_executed = []
-                rules_to_remove = []  # Track one-time rules that should be removed
-                
-                print(f"DEBUG: Processing {len(self.trading_rules)} trading rule groups")
-                for ticker, rules in self.trading_rules.items():
-                    print(f"DEBUG: Processing {len(rules)} rules for {ticker}")
-                    try:
-                        if ticker in current_prices:
-                            price = current_prices[ticker]
-                            print(f"DEBUG: Price for {ticker}: ${price}")
-                            for rule_index, rule in enumerate(rules):
-                                print(f"DEBUG: Processing rule: {rule}")
-                                rule_executed = False
-                                
-                                # Handle sell rules
-                                if rule['action'] == 'sell':
-                                    if rule['condition'] == 'greater_than' and price > rule['threshold']:
-                                        if port.positions.get(ticker, 0) >= rule['shares']:
-                                            port.sell(ticker, price, rule['shares'], currtime)
-                                            trades_executed.append(f"Sold {rule['shares']} {ticker} @ ${price:.2f}")
-                                            rule_executed = True
-                                    elif rule['condition'] == 'less_than' and price < rule['threshold']:
-                                        if port.positions.get(ticker, 0) >= rule['shares']:
-                                            port.sell(ticker, price, rule['shares'], currtime)
-                                            trades_executed.append(f"Sold {rule['shares']} {ticker} @ ${price:.2f}")
-                                            rule_executed = True
-                                
-                                # Handle buy rules
-                                elif rule['action'] == 'buy':
-                                    if rule['condition'] == 'greater_than' and price > rule['threshold']:
-                                        # Check if we have enough cash to buy
-                                        cost = price * rule['shares']
-                                        if port.cash >= cost:
-                                            # Additional check: ensure portfolio value doesn't exceed initial cash
-                                            current_portfolio_value = port.get_total_portfolio_value(currtime)
-                                            if current_portfolio_value <= port.original_value:
-                                                port.buy(ticker, price + 1, rule['shares'], currtime)  # Add small buffer to ensure purchase
-                                                trades_executed.append(f"Bought {rule['shares']} {ticker} @ ${price:.2f}")
-                                                rule_executed = True
-                                            else:
-                                                print(f"DEBUG: Buy order skipped - portfolio value (${current_portfolio_value:,.2f}) exceeds initial cash (${port.original_value:,.2f})")
-                                    elif rule['condition'] == 'less_than' and price < rule['threshold']:
-                                        # Check if we have enough cash to buy
-                                        cost = price * rule['shares']
-                                        if port.cash >= cost:
-                                            # Additional check: ensure portfolio value doesn't exceed initial cash
-                                            current_portfolio_value = port.get_total_portfolio_value(currtime)
-                                            if current_portfolio_value <= port.original_value:
-                                                port.buy(ticker, price + 1, rule['shares'], currtime)  # Add small buffer to ensure purchase
-                                                trades_executed.append(f"Bought {rule['shares']} {ticker} @ ${price:.2f}")
-                                                rule_executed = True
-                                            else:
-                                                print(f"DEBUG: Buy order skipped - portfolio value (${current_portfolio_value:,.2f}) exceeds initial cash (${port.original_value:,.2f})")
-                                
-                                # If rule executed and it's a one-time rule, mark it for removal
-                                if rule_executed and rule.get('one_time', False):
-                                    rules_to_remove.append((ticker, rule_index))
-                                    print(f"DEBUG: One-time rule executed and marked for removal: {ticker} rule {rule_index}")
-                                    
-                        else:
-                            print(f"DEBUG: No price available for {ticker}")
-                    except Exception as e:
-                        print(f"ERROR: Error processing trading rules for {ticker}: {e}")
-                        import traceback
-                        traceback.print_exc()
-                        continue
                 
-                # Remove one-time rules that were executed (in reverse order to maintain indices)
-                for ticker, rule_index in reversed(rules_to_remove):
-                    if ticker in self.trading_rules and rule_index < len(self.trading_rules[ticker]):
-                        removed_rule = self.trading_rules[ticker].pop(rule_index)
-                        print(f"DEBUG: Removed one-time rule: {removed_rule}")
-                        # If no more rules for this ticker, remove the ticker entirely
-                        if not self.trading_rules[ticker]:
-                            del self.trading_rules[ticker]
-                            print(f"DEBUG: Removed ticker {ticker} from trading rules (no more rules)")
-                
-                # Beta hedging logic - run after all trading rules
-                if self.beta_hedge_enabled:
-                    print(f"DEBUG: Running beta hedge for day {i + 1}")
-                    hedge_trades = self._execute_beta_hedge(port, currtime, current_prices, data)
-                    trades_executed.extend(hedge_trades)
-                    if hedge_trades:
-                        print(f"DEBUG: Added {len(hedge_trades)} hedge trades: {hedge_trades}")
-                    else:
-                        print(f"DEBUG: No hedge trades generated for day {i + 1}")
+                # Move to this step's row of the shared price matrix
+                cursor.advance()
                 
-                # Get current portfolio value
-                current_value = port.get_value(currtime)
+                current_prices, rule_prices = self._step_prices(cursor, currtime)
                 
-                # Store interval result with meaningful labels
                 if self.trading_frequency == 'daily':
                     interval_label = f"Day {i + 1}"
                 else:  # intraday
-                    day_num = (i // 6) + 1
-                    interval_in_day = (i % 6) + 1
-                    # Format as "Day X, Interval Y" with time
-                    time_str = currtime.strftime('%H:%M')
-                    interval_label = f"Day {day_num}, {time_str}"
-                
-                daily_result = {
-                    'day': i + 1,
-                    'interval_label': interval_label,
-                    'date': currtime.strftime('%Y-%m-%d %H:%M') if self.trading_frequency == 'intraday' else currtime.strftime('%Y-%m-%d'),
-                    'prices': current_prices.copy(),
-                    'portfolio_value': current_value,
-                    'trades': trades_executed.copy(),
-                    'positions': port.positions.copy(),
-                    'cash': port.cash,
-                    'pnl': port.get_PNL(currtime),
-                    'one_time_rules_executed': len(rules_to_remove),  # Track how many one-time rules were executed
-                    'hedge_margin_balance': port.get_hedge_margin_balance()  # Track available hedge margin
-                }
-                
-                # Debug output for trades
-                if trades_executed:
-                    print(f"DEBUG: Day {i + 1} trades: {trades_executed}")
-                self.results.append(daily_result)
+                    # Format as "Day X, HH:MM"
+                    interval_label = f"Day {int(schedule_days[i])}, {currtime.strftime('%H:%M')}"
+                self._run_interval(port, i + 1, currtime, current_prices, rule_prices, data, interval_label)
                 
                 # Small delay for real-time effect
-                time.sleep(0.1)
+                if self.step_delay:
+                    time.sleep(self.step_delay)
             
-            # Calculate final metrics
-            if self.results:
-                # Use the actual initial portfolio value after initial purchases
-                initial_value = self.results[0]['portfolio_value']
-                final_value = self.results[-1]['portfolio_value']
-                
-                # Calculate return based on actual starting portfolio value
-                total_return = (final_value - initial_value) / initial_value * 100 if initial_value > 0 else 0
-                
-                print(f"Final metrics calculation:")
-                print(f"  Initial portfolio value: ${initial_value:,.2f}")
-                print(f"  Final portfolio value: ${final_value:,.2f}")
-                print(f"  Total return: {total_return:.2f}%")
-                
-                sharpe_ratio = port.calculate_sharpe_ratio()
-                volatility = port.calculate_volatility()
-                
-                # Calculate portfolio beta
-                beta_result = port.calculate_portfolio_beta()
+            self._finish(port)
+            
+        except Exception as e:
+            self._record_failure(e)
+    
+    def run_stream(self, feed):
+        """Run the simulation on bars pushed by a QuoteFeed (paper trading / replay).
+        feed may also be a /start_simulation "stream" config, built here off the request thread"""
+        try:
+            if isinstance(feed, dict):
+                interval = '60m' if self.trading_frequency == 'intraday' else '1d'
+                feed = create_feed(feed, self.stream_tickers(), self.start_date, self.duration_days, interval)
+            asyncio.run(self._consume_feed(feed))
+        except Exception as e:
+            self._record_failure(e)
+    
+    async def _consume_feed(self, feed):
+        """Rules, hedging and valuation run on every step the feed delivers.
+        Bars are appended to each ticker's StockData as they arrive, and the
+        portfolio values positions from the latest quote of each ticker."""
+        self.is_running = True
+        print(f"DEBUG: Starting streaming simulation with trading rules: {self.trading_rules}")
+        
+        start = datetime.strptime(self.start_date, '%Y-%m-%d')
+        end_date_str = (start + timedelta(days=self.duration_days + 30)).strftime('%Y-%m-%d')
+        port = Portfolio(self.initial_cash, self.start_date, end_date_str)
+        port.beta_estimator = self._beta_estimator()
+        quotes = QuoteBook()
+        port.use_price_matrix(quotes)
+        data = {ticker: StockData.from_frame(ticker, pd.DataFrame()) for ticker in self.stream_tickers()}
+        
+        step = 0
+        sessions = []
+        try:
+            async for timestamp, bars in feed:
+                if not self.is_running:  # Check if simulation was stopped
+                    break
+                for ticker, bar in bars.items():
+                    if ticker in data:
+                        data[ticker].append_bar(bar.time, bar.open, bar.high, bar.low, bar.close, bar.volume)
+                    quotes.update(bar)
+                currtime = timestamp.to_pydatetime()
+                if feed.total_steps:
+                    # The first step only opens the starting positions
+                    self.total_intervals = feed.total_steps - 1
                 
-                # Calculate hedge statistics with error handling
-                try:
-                    hedge_trades_count = len(port.hedge_trades) if hasattr(port, 'hedge_trades') else 0
-                    total_hedge_margin_used = sum(trade.get('margin_used', 0) for trade in port.hedge_trades) if hasattr(port, 'hedge_trades') else 0
-                    hedge_margin_remaining = port.get_hedge_margin_balance() if hasattr(port, 'get_hedge_margin_balance') else 0
-                except Exception as e:
-                    print(f"DEBUG: Error calculating hedge statistics: {e}")
-                    hedge_trades_count = 0
-                    total_hedge_margin_used = 0
-                    hedge_margin_remaining = 0
+                if not self.results:
+                    # Buy the starting positions once every holding has quoted
+                    if any(quotes.price(ticker) is None for ticker in self.tickers):
+                        continue
+                    print(f"Starting with cash: ${port.cash:,.2f}")
+                    for ticker, shares in self.tickers.items():
+                        price = quotes.price(ticker)
+                        port.buy(ticker, price, shares, currtime)
+                        print(f"Initial purchase: {shares} shares of {ticker} at ${price:.2f}")
+                    self._record_initial_state(port, currtime, quotes.prices(self.tickers))
+                    continue
                 
-                print(f"DEBUG: Creating final_metrics - Final value: ${final_value}, Total return: {total_return}%")
+                step += 1
+                if not sessions or sessions[-1] != currtime.date():
+                    sessions.append(currtime.date())
+                current_prices, rule_prices = self._step_prices(quotes, currtime)
+                if self.trading_frequency == 'daily':
+                    interval_label = f"Day {step}"
+                else:
+                    interval_label = f"Day {len(sessions)}, {currtime.strftime('%H:%M')}"
+                self._run_interval(port, step, currtime, current_prices, rule_prices, data, interval_label)
+        finally:
+            await feed.close()
+        
+        self._finish(port)
+    
+    def _beta_estimator(self):
+        return RollingBeta(**self.hedge_beta)
+    
+    def stream_tickers(self):
+        """Tickers a streaming simulation subscribes to"""
+        needed = list(self.tickers.keys()) + list(self.trading_rules.keys())
+        if self.beta_hedge_enabled:
+            needed.append('VOO')
+        needed.append('^GSPC')
+        return list(dict.fromkeys(needed))
+    
+    def _record_initial_state(self, port, currtime, prices):
+        """Record the state right after the initial purchases as results[0]"""
+        # Calculate portfolio value right after initial purchases
+        initial_portfolio_value = port.get_value(currtime)
+        print(f"Portfolio value after initial purchases: ${initial_portfolio_value:,.2f}")
+
+        # Record initial state (after purchases) as first result
+        initial_interval_label = 'Day 0 (Initial)' if self.trading_frequency == 'daily' else 'Day 0, Initial'
+        initial_result = {
+            'day': 0,
+            'interval_label': initial_interval_label,
+            'date': currtime.strftime('%Y-%m-%d %H:%M') if self.trading_frequency == 'intraday' else currtime.strftime('%Y-%m-%d'),
+            'prices': prices,
+            'portfolio_value': initial_portfolio_value,
+            'trades': [],
+            'positions': port.positions.copy(),
+            'cash': port.cash,
+            'pnl': port.get_PNL(currtime),
+            'risk': port.update_risk(currtime, initial_portfolio_value)
+        }
+        self.results.append(initial_result)
+        print(f"Recorded initial result: positions={port.positions}, value=${initial_portfolio_value:,.2f}")
+    
+    def _step_prices(self, quotes, currtime):
+        """Prices used at one step, read from a BarCursor or QuoteBook.
+        Returns ({ticker: price}, rule ticker prices aligned to self.rule_book.tickers)"""
+        # Get current prices for portfolio tickers
+        current_prices = quotes.prices(self.tickers)
+        
+        # Also fetch VOO price for hedging if beta hedge is enabled
+        if self.beta_hedge_enabled and 'VOO' not in current_prices:
+            voo_price = quotes.price('VOO') or self._get_voo_price(currtime)
+            if voo_price:
+                current_prices['VOO'] = voo_price
+        
+        # Get current prices for trading rule tickers
+        rule_tickers = self.rule_book.tickers
+        rule_prices = quotes.price_array(rule_tickers)
+        for j in np.flatnonzero(np.isnan(rule_prices)):
+            ticker = rule_tickers[j]
+            if ticker in current_prices:
+                rule_prices[j] = current_prices[ticker]
+            else:
+                print(f"DEBUG: No price available for {ticker}, using dummy price")
+                rule_prices[j] = 100.0  # Fallback dummy price
+        current_prices.update(
+            {ticker: price for ticker, price in zip(rule_tickers, rule_prices.tolist()) if ticker not in current_prices}
+        )
+        
+        return current_prices, rule_prices
+    
+    def _run_interval(self, port, step, currtime, current_prices, rule_prices, data, interval_label):
+        """Apply trading rules and hedging at one step, then record its result"""
+        # Check trading conditions and execute trades; the rule book finds the
+        # rules whose price condition holds, position and cash checks run per fill
+        trades_executed = []
+        rules_to_remove = []  # One-time rules that executed this step
+        
+        for k in self.rule_book.triggered(rule_prices):
+            ticker, rule = self.rule_book.rules[k]
+            price = current_prices[ticker]
+            try:
+                rule_executed = False
                 
-                # Calculate hedge impact analysis
-                hedge_analysis = self._calculate_hedge_impact(port) if self.beta_hedge_enabled else None
+                # Handle sell rules
+                if rule['action'] == 'sell':
+                    if port.positions.get(ticker, 0) >= rule['shares']:
+                        port.sell(ticker, price, rule['shares'], currtime)
+                        trades_executed.append(f"Sold {rule['shares']} {ticker} @ ${price:.2f}")
+                        rule_executed = True
                 
-                self.final_metrics = {
-                    'total_return_pct': round(total_return, 2),
-                    'final_value': round(final_value, 2),
-                    'total_pnl': round(final_value - self.initial_cash, 2),
-                    'sharpe_ratio': round(sharpe_ratio, 3) if sharpe_ratio else None,
-                    'volatility_pct': round(volatility * 100, 2) if volatility else None,
-                    'total_trades': len(port.past_trades),
-                    'final_positions': port.positions,
-                    'beta': beta_result['beta'] if beta_result else None,
-                    'beta_interpretation': beta_result['interpretation'] if beta_result else None,
-                    'correlation': beta_result['correlation'] if beta_result else None,
-                    'hedge_trades_count': hedge_trades_count,
-                    'total_hedge_margin_used': round(total_hedge_margin_used, 2),
-                    'hedge_margin_remaining': round(hedge_margin_remaining, 2),
-                    'hedge_trades': port.hedge_trades if hasattr(port, 'hedge_trades') else [],
-                    'hedge_analysis': hedge_analysis  # New comprehensive hedge analysis
-                }
+                # Handle buy rules
+                elif rule['action'] == 'buy':
+                    # Check if we have enough cash to buy
+                    cost = price * rule['shares']
+                    if port.cash >= cost:
+                        # Additional check: ensure portfolio value doesn't exceed initial cash
+                        current_portfolio_value = port.get_total_portfolio_value(currtime)
+                        if current_portfolio_value <= port.original_value:
+                            port.buy(ticker, price + 1, rule['shares'], currtime)  # Add small buffer to ensure purchase
+                            trades_executed.append(f"Bought {rule['shares']} {ticker} @ ${price:.2f}")
+                            rule_executed = True
+                        else:
+                            print(f"DEBUG: Buy order skipped - portfolio value (${current_portfolio_value:,.2f}) exceeds initial cash (${port.original_value:,.2f})")
                 
-                print(f"DEBUG: Final metrics created successfully: {self.final_metrics}")
-            
-            self.is_complete = True
-            self.is_running = False
-            
-            # Update global portfolio state for AI
-            update_portfolio_state(self.simulation_id, {
-                'initial_cash': self.initial_cash,
-                'start_date': self.start_date,
-                'duration_days': self.duration_days,
-                'tickers': self.tickers,
-                'trading_rules': self.trading_rules
-            })
-            
-            print(f"Simulation {self.simulation_id} completed successfully")
-            
-        except Exception as e:
-            print(f"ERROR: Simulation failed: {e}")
-            import traceback
-            traceback.print_exc()
-            
-            # Create basic final_metrics even if simulation failed
-            if not hasattr(self, 'final_metrics'):
-                final_value = self.initial_cash  # Fallback to initial cash
-                self.final_metrics = {
-                    'total_return_pct': 0.0,
-                    'final_value': final_value,
-                    'total_pnl': 0.0,
-                    'sharpe_ratio': None,
-                    'volatility_pct': None,
-                    'total_trades': 0,
-                    'final_positions': {},
-                    'beta': None,
-                    'beta_interpretation': 'N/A',
-                    'correlation': None,
-                    'hedge_trades_count': 0,
-                    'total_hedge_margin_used': 0.0,
-                    'hedge_margin_remaining': 0.0,
-                    'hedge_trades': []
-                }
-                print(f"DEBUG: Created fallback final_metrics due to error")
-            
-            self.error = str(e)
-            self.is_complete = True
-            self.is_running = False
+                # If rule executed and it's a one-time rule, mark it for removal
+                if rule_executed and rule.get('one_time', False):
+                    rules_to_remove.append(k)
+                    print(f"DEBUG: One-time rule executed and marked for removal: {ticker} {rule}")
+            except Exception as e:
+                print(f"ERROR: Error processing trading rules for {ticker}: {e}")
+                import traceback
+                traceback.print_exc()
+                continue
+        
+        # Retire one-time rules that were executed
+        for k in rules_to_remove:
+            ticker, rule = self.rule_book.rules[k]
+            self.rule_book.retire(k)
+            remaining = self.trading_rules.get(ticker, [])
+            if any(r is rule for r in remaining):
+                remaining[:] = [r for r in remaining if r is not rule]
+                print(f"DEBUG: Removed one-time rule: {rule}")
+                # If no more rules for this ticker, remove the ticker entirely
+                if not remaining:
+                    del self.trading_rules[ticker]
+                    print(f"DEBUG: Removed ticker {ticker} from trading rules (no more rules)")
+        
+        # Beta hedging logic - run after all trading rules
+        if self.beta_hedge_enabled:
+            print(f"DEBUG: Running beta hedge for day {step}")
+            hedge_trades = self._execute_beta_hedge(port, currtime, current_prices, data)
+            trades_executed.extend(hedge_trades)
+            if hedge_trades:
+                print(f"DEBUG: Added {len(hedge_trades)} hedge trades: {hedge_trades}")
+            else:
+                print(f"DEBUG: No hedge trades generated for day {step}")
+
+        # Get current portfolio value
+        current_value = port.get_value(currtime)
+
+        daily_result = {
+            'day': step,
+            'interval_label': interval_label,
+            'date': currtime.strftime('%Y-%m-%d %H:%M') if self.trading_frequency == 'intraday' else currtime.strftime('%Y-%m-%d'),
+            'prices': current_prices.copy(),
+            'portfolio_value': current_value,
+            'trades': trades_executed.copy(),
+            'positions': port.positions.copy(),
+            'cash': port.cash,
+            'pnl': port.get_PNL(currtime),
+            'one_time_rules_executed': len(rules_to_remove),  # Track how many one-time rules were executed
+            'hedge_margin_balance': port.get_hedge_margin_balance(),  # Track available hedge margin
+            'risk': port.update_risk(currtime, current_value)  # Volatility, Sharpe, drawdown and beta so far
+        }
+
+        # Debug output for trades
+        if trades_executed:
+            print(f"DEBUG: Day {step} trades: {trades_executed}")
+        self.results.append(daily_result)
+    
+    def _finish(self, port):
+        """Compute final metrics and mark the simulation complete"""
+        # Calculate final metrics
+        if self.results:
+            # Use the actual initial portfolio value after initial purchases
+            initial_value = self.results[0]['portfolio_value']
+            final_value = self.results[-1]['portfolio_value']
+
+            # Calculate return based on actual starting portfolio value
+            total_return = (final_value - initial_value) / initial_value * 100 if initial_value > 0 else 0
+
+            print(f"Final metrics calculation:")
+            print(f"  Initial portfolio value: ${initial_value:,.2f}")
+            print(f"  Final portfolio value: ${final_value:,.2f}")
+            print(f"  Total return: {total_return:.2f}%")
+
+            sharpe_ratio = port.calculate_sharpe_ratio()
+            volatility = port.calculate_volatility()
+
+            # Calculate portfolio beta, overall and over a trailing window
+            beta_result = port.calculate_portfolio_beta()
+            rolling_beta = port.calculate_rolling_beta()
+            date_format = '%Y-%m-%d %H:%M' if self.trading_frequency == 'intraday' else '%Y-%m-%d'
+
+            # Calculate hedge statistics with error handling
+            try:
+                hedge_trades_count = len(port.hedge_trades) if hasattr(port, 'hedge_trades') else 0
+                total_hedge_margin_used = port.hedge_trades.margin_used() if hasattr(port, 'hedge_trades') else 0
+                hedge_margin_remaining = port.get_hedge_margin_balance() if hasattr(port, 'get_hedge_margin_balance') else 0
+            except Exception as e:
+                print(f"DEBUG: Error calculating hedge statistics: {e}")
+                hedge_trades_count = 0
+                total_hedge_margin_used = 0
+                hedge_margin_remaining = 0
+
+            print(f"DEBUG: Creating final_metrics - Final value: ${final_value}, Total return: {total_return}%")
+
+            # Calculate hedge impact analysis
+            hedge_analysis = self._calculate_hedge_impact(port) if self.beta_hedge_enabled else None
+
+            self.final_metrics = {
+                'total_return_pct': round(total_return, 2),
+                'final_value': round(final_value, 2),
+                'total_pnl': round(final_value - self.initial_cash, 2),
+                'sharpe_ratio': round(sharpe_ratio, 3) if sharpe_ratio else None,
+                'volatility_pct': round(volatility * 100, 2) if volatility else None,
+                'total_trades': len(port.past_trades),
+                'final_positions': port.positions.copy(),
+                'beta': beta_result['beta'] if beta_result else None,
+                'beta_interpretation': beta_result['interpretation'] if beta_result else None,
+                'correlation': beta_result['correlation'] if beta_result else None,
+                'rolling_beta': [
+                    {'date': t.strftime(date_format), 'beta': round(b, 3)}
+                    for t, b in rolling_beta.dropna().items()
+                ] if rolling_beta is not None else [],
+                'hedge_trades_count': hedge_trades_count,
+                'total_hedge_margin_used': round(total_hedge_margin_used, 2),
+                'hedge_margin_remaining': round(hedge_margin_remaining, 2),
+                'hedge_trades': port.hedge_trades.api_records() if hasattr(port, 'hedge_trades') else [],
+                'hedge_analysis': hedge_analysis  # New comprehensive hedge analysis
+            }
+
+            print(f"DEBUG: Final metrics created successfully: {self.final_metrics}")
+
+        self.is_complete = True
+        self.is_running = False
+
+        # Update global portfolio state for AI
+        update_portfolio_state(self.simulation_id, {
+            'initial_cash': self.initial_cash,
+            'start_date': self.start_date,
+            'duration_days': self.duration_days,
+            'tickers': self.tickers,
+            'trading_rules': self.trading_rules
+        })
+
+        print(f"Simulation {self.simulation_id} completed successfully")
+    
+    def _record_failure(self, e):
+        print(f"ERROR: Simulation failed: {e}")
+        import traceback
+        traceback.print_exc()
+
+        # Create basic final_metrics even if simulation failed
+        if not hasattr(self, 'final_metrics'):
+            final_value = self.initial_cash  # Fallback to initial cash
+            self.final_metrics = {
+                'total_return_pct': 0.0,
+                'final_value': final_value,
+                'total_pnl': 0.0,
+                'sharpe_ratio': None,
+                'volatility_pct': None,
+                'total_trades': 0,
+                'final_positions': {},
+                'beta': None,
+                'beta_interpretation': 'N/A',
+                'correlation': None,
+                'hedge_trades_count': 0,
+                'total_hedge_margin_used': 0.0,
+                'hedge_margin_remaining': 0.0,
+                'hedge_trades': []
+            }
+            print(f"DEBUG: Created fallback final_metrics due to error")
+
+        self.error = str(e)
+        self.is_complete = True
+        self.is_running = False
     
     def _get_voo_price(self, currtime):
-        """Get VOO price with robust error handling and fallback logic"""
+        """VOO mid price as of currtime from the shared benchmark series (None if no bar in the last 5 days)"""
         try:
-            import yfinance as yf
-            
-            # For daily simulations, just use the date part
-            current_date = currtime.date()
-            
-            # Try to get recent VOO data (last 10 trading days)
-            end_date = current_date + timedelta(days=1)  # Include current date
-            start_date = current_date - timedelta(days=14)  # Go back 2 weeks
-            
-            print(f"DEBUG: Fetching VOO price for {current_date} (range: {start_date} to {end_date})")
-            
-            # Use yfinance directly for more reliable data fetching
-            voo_ticker = yf.Ticker('VOO')
-            voo_data = voo_ticker.history(start=start_date, end=end_date, interval='1d')
-            
-            if voo_data.empty:
-                print(f"DEBUG: No VOO data available for date range {start_date} to {end_date}")
-                return None
-            
-            # Find the closest trading day to our current date
-            available_dates = [d.date() for d in voo_data.index]
-            print(f"DEBUG: Available VOO trading dates: {available_dates}")
-            
-            # Try exact date match first
-            if current_date in available_dates:
-                row = voo_data[voo_data.index.date == current_date].iloc[0]
-                price = (row['High'] + row['Low']) / 2
-                print(f"DEBUG: Found exact VOO price for {current_date}: ${price:.2f}")
-                return float(price)
-            
-            # Find closest trading day (within 5 days)
-            date_diffs = [(abs((d - current_date).days), d) for d in available_dates]
-            date_diffs.sort()
-            
-            for days_diff, trading_date in date_diffs:
-                if days_diff <= 5:  # Only use dates within 5 days
-                    row = voo_data[voo_data.index.date == trading_date].iloc[0]
-                    price = (row['High'] + row['Low']) / 2
-                    print(f"DEBUG: Using VOO price from {trading_date} (closest to {current_date}): ${price:.2f}")
-                    return float(price)
-            
-            print(f"DEBUG: No recent VOO data within 5 days of {current_date}")
-            return None
-            
+            price = benchmark_service.price('VOO', currtime, max_age=timedelta(days=5))
+            if price is None:
+                print(f"DEBUG: No recent VOO data within 5 days of {currtime.date()}")
+            return price
         except Exception as e:
             print(f"DEBUG: Error fetching VOO price: {e}")
             import traceback
             traceback.print_exc()
             return None
-    
+
     def _calculate_hedge_impact(self, port):
         """Calculate the impact of hedging by comparing hedged vs non-hedged performance"""
         try:
             print("DEBUG: Calculating hedge impact analysis...")
             
-            # Separate regular trades from hedge trades
-            regular_trades = [trade for trade in port.past_trades if not trade.get('is_hedge', False)]
-            hedge_trades = port.hedge_trades if hasattr(port, 'hedge_trades') else []
+            # Hedge trades are kept in their own ledger
+            regular_trades = port.past_trades
+            hedge_trades = port.hedge_trades
             
             print(f"DEBUG: Regular trades: {len(regular_trades)}, Hedge trades: {len(hedge_trades)}")
             
@@ -999,17 +1078,8 @@ class SimulationManager:
     def _simulate_without_hedging(self, port, regular_trades):
         """Simulate what the portfolio value would be with only regular trades"""
         try:
-            # Start with initial cash
-            value = self.initial_cash
-            
-            # Add value from regular trades only
-            for trade in regular_trades:
-                if trade.get('action') == 'buy':
-                    # For buys, we spent cash but got shares
-                    continue  # Value already accounted for in current positions
-                elif trade.get('action') == 'sell':
-                    # For sells, we got cash
-                    value += trade.get('total_value', 0)
+            # Initial cash plus the net cash flow of regular trades only
+            value = self.initial_cash + regular_trades.cash_flow()
             
             # Add current value of positions (excluding hedge positions)
             for ticker, shares in port.positions.items():
@@ -1083,15 +1153,8 @@ class SimulationManager:
     def _calculate_hedge_cost(self, hedge_trades):
         """Calculate the total cost of hedging (commissions, bid-ask spreads, etc.)"""
         try:
-            # Simple cost calculation - could be made more sophisticated
-            total_cost = 0
-            for trade in hedge_trades:
-                # Assume a small cost per trade (commission + spread)
-                trade_value = trade.get('total_value', 0)
-                cost = trade_value * 0.001  # 0.1% cost per trade
-                total_cost += cost
-            
-            return round(total_cost, 2)
+            # Assume a small cost per trade (commission + spread): 0.1% of notional
+            return round(hedge_trades.fees(rate=0.001), 2)
             
         except Exception as e:
             print(f"DEBUG: Error calculating hedge cost: {e}")
@@ -1100,12 +1163,14 @@ class SimulationManager:
     def _execute_beta_hedge(self, port, currtime, current_prices, data):
         """Execute bidirectional beta hedging: short VOO for positive beta, buy VOO for negative beta"""
         try:
-            # Calculate current portfolio beta
-            beta_result = port.calculate_portfolio_beta()
-            if not beta_result or 'beta' not in beta_result:
+            # Current portfolio beta, maintained incrementally as each bar is recorded.
+            # None until the benchmark has actually moved over enough bars to estimate it.
+            current_beta = port.beta_estimator.beta
+            if current_beta is None:
+                print("DEBUG: Not enough benchmark moves yet to estimate beta, skipping hedge")
                 return []
             
-            current_beta = beta_result['beta']
+            current_beta = round(current_beta, 3)
             print(f"DEBUG: Current portfolio beta: {current_beta}")
             
             # Only hedge if beta is significant (absolute value > 0.01)
@@ -1249,36 +1314,30 @@ def index():
 @app.route('/validate_ticker/<ticker>')
 def validate_ticker(ticker):
     """Validate if a ticker symbol exists in Yahoo Finance"""
+    return jsonify(ticker_validator.validate(ticker))
+
+@app.route('/validate_tickers', methods=['POST'])
+def validate_tickers():
+    """Validate a list of ticker symbols concurrently in one request"""
+    data = request.json or {}
+    tickers = data.get('tickers', [])
+    if not isinstance(tickers, list):
+        return jsonify({'error': 'tickers must be a list'}), 400
+    if len(tickers) > 100:
+        return jsonify({'error': 'At most 100 tickers can be validated at once'}), 400
+    if not all(isinstance(ticker, str) for ticker in tickers):
+        return jsonify({'error': 'tickers must be strings'}), 400
+    return jsonify({'results': ticker_validator.validate_many(tickers)})
+
+@app.route('/autocomplete')
+def autocomplete():
+    """Suggest tickers whose symbol or company name starts with the query"""
+    query = request.args.get('q', '')
     try:
-        # Try to fetch basic info for the ticker using configured session
-        stock = yf.Ticker(ticker.upper(), session=session)
-        info = stock.info
-        
-        # Check if we got valid data (not empty dict)
-        if info and len(info) > 1:  # More than just basic metadata
-            # Check if it has essential fields that indicate a valid stock
-            if 'symbol' in info or 'shortName' in info or 'longName' in info:
-                return jsonify({
-                    'valid': True,
-                    'ticker': ticker.upper(),
-                    'name': info.get('shortName', info.get('longName', ticker.upper())),
-                    'exchange': info.get('exchange', 'Unknown'),
-                    'source': 'yfinance_with_headers'
-                })
-        
-        # If we get here, the ticker is not valid
-        return jsonify({
-            'valid': False,
-            'ticker': ticker.upper(),
-            'error': 'Ticker not found in Yahoo Finance database'
-        })
-        
-    except Exception as e:
-        return jsonify({
-            'valid': False,
-            'ticker': ticker.upper(),
-            'error': f'Error validating ticker: {str(e)}'
-        })
+        limit = min(int(request.args.get('limit', 10)), 50)
+    except ValueError:
+        limit = 10
+    return jsonify({'query': query, 'results': symbol_universe.search(query, limit)})
 
 @app.route('/start_simulation', methods=['POST'])
 def start_simulation():
@@ -1331,14 +1390,27 @@ def start_simulation():
         # Create and start simulation
         print(f"DEBUG: About to create SimulationManager with trading_rules: {trading_rules}")
         beta_hedge_enabled = data.get('beta_hedge_enabled', False)
+        hedge_beta = data.get('hedge_beta')
+        stream = data.get('stream')
+        try:
+            if hedge_beta is not None:
+                hedge_beta = parse_hedge_beta(hedge_beta)
+            if stream:
+                stream = check_stream_config(stream)
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
         simulation = SimulationManager(
             simulation_id, initial_cash, start_date, duration_days, 
-            trading_frequency, tickers, trading_rules, beta_hedge_enabled
+            trading_frequency, tickers, trading_rules, beta_hedge_enabled,
+            hedge_beta
         )
         
         print(f"DEBUG: SimulationManager created successfully")
-        # Start simulation in background thread
-        simulation.thread = threading.Thread(target=simulation.run_simulation)
+        # Start simulation in background thread; a "stream" block runs it on a quote feed instead
+        if stream:
+            simulation.thread = threading.Thread(target=simulation.run_stream, args=(stream,))
+        else:
+            simulation.thread = threading.Thread(target=simulation.run_simulation)
         simulation.thread.daemon = True
         simulation.thread.start()
         print(f"DEBUG: Simulation started in background thread")
@@ -1370,7 +1442,8 @@ def simulation_status(simulation_id):
         'is_running': simulation.is_running,
         'is_complete': simulation.is_complete,
         'results': simulation.results,
-        'progress': len(simulation.results) / simulation.duration_days if simulation.duration_days > 0 else 0
+        'progress': simulation.progress(),
+        'total_intervals': simulation.total_intervals
     }
     
     # Always include final_metrics if simulation is complete
@@ -1401,6 +1474,9 @@ def simulation_status(simulation_id):
     if hasattr(simulation, 'error'):
         response['error'] = simulation.error
     
+    if getattr(simulation, 'data_failures', None):
+        response['data_failures'] = simulation.data_failures
+    
     
     return jsonify(response)
 
@@ -1609,6 +1685,17 @@ def get_current_plot(plot_type):
             'error': str(e)
         }), 500
 
+@app.route('/cache_stats')
+def cache_stats():
+    """Report hit/miss counters for the shared market data caches"""
+    return jsonify({
+        'bar_cache': bar_cache.stats(),
+        'negative_cache': negative_cache.stats(),
+        'ticker_validation': ticker_validator.stats(),
+        'benchmarks': benchmark_service.stats(),
+        'single_flight': history_flight.stats()
+    })
+
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5002))
     debug = os.environ.get('FLASK_ENV') == 'development'
@@ -0,0 +1,147 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+'''Process-wide in-memory cache for downloaded OHLCV bars'''
+
+
+class BarCache:
+    """Thread-safe LRU cache of bar DataFrames keyed by (source, ticker, start, end, interval).
+
+    Entries are evicted least-recently-used first once either the number of
+    entries or their combined memory footprint goes over the configured cap.
+    Frames are copied on the way in and out so callers can freely mutate
+    what they get back (StockData rewrites the index, adds columns, etc).
+    """
+
+    def __init__(self, max_entries=2048, max_bytes=256 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # {key: (frame, nbytes)}
+        self._lock = threading.Lock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(ticker, start, end, interval, source='yahoo'):
+        """Normalize a request window into a cache key.
+        Period-based requests (e.g. '5d') pass the period as start and None as end."""
+        return (
+            source,
+            ticker.upper().strip(),
+            str(start) if start is not None else None,
+            str(end) if end is not None else None,
+            interval,
+        )
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            frame = entry[0]
+        return frame.copy()
+
+    def __contains__(self, key):
+        # Presence check only: no copy, no hit/miss counting, no LRU bump
+        with self._lock:
+            return key in self._entries
+
+    def put(self, key, frame):
+        frame = frame.copy()
+        nbytes = int(frame.memory_usage(index=True, deep=True).sum())
+        if nbytes > self.max_bytes:
+            # Never let a single oversized frame flush the whole cache
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.current_bytes -= old[1]
+            self._entries[key] = (frame, nbytes)
+            self.current_bytes += nbytes
+            while self._entries and (len(self._entries) > self.max_entries or self.current_bytes > self.max_bytes):
+                _, (_, evicted_bytes) = self._entries.popitem(last=False)
+                self.current_bytes -= evicted_bytes
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def stats(self):
+        """Return hit/miss counters and current occupancy"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'bytes': self.current_bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+            }
+
+
+class NegativeCache:
+    """Remembers bar cache keys whose fetch came back empty (invalid ticker,
+    weekend or holiday window) so repeated lookups fail fast instead of paying
+    for retries again. Entries expire after `ttl` seconds in case the data
+    shows up later (e.g. a window that includes today)."""
+
+    def __init__(self, ttl=600, max_entries=4096):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._expiry = OrderedDict()  # {key: monotonic expiry time}
+        self._lock = threading.Lock()
+        self.hits = 0
+
+    def add(self, key):
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            self._expiry.pop(key, None)
+            self._expiry[key] = time.monotonic() + self.ttl
+            while len(self._expiry) > self.max_entries:
+                self._expiry.popitem(last=False)
+
+    def discard(self, key):
+        with self._lock:
+            self._expiry.pop(key, None)
+
+    def __contains__(self, key):
+        with self._lock:
+            expiry = self._expiry.get(key)
+            if expiry is None:
+                return False
+            if expiry <= time.monotonic():
+                del self._expiry[key]
+                return False
+            self.hits += 1
+            return True
+
+    def clear(self):
+        with self._lock:
+            self._expiry.clear()
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._expiry), 'hits': self.hits, 'ttl_seconds': self.ttl}
+
+
+# Shared instance used by StockData (and through it, Portfolio and the simulator)
+bar_cache = BarCache(
+    max_entries=int(os.environ.get('BAR_CACHE_MAX_ENTRIES', 2048)),
+    max_bytes=int(os.environ.get('BAR_CACHE_MAX_MB', 256)) * 1024 * 1024,
+)
+
+# Keys known to have no data, checked by StockData.load_bars before fetching
+negative_cache = NegativeCache(ttl=float(os.environ.get('NEGATIVE_CACHE_TTL', 600)))
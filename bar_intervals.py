@@ -0,0 +1,87 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+'''Derive coarser intraday bars locally from one download of the finest available interval'''
+
+INTERVAL_MINUTES = {'1m': 1, '2m': 2, '5m': 5, '15m': 15, '30m': 30, '60m': 60, '90m': 90, '1h': 60}
+
+# Intervals worth fetching as a base, finest first, with how many days back Yahoo
+# keeps them and the longest window it serves in one request (None = no limit)
+BASE_INTERVALS = (
+    ('1m', 29, 7),
+    ('5m', 59, None),
+    ('60m', 729, None),
+)
+
+# Yahoo aligns intraday bars to the 9:30 open (60m bars are 9:30, 10:30, ...)
+SESSION_OPEN = timedelta(hours=9, minutes=30)
+
+_NS_PER_MINUTE = 60 * 10**9
+_NS_PER_DAY = 24 * 60 * _NS_PER_MINUTE
+_SUMMED_COLUMNS = {'Volume', 'Dividends', 'Stock Splits', 'Capital Gains'}
+
+
+def base_interval(interval, start_date, end_date, now=None):
+    """Return the finest interval Yahoo still serves for [start_date, end_date)
+    that `interval` can be built from, or None if it should be fetched as-is"""
+    minutes = INTERVAL_MINUTES.get(interval)
+    if minutes is None:
+        return None
+    now = pd.Timestamp(now or datetime.now())
+    start, end = pd.Timestamp(start_date), pd.Timestamp(end_date)
+    for base, lookback_days, max_span_days in BASE_INTERVALS:
+        base_minutes = INTERVAL_MINUTES[base]
+        if base_minutes >= minutes:
+            break
+        if minutes % base_minutes:
+            continue
+        if start < now - timedelta(days=lookback_days):
+            continue
+        if max_span_days is not None and end - start > timedelta(days=max_span_days):
+            continue
+        return base
+    return None
+
+
+def resample_bars(frame, interval):
+    """Aggregate intraday OHLCV bars into `interval` buckets anchored at the session open.
+
+    Open takes the first bar of each bucket, High/Low the max/min, Volume (and
+    dividends/splits) the sum, and Close or any other column the last bar.
+    Empty buckets (overnight, lunch-time gaps in the data) are simply absent."""
+    if frame.empty:
+        return frame.copy()
+    if not frame.index.is_monotonic_increasing:
+        frame = frame.sort_index()
+
+    width = INTERVAL_MINUTES[interval] * _NS_PER_MINUTE
+    anchor = SESSION_OPEN // timedelta(minutes=1) * _NS_PER_MINUTE
+    times = frame.index.as_unit('ns').asi8
+    day_open = times - times % _NS_PER_DAY + anchor
+    buckets = day_open + (times - day_open) // width * width
+
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    lasts = np.r_[starts[1:], len(times)] - 1
+
+    columns = {}
+    for name in frame.columns:
+        values = frame[name].to_numpy()
+        if not np.issubdtype(values.dtype, np.number):
+            columns[name] = values[lasts]
+            continue
+        values = values.astype(np.float64)
+        if name == 'Open':
+            columns[name] = values[starts]
+        elif name == 'High':
+            columns[name] = np.fmax.reduceat(values, starts)
+        elif name == 'Low':
+            columns[name] = np.fmin.reduceat(values, starts)
+        elif name in _SUMMED_COLUMNS:
+            columns[name] = np.add.reduceat(np.nan_to_num(values), starts)
+        else:
+            columns[name] = values[lasts]
+
+    index = pd.DatetimeIndex(buckets[starts].view('datetime64[ns]'), name=frame.index.name)
+    return pd.DataFrame(columns, index=index)
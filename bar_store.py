@@ -0,0 +1,197 @@
+import os
+import re
+import threading
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from trading_calendar import trading_calendar
+
+'''Persistent on-disk bar store so restarts and repeated backtests skip the network'''
+
+
+def _to_ns(value):
+    """Convert a date string / datetime / Timestamp to naive epoch nanoseconds"""
+    ts = pd.Timestamp(value)
+    if ts.tz is not None:
+        ts = ts.tz_localize(None)
+    return ts.as_unit('ns').value
+
+
+def _merge_ranges(ranges):
+    """Merge overlapping or touching [start, end) ranges"""
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+
+def _missing_ranges(coverage, start, end):
+    """Return the parts of [start, end) not covered by the (merged) coverage list"""
+    gaps = []
+    cursor = start
+    for cov_start, cov_end in coverage:
+        if cov_end <= cursor:
+            continue
+        if cov_start >= end:
+            break
+        if cov_start > cursor:
+            gaps.append((cursor, min(cov_start, end)))
+        cursor = max(cursor, cov_end)
+        if cursor >= end:
+            break
+    if cursor < end:
+        gaps.append((cursor, end))
+    return gaps
+
+
+class BarStore:
+    """One compressed .npz file per (source, ticker, interval) holding the bars
+    plus the list of date ranges that have already been fetched.
+
+    read_through() only asks the fetcher for the gaps between ranges already on
+    disk, then merges the new bars in. In offline mode it never calls the
+    fetcher and serves whatever is on disk.
+    """
+
+    def __init__(self, root=None, offline=None):
+        self.root = root or os.environ.get('BAR_STORE_DIR', '/tmp/tradesphere_bars')
+        if offline is None:
+            offline = os.environ.get('MARKET_DATA_OFFLINE', '').lower() in ('1', 'true', 'yes')
+        self.offline = offline
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+
+    def _path(self, source, ticker, interval):
+        safe_ticker = re.sub(r'[^A-Za-z0-9.\-]', '_', ticker.upper())
+        return os.path.join(self.root, source, f"{safe_ticker}_{interval}.npz")
+
+    def _lock_for(self, path):
+        with self._locks_guard:
+            lock = self._locks.get(path)
+            if lock is None:
+                lock = self._locks[path] = threading.Lock()
+            return lock
+
+    def _load(self, path):
+        """Return (frame, coverage) for a store file, or an empty frame if missing"""
+        if not os.path.exists(path):
+            return pd.DataFrame(), []
+        try:
+            with np.load(path, allow_pickle=False) as npz:
+                index = pd.DatetimeIndex(npz['index'].view('datetime64[ns]'), name=str(npz['index_name']) or None)
+                frame = pd.DataFrame(npz['values'], index=index, columns=[str(c) for c in npz['columns']])
+                coverage = [list(r) for r in npz['coverage'].tolist()]
+        except Exception as e:
+            print(f"DEBUG: Ignoring unreadable bar store file {path}: {e}")
+            return pd.DataFrame(), []
+        return frame, coverage
+
+    def _save(self, path, frame, coverage):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        numeric = frame.select_dtypes(include='number').astype('float64')
+        index = numeric.index.as_unit('ns').asi8 if len(numeric.index) else np.empty(0, dtype=np.int64)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            np.savez_compressed(
+                f,
+                index=index,
+                index_name=np.array(frame.index.name or ''),
+                columns=np.array(numeric.columns, dtype=str),
+                values=numeric.to_numpy(),
+                coverage=np.array(coverage, dtype=np.int64).reshape(-1, 2),
+            )
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def _slice(frame, start_ns, end_ns):
+        if frame.empty:
+            return frame
+        times = frame.index.as_unit('ns').asi8
+        lo, hi = np.searchsorted(times, [start_ns, end_ns], side='left')
+        return frame.iloc[lo:hi].copy()
+
+    def read(self, source, ticker, interval, start, end):
+        """Serve [start, end) from disk only"""
+        frame, _ = self._load(self._path(source, ticker, interval))
+        return self._slice(frame, _to_ns(start), _to_ns(end))
+
+    def missing(self, source, ticker, interval, start, end):
+        """Return the (start, end) Timestamp ranges of [start, end) not on disk yet"""
+        _, coverage = self._load(self._path(source, ticker, interval))
+        gaps = _missing_ranges(_merge_ranges(coverage), _to_ns(start), _to_ns(end))
+        return [(pd.Timestamp(s), pd.Timestamp(e)) for s, e in gaps]
+
+    @staticmethod
+    def _has_sessions(range_start, range_end):
+        return len(trading_calendar.sessions(pd.Timestamp(range_start), pd.Timestamp(range_end - 1))) > 0
+
+    def _merge(self, path, frame, coverage, fetched_frames, fetched_ranges):
+        """Fold newly fetched bars and ranges into a store file and return the merged frame.
+        fetched_frames[i] is what the fetch for fetched_ranges[i] returned."""
+        # Today's bars are still forming, so never mark them as covered
+        today_ns = _to_ns(datetime.now().date())
+        new_frames = [frame] if not frame.empty else []
+        for fetched, (range_start, range_end) in zip(fetched_frames, fetched_ranges):
+            if fetched is not None and not fetched.empty:
+                if fetched.index.tz is not None:
+                    fetched = fetched.copy()
+                    fetched.index = fetched.index.tz_localize(None)
+                new_frames.append(fetched)
+            elif self._has_sessions(range_start, range_end):
+                # An empty answer for trading days is a failed or throttled fetch,
+                # not proof there is no data: leave the gap for the next call
+                continue
+            if range_start < today_ns:
+                coverage.append([range_start, min(range_end, today_ns)])
+        if len(new_frames) > 1:
+            frame = pd.concat(new_frames)
+            frame = frame[~frame.index.duplicated(keep='last')].sort_index()
+        elif new_frames:
+            frame = new_frames[0]
+        if new_frames or coverage:
+            self._save(path, frame, _merge_ranges(coverage))
+        return frame
+
+    def write(self, source, ticker, interval, fetched, start, end):
+        """Merge bars fetched elsewhere (e.g. a batched download) covering [start, end)"""
+        if self.offline:
+            return
+        path = self._path(source, ticker, interval)
+        with self._lock_for(path):
+            frame, coverage = self._load(path)
+            self._merge(path, frame, coverage, [fetched], [(_to_ns(start), _to_ns(end))])
+
+    def read_through(self, source, ticker, interval, start, end, fetch):
+        """Return bars for [start, end), fetching only ranges not yet on disk.
+
+        fetch(gap_start, gap_end) receives naive Timestamps and must return a
+        DataFrame with a DatetimeIndex (empty if there is no data in the gap).
+        """
+        start_ns, end_ns = _to_ns(start), _to_ns(end)
+        path = self._path(source, ticker, interval)
+        if self.offline:
+            frame, _ = self._load(path)
+            return self._slice(frame, start_ns, end_ns)
+
+        with self._lock_for(path):
+            frame, coverage = self._load(path)
+            gaps = _missing_ranges(_merge_ranges(coverage), start_ns, end_ns)
+            if gaps:
+                fetched_frames, fetched_ranges = [], []
+                try:
+                    for gap_start, gap_end in gaps:
+                        fetched_frames.append(fetch(pd.Timestamp(gap_start), pd.Timestamp(gap_end)))
+                        fetched_ranges.append((gap_start, gap_end))
+                finally:
+                    # Keep whatever was fetched before a failure
+                    frame = self._merge(path, frame, coverage, fetched_frames, fetched_ranges)
+            return self._slice(frame, start_ns, end_ns)
+
+
+# Shared instance used by StockData and the data providers
+bar_store = BarStore()
@@ -0,0 +1,67 @@
+import argparse
+import contextlib
+import io
+import os
+import time
+from datetime import datetime, timedelta
+
+'''Bar throughput benchmark for a universe-sized portfolio, offline on synthetic prices
+
+    python bench_universe.py --tickers 500 --days 60 --frequency intraday
+'''
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure simulation bar throughput for a large portfolio')
+    parser.add_argument('--tickers', type=int, default=500)
+    parser.add_argument('--rules', type=int, default=100, help='tickers that also get a buy and a sell rule')
+    parser.add_argument('--days', type=int, default=60)
+    parser.add_argument('--frequency', choices=['daily', 'intraday'], default='intraday')
+    parser.add_argument('--start', default='2025-03-03')
+    parser.add_argument('--hedge', action='store_true', help='enable beta hedging (adds per-step beta work)')
+    args = parser.parse_args()
+
+    # Synthetic prices keep the run offline and deterministic
+    os.environ['DATA_PROVIDER'] = 'synthetic'
+    from app import SimulationManager
+    from StockData import load_many
+
+    tickers = {f"U{i:04d}": 10 for i in range(args.tickers)}
+    rules = {
+        ticker: [
+            {'action': 'sell', 'condition': 'greater_than', 'threshold': 150.0, 'shares': 1, 'one_time': False},
+            {'action': 'buy', 'condition': 'less_than', 'threshold': 50.0, 'shares': 1, 'one_time': False},
+        ]
+        for ticker in list(tickers)[:args.rules]
+    }
+    simulation = SimulationManager(
+        'bench', 10_000_000, args.start, args.days, args.frequency, tickers, rules, args.hedge
+    )
+    simulation.step_delay = 0
+
+    # Warm the bar cache first so the simulation timing is per-bar work only
+    interval = '60m' if args.frequency == 'intraday' else '1d'
+    end = (datetime.strptime(args.start, '%Y-%m-%d') + timedelta(days=args.days + 30)).strftime('%Y-%m-%d')
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        load_many(list(tickers) + ['^GSPC'], args.start, end, interval)
+        if interval != '1d':
+            load_many(list(tickers) + ['^GSPC'], args.start, end, '1d')
+    load_elapsed = time.perf_counter() - started
+
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        simulation.run_simulation()
+    elapsed = time.perf_counter() - started
+
+    if getattr(simulation, 'error', None):
+        raise SystemExit(f"Simulation failed: {simulation.error}")
+    steps = len(simulation.results) - 1
+    bars = steps * len(tickers)
+    print(f"{len(tickers)} tickers, {len(rules)} with rules, {steps} {args.frequency} steps")
+    print(f"Data load: {load_elapsed:.2f}s, simulation: {elapsed:.2f}s")
+    print(f"Throughput: {steps / elapsed:,.1f} steps/s, {bars / elapsed:,.0f} ticker-bars/s")
+
+
+if __name__ == '__main__':
+    main()
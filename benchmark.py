@@ -0,0 +1,135 @@
+import os
+import threading
+import time
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+from StockData import data_source, load_bars
+from bar_cache import negative_cache
+from single_flight import SingleFlight
+from trading_calendar import trading_calendar
+
+'''Process-wide benchmark price series (VOO, ^GSPC) for hedging and beta'''
+
+NS_PER_DAY = 24 * 3600 * 10 ** 9
+
+
+class BenchmarkSeries:
+    """One benchmark's daily bars as contiguous arrays (epoch-ns times, mid and close prices)"""
+
+    def __init__(self, ticker, frame):
+        self.ticker = ticker
+        if frame.empty:
+            self.times = np.empty(0, dtype=np.int64)
+            self.mids = np.empty(0, dtype=np.float64)
+            self.closes = np.empty(0, dtype=np.float64)
+        else:
+            self.times = np.ascontiguousarray(frame.index.as_unit('ns').asi8)
+            self.mids = np.ascontiguousarray(
+                (frame['High'].to_numpy(dtype=np.float64) + frame['Low'].to_numpy(dtype=np.float64)) / 2
+            )
+            self.closes = np.ascontiguousarray(frame['Close'].to_numpy(dtype=np.float64))
+
+    def __len__(self):
+        return len(self.times)
+
+    @staticmethod
+    def _to_ns(times):
+        index = pd.DatetimeIndex(pd.to_datetime(times))
+        if index.tz is not None:
+            index = index.tz_localize(None)
+        return index.as_unit('ns').asi8
+
+    def prices(self, times, max_age=timedelta(days=1)):
+        """Price as of each time, NaN if there is no bar within max_age.
+
+        A midnight time (a daily step) gets the mid of the last bar at or before
+        it. A time during the day can't use that day's bar, whose High / Low
+        span the whole session, so it gets the close of the last bar before the
+        day, with max_age counted back from the previous session.
+        """
+        times_ns = self._to_ns(times)
+        if len(self.times) == 0:
+            return np.full(len(times_ns), np.nan)
+        days_ns = times_ns - times_ns % NS_PER_DAY
+        intraday = times_ns != days_ns
+        idx = np.searchsorted(self.times, np.where(intraday, days_ns - 1, times_ns), side='right') - 1
+        safe_idx = np.maximum(idx, 0)
+        reference = np.where(intraday, trading_calendar.previous_sessions(days_ns), times_ns)
+        within = (idx >= 0) & (reference - self.times[safe_idx] <= pd.Timedelta(max_age).value)
+        return np.where(within, np.where(intraday, self.closes[safe_idx], self.mids[safe_idx]), np.nan)
+
+    def price(self, timestamp, max_age=timedelta(days=1)):
+        price = self.prices([timestamp], max_age)[0]
+        return None if np.isnan(price) else float(price)
+
+    def returns(self, times, max_age=timedelta(days=1)):
+        """Simple return between each pair of consecutive times (NaN where a price is missing)"""
+        prices = self.prices(times, max_age)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(prices[:-1] > 0, prices[1:] / prices[:-1] - 1, np.nan)
+
+
+class BenchmarkService:
+    """Loads each benchmark's full daily history once per process and data source.
+
+    Callers used to download a fresh window on every simulation step; here the
+    series from `history_start` to today is fetched (through the bar cache and
+    bar store) on first use and all lookups afterwards are a searchsorted
+    over in-memory arrays. A series is reloaded once the calendar day changes;
+    a load that came back empty is only kept for the negative cache TTL.
+    """
+
+    def __init__(self, history_start='2000-01-01'):
+        self.history_start = history_start
+        self._series = {}  # {(source, ticker): (BenchmarkSeries, loaded_on, expires_at or None)}
+        self._lock = threading.Lock()
+        self._flight = SingleFlight()
+        self.loads = 0
+
+    def _load(self, key):
+        source, ticker = key
+        end = (date.today() + timedelta(days=1)).strftime('%Y-%m-%d')
+        print(f"DEBUG: Loading {ticker} benchmark history {self.history_start} to {end} ({source})")
+        series = BenchmarkSeries(ticker, load_bars(ticker, self.history_start, end, '1d'))
+        expires_at = None
+        if not len(series):
+            # Likely a failed or throttled download: retry after the negative cache TTL
+            print(f"Warning: No {ticker} benchmark history loaded ({source}); will retry on a later call")
+            expires_at = time.monotonic() + negative_cache.ttl
+        with self._lock:
+            if expires_at is None or negative_cache.ttl > 0:
+                self._series[key] = (series, date.today(), expires_at)
+            self.loads += 1
+        return series
+
+    def series(self, ticker):
+        key = (data_source(), ticker.upper())
+        with self._lock:
+            entry = self._series.get(key)
+        if entry is not None and entry[1] == date.today() and (entry[2] is None or entry[2] > time.monotonic()):
+            return entry[0]
+        return self._flight.do(key, self._load, key)
+
+    def price(self, ticker, timestamp, max_age=timedelta(days=1)):
+        """Benchmark mid price as of timestamp, or None"""
+        return self.series(ticker).price(timestamp, max_age)
+
+    def prices(self, ticker, times, max_age=timedelta(days=1)):
+        return self.series(ticker).prices(times, max_age)
+
+    def returns(self, ticker, times, max_age=timedelta(days=1)):
+        return self.series(ticker).returns(times, max_age)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'series': {f"{source}:{ticker}": len(series) for (source, ticker), (series, _, _) in self._series.items()},
+                'loads': self.loads,
+            }
+
+
+# Shared instance used by beta calculation and hedging
+benchmark_service = BenchmarkService(os.environ.get('BENCHMARK_HISTORY_START', '2000-01-01'))
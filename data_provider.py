@@ -1,8 +1,16 @@
+import json
 import os
+import re
+import threading
 import time
+import zlib
+import numpy as np
 import requests
 import pandas as pd
 from datetime import datetime, timedelta
+from bar_store import bar_store
+from fetch_executor import fetch_executor
+from single_flight import history_flight
 
 
 class DataProviderError(Exception):
@@ -10,6 +18,8 @@ class DataProviderError(Exception):
 
 
 class BaseDataProvider:
+    name = "base"
+
     def validate_ticker(self, symbol: str) -> dict:
         raise NotImplementedError
 
@@ -23,6 +33,11 @@ class BaseDataProvider:
     ) -> pd.DataFrame:
         raise NotImplementedError
 
+    def get_history_many(self, symbols: list[str], **kwargs) -> dict:
+        """Fetch several symbols concurrently on the shared fetch executor.
+        Returns {symbol: Future} resolving to each symbol's DataFrame."""
+        return fetch_executor.map(self.get_history, symbols, **kwargs)
+
 
 class AlphaVantageProvider(BaseDataProvider):
     """Alpha Vantage-backed data provider.
@@ -30,28 +45,95 @@ class AlphaVantageProvider(BaseDataProvider):
     Notes (free tier constraints):
     - Intraday endpoints return up to ~100-500 points depending on function/plan
     - Daily adjusted supports long history
-    - Rate limit ~5 req/min on free key; we add basic backoff
+    - Rate limit ~5 req/min on free key; requests are paced by the shared
+      fetch_executor token bucket (RATE_LIMIT_ALPHA_VANTAGE to override)
     """
 
+    name = "alpha_vantage"
     BASE_URL = "https://www.alphavantage.co/query"
+    # Frame column -> Alpha Vantage bar key, per endpoint
+    INTRADAY_FIELDS = {
+        "Open": "1. open", "High": "2. high", "Low": "3. low", "Close": "4. close", "Volume": "5. volume",
+    }
+    DAILY_FIELDS = {
+        "Open": "1. open", "High": "2. high", "Low": "3. low", "Close": "4. close",
+        "Adj Close": "5. adjusted close", "Volume": "6. volume",
+    }
+    _layouts = {}  # Shared key tuple per bar field layout, see _bar_values
 
     def __init__(self, api_key: str | None = None):
         self.api_key = api_key or os.environ.get("ALPHAVANTAGE_API_KEY", "demo")
-        self.session = requests.Session()
-        self.session.headers.update({
+        self.headers = {
             "User-Agent": "TradeSphere/1.0 (+https://github.com/mikhailsal123/TradeSphere.ai)",
             "Accept": "application/json",
-        })
+        }
+
+    @property
+    def session(self) -> requests.Session:
+        # One pooled session per worker thread
+        return fetch_executor.session(self.name, self.headers)
 
-    def _get(self, params: dict, retries: int = 3, backoff: float = 1.0) -> dict:
+    @classmethod
+    def _bar_values(cls, pairs: list) -> dict | tuple:
+        # json object hook: bar objects ("1. open": "...", ...) become (keys, values)
+        # tuples instead of per-row dicts; rows with the same fields share one keys tuple
+        if pairs and pairs[0][0][:1].isdigit() and ". " in pairs[0][0][:4]:
+            keys = tuple(key for key, _ in pairs)
+            return cls._layouts.setdefault(keys, keys), tuple(value for _, value in pairs)
+        return dict(pairs)
+
+    @staticmethod
+    def _bars_frame(series: dict, fields: dict, index_name: str) -> pd.DataFrame:
+        """Build an ascending frame from a decoded {timestamp: (keys, values)} series,
+        taking each column from its named bar key. Raises DataProviderError when a
+        key is missing from the response."""
+        columns = list(fields)
+        if not series:
+            return pd.DataFrame(columns=columns, index=pd.DatetimeIndex([], name=index_name), dtype="float64")
+        index = pd.to_datetime(list(series.keys()), format="ISO8601")
+        rows = list(series.values())
+        layout = rows[0][0]
+        values = None
+        if all(row[0] is layout for row in rows):
+            missing = [key for key in fields.values() if key not in layout]
+            if missing:
+                raise DataProviderError(f"Alpha Vantage bars are missing {', '.join(missing)} (fields: {', '.join(layout)})")
+            positions = [layout.index(key) for key in fields.values()]
+            try:
+                values = np.array([row[1] for row in rows], dtype=np.float64)[:, positions]
+            except ValueError:
+                pass
+        if values is None:
+            # Mixed field layouts or blank values: coerce column by column, blanks become 0
+            records = pd.DataFrame.from_records([dict(zip(*row)) for row in rows])
+            missing = [key for key in fields.values() if key not in records.columns]
+            if missing:
+                raise DataProviderError(f"Alpha Vantage bars are missing {', '.join(missing)}")
+            values = (
+                records[list(fields.values())]
+                .apply(pd.to_numeric, errors="coerce")
+                .fillna(0)
+                .to_numpy(dtype=np.float64)
+            )
+        df = pd.DataFrame(values, index=index, columns=columns)
+        df.index.name = index_name
+        # Alpha Vantage lists newest first
+        df = df.iloc[::-1]
+        if not df.index.is_monotonic_increasing:
+            df = df.sort_index()
+        return df
+
+    def _get(self, params: dict, retries: int = 3, backoff: float = 1.0, bars: bool = False) -> dict:
         params = {**params, "apikey": self.api_key}
+        bucket = fetch_executor.bucket(self.name)
         for attempt in range(retries):
+            bucket.acquire()
             resp = self.session.get(self.BASE_URL, params=params, timeout=20)
             if resp.status_code == 200:
-                data = resp.json()
+                data = json.loads(resp.content, object_pairs_hook=self._bar_values) if bars else resp.json()
                 if "Note" in data or "Information" in data:
-                    time.sleep(backoff)
-                    backoff *= 1.5
+                    # Throttled: wait for the bucket to refill rather than guessing a delay
+                    bucket.drain()
                     continue
                 return data
             time.sleep(backoff)
@@ -102,25 +184,9 @@ class AlphaVantageProvider(BaseDataProvider):
                 "interval": av_interval,
                 "outputsize": "compact",  # free: ~100 points
                 "adjusted": "true",
-            })
+            }, bars=True)
             key = next((k for k in data.keys() if "Time Series" in k), None)
-            ts = data.get(key, {}) if key else {}
-            rows = []
-            for ts_str, v in ts.items():
-                try:
-                    ts_dt = datetime.fromisoformat(ts_str)
-                except Exception:
-                    # Alpha uses "YYYY-MM-DD HH:MM:SS"
-                    ts_dt = datetime.strptime(ts_str, "%Y-%m-%d %H:%M:%S")
-                rows.append({
-                    "Datetime": ts_dt,
-                    "Open": float(v.get("1. open", 0) or 0),
-                    "High": float(v.get("2. high", 0) or 0),
-                    "Low": float(v.get("3. low", 0) or 0),
-                    "Close": float(v.get("4. close", 0) or 0),
-                    "Volume": float(v.get("5. volume", 0) or 0),
-                })
-            df = pd.DataFrame(rows).sort_values("Datetime").set_index("Datetime")
+            df = self._bars_frame(data.get(key, {}) if key else {}, self.INTRADAY_FIELDS, "Datetime")
             if start is not None:
                 df = df[df.index >= start]
             if end is not None:
@@ -132,21 +198,8 @@ class AlphaVantageProvider(BaseDataProvider):
             "function": "TIME_SERIES_DAILY_ADJUSTED",
             "symbol": symbol,
             "outputsize": "full",
-        })
-        ts = data.get("Time Series (Daily)", {})
-        rows = []
-        for d_str, v in ts.items():
-            d_dt = datetime.strptime(d_str, "%Y-%m-%d")
-            rows.append({
-                "Date": d_dt,
-                "Open": float(v.get("1. open", 0) or 0),
-                "High": float(v.get("2. high", 0) or 0),
-                "Low": float(v.get("3. low", 0) or 0),
-                "Close": float(v.get("4. close", 0) or 0),
-                "Adj Close": float(v.get("5. adjusted close", v.get("4. close", 0)) or 0),
-                "Volume": float(v.get("6. volume", 0) or 0),
-            })
-        df = pd.DataFrame(rows).sort_values("Date").set_index("Date")
+        }, bars=True)
+        df = self._bars_frame(data.get("Time Series (Daily)", {}), self.DAILY_FIELDS, "Date")
         if start is not None:
             df = df[df.index >= start]
         if end is not None:
@@ -158,8 +211,268 @@ class AlphaVantageProvider(BaseDataProvider):
         return df
 
 
-def get_provider() -> BaseDataProvider:
-    # For now, always Alpha Vantage. Can be extended via ENV switch.
-    return AlphaVantageProvider()
+class StoredDataProvider(BaseDataProvider):
+    """Reads history through the on-disk bar store, delegating only the
+    missing date ranges to the wrapped provider."""
+
+    def __init__(self, provider: BaseDataProvider, store=None):
+        self.provider = provider
+        self.store = store or bar_store
+        self.name = provider.name
+
+    def validate_ticker(self, symbol: str) -> dict:
+        return self.provider.validate_ticker(symbol)
+
+    def get_history(
+        self,
+        symbol: str,
+        start: datetime | None = None,
+        end: datetime | None = None,
+        period: str | None = None,
+        interval: str = "1d",
+    ) -> pd.DataFrame:
+        symbol = symbol.upper().strip()
+        if start is None:
+            # Relative windows can't be keyed on disk
+            if self.store.offline:
+                raise DataProviderError(f"Offline mode: no fixed window for {symbol}")
+            key = (self.name, symbol, None, str(end), period, interval)
+            data = history_flight.do(key, self.provider.get_history, symbol, start, end, period, interval)
+            return data.copy()
+        if end is None:
+            end = datetime.utcnow()
+
+        def fetch_gap(gap_start, gap_end):
+            return self.provider.get_history(symbol, gap_start, gap_end, interval=interval)
+
+        # Concurrent identical requests share one read-through
+        key = (self.name, symbol, str(start), str(end), None, interval)
+        data = history_flight.do(key, self.store.read_through, self.name, symbol, interval, start, end, fetch_gap)
+        return data.copy()
+
+
+class SyntheticDataProvider(BaseDataProvider):
+    """Deterministic offline data for benchmarking and load tests.
+
+    mode="gbm": seeded geometric Brownian motion. Every ticker follows the
+    same one-factor model (a shared market shock plus an idiosyncratic one,
+    mixed by `correlation`). Daily closes are generated from a fixed origin,
+    so a given (seed, ticker, day) always has the same price whatever window
+    is requested. Intraday bars are Brownian bridges between daily closes.
+
+    mode="replay": serves recorded bars from `replay_dir`, one file per
+    ticker named TICKER_INTERVAL.csv/.parquet or TICKER.csv/.parquet.
+    """
+
+    ORIGIN = pd.Timestamp("2000-01-03")
+    HORIZON = pd.Timestamp("2040-01-01")
+    SESSION_OPEN = timedelta(hours=9, minutes=30)
+    SESSION_MINUTES = 390
+    TRADING_DAYS = 252
+
+    def __init__(
+        self,
+        mode: str = "gbm",
+        seed: int = 42,
+        drift: float = 0.08,
+        volatility: float = 0.25,
+        correlation: float = 0.5,
+        replay_dir: str | None = None,
+    ):
+        if mode not in ("gbm", "replay"):
+            raise DataProviderError(f"Unknown synthetic mode: {mode}")
+        if mode == "replay" and not replay_dir:
+            raise DataProviderError("Replay mode needs a replay_dir")
+        self.mode = mode
+        self.name = "synthetic" if mode == "gbm" else "replay"
+        self.seed = seed
+        self.drift = drift
+        self.volatility = volatility
+        self.correlation = min(max(correlation, 0.0), 1.0)
+        self.replay_dir = replay_dir
+        self._days = pd.bdate_range(self.ORIGIN, self.HORIZON, inclusive="left")
+        self._market_shocks = None
+        self._daily = {}  # {ticker: daily OHLCV frame over the whole horizon}
+        self._replay = {}  # {(ticker, interval): frame}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _ticker_seed(symbol: str) -> int:
+        return zlib.crc32(symbol.encode())
+
+    @staticmethod
+    def _interval_minutes(interval: str) -> int | None:
+        match = re.fullmatch(r"(\d+)(m|h)", interval)
+        if not match:
+            return None
+        return int(match.group(1)) * (60 if match.group(2) == "h" else 1)
+
+    def validate_ticker(self, symbol: str) -> dict:
+        symbol = symbol.upper().strip()
+        valid = True if self.mode == "gbm" else self._replay_path(symbol, "1d") is not None
+        return {
+            "valid": valid,
+            "ticker": symbol,
+            "name": symbol,
+            "exchange": "Synthetic" if self.mode == "gbm" else "Replay",
+            "source": self.name,
+        }
+
+    def get_history(
+        self,
+        symbol: str,
+        start: datetime | None = None,
+        end: datetime | None = None,
+        period: str | None = None,
+        interval: str = "1d",
+    ) -> pd.DataFrame:
+        symbol = symbol.upper().strip()
+        end = pd.Timestamp(end) if end is not None else pd.Timestamp(datetime.now())
+        if start is None:
+            start = end - self._period_delta(period)
+        start = pd.Timestamp(start)
+
+        if self.mode == "replay":
+            df = self._replay_frame(symbol, interval)
+        elif interval == "1d":
+            df = self._daily_frame(symbol)
+        elif interval == "1wk":
+            df = self._daily_frame(symbol).resample("W-MON", label="left", closed="left").agg({
+                "Open": "first", "High": "max", "Low": "min", "Close": "last", "Volume": "sum",
+            }).dropna()
+        else:
+            minutes = self._interval_minutes(interval)
+            if minutes is None:
+                raise DataProviderError(f"Unsupported synthetic interval: {interval}")
+            return self._intraday_frame(symbol, minutes, start, end)
+        return df[(df.index >= start) & (df.index < end)].copy()
+
+    @staticmethod
+    def _period_delta(period: str | None) -> timedelta:
+        match = re.fullmatch(r"(\d+)(d|wk|mo|y)", period or "")
+        if not match:
+            return timedelta(days=30)
+        count, unit = int(match.group(1)), match.group(2)
+        return timedelta(days=count * {"d": 1, "wk": 7, "mo": 30, "y": 365}[unit])
+
+    def _daily_frame(self, symbol: str) -> pd.DataFrame:
+        with self._lock:
+            cached = self._daily.get(symbol)
+            if cached is not None:
+                return cached
+            n = len(self._days)
+            if self._market_shocks is None:
+                self._market_shocks = np.random.default_rng([self.seed, 0]).standard_normal(n)
+            rng = np.random.default_rng([self.seed, self._ticker_seed(symbol)])
+            idio = rng.standard_normal(n)
+            shocks = np.sqrt(self.correlation) * self._market_shocks + np.sqrt(1 - self.correlation) * idio
+
+            dt = 1.0 / self.TRADING_DAYS
+            log_returns = (self.drift - 0.5 * self.volatility ** 2) * dt + self.volatility * np.sqrt(dt) * shocks
+            start_price = 20.0 + self._ticker_seed(symbol) % 480
+            close = start_price * np.exp(np.cumsum(log_returns))
+            open_ = np.concatenate(([start_price], close[:-1]))
+            wick = np.abs(rng.standard_normal((2, n))) * self.volatility * np.sqrt(dt) * 0.5
+            df = pd.DataFrame({
+                "Open": open_,
+                "High": np.maximum(open_, close) * (1 + wick[0]),
+                "Low": np.minimum(open_, close) * (1 - wick[1]),
+                "Close": close,
+                "Volume": np.round(rng.lognormal(np.log(1e6), 0.3, n)),
+            }, index=self._days.rename("Date"))
+            self._daily[symbol] = df
+            return df
+
+    def _intraday_frame(self, symbol: str, minutes: int, start: pd.Timestamp, end: pd.Timestamp) -> pd.DataFrame:
+        daily = self._daily_frame(symbol)
+        days = daily.loc[(daily.index >= start.normalize()) & (daily.index < end)]
+        bars = -(-self.SESSION_MINUTES // minutes)  # ceil
+        offsets = pd.to_timedelta(np.arange(bars) * minutes, unit="m") + self.SESSION_OPEN
+        sigma = self.volatility * np.sqrt(1.0 / (self.TRADING_DAYS * bars))
+        ticker_seed = self._ticker_seed(symbol)
+
+        frames = []
+        for day, row in days.iterrows():
+            ordinal = day.toordinal()
+            market = np.random.default_rng([self.seed, 0, ordinal, minutes]).standard_normal(bars)
+            rng = np.random.default_rng([self.seed, ticker_seed, ordinal, minutes])
+            steps = np.sqrt(self.correlation) * market + np.sqrt(1 - self.correlation) * rng.standard_normal(bars)
+            walk = np.cumsum(sigma * steps)
+            # Bridge the walk so the last bar closes at the daily close
+            target = np.log(row["Close"] / row["Open"])
+            walk += (np.arange(1, bars + 1) / bars) * (target - walk[-1])
+            close = row["Open"] * np.exp(walk)
+            open_ = np.concatenate(([row["Open"]], close[:-1]))
+            wick = np.abs(rng.standard_normal((2, bars))) * sigma * 0.5
+            frames.append(pd.DataFrame({
+                "Open": open_,
+                "High": np.maximum(open_, close) * (1 + wick[0]),
+                "Low": np.minimum(open_, close) * (1 - wick[1]),
+                "Close": close,
+                "Volume": np.round(row["Volume"] / bars * rng.uniform(0.5, 1.5, bars)),
+            }, index=day + offsets))
+
+        if not frames:
+            return pd.DataFrame(columns=["Open", "High", "Low", "Close", "Volume"],
+                                index=pd.DatetimeIndex([], name="Datetime"), dtype="float64")
+        df = pd.concat(frames)
+        df.index.name = "Datetime"
+        return df[(df.index >= start) & (df.index < end)]
+
+    def _replay_path(self, symbol: str, interval: str) -> str | None:
+        safe = re.sub(r"[^A-Za-z0-9.\-]", "_", symbol)
+        for name in (f"{safe}_{interval}", safe):
+            for ext in (".parquet", ".csv"):
+                path = os.path.join(self.replay_dir, name + ext)
+                if os.path.exists(path):
+                    return path
+        return None
+
+    def _replay_frame(self, symbol: str, interval: str) -> pd.DataFrame:
+        with self._lock:
+            cached = self._replay.get((symbol, interval))
+            if cached is not None:
+                return cached
+            path = self._replay_path(symbol, interval)
+            if path is None:
+                return pd.DataFrame(columns=["Open", "High", "Low", "Close", "Volume"],
+                                    index=pd.DatetimeIndex([], name="Date"), dtype="float64")
+            if path.endswith(".parquet"):
+                df = pd.read_parquet(path)
+            else:
+                df = pd.read_csv(path, index_col=0, parse_dates=True)
+            df.index = pd.DatetimeIndex(df.index)
+            if df.index.tz is not None:
+                df.index = df.index.tz_localize(None)
+            df = df.sort_index()
+            self._replay[(symbol, interval)] = df
+            return df
+
+
+_providers = {}
+_providers_lock = threading.Lock()
 
 
+def get_provider(name: str | None = None) -> BaseDataProvider:
+    """Return the shared provider selected by `name` or the DATA_PROVIDER env var.
+    alpha_vantage (default) reads through the on-disk bar store; synthetic and
+    replay are local and deterministic, so they are served directly."""
+    name = (name or os.environ.get("DATA_PROVIDER") or "alpha_vantage").lower()
+    with _providers_lock:
+        provider = _providers.get(name)
+        if provider is None:
+            if name == "synthetic":
+                provider = SyntheticDataProvider(
+                    seed=int(os.environ.get("SYNTHETIC_SEED", 42)),
+                    drift=float(os.environ.get("SYNTHETIC_DRIFT", 0.08)),
+                    volatility=float(os.environ.get("SYNTHETIC_VOLATILITY", 0.25)),
+                    correlation=float(os.environ.get("SYNTHETIC_CORRELATION", 0.5)),
+                )
+            elif name == "replay":
+                provider = SyntheticDataProvider(mode="replay", replay_dir=os.environ.get("REPLAY_DIR", "replay"))
+            elif name == "alpha_vantage":
+                provider = StoredDataProvider(AlphaVantageProvider())
+            else:
+                raise DataProviderError(f"Unknown data provider: {name}")
+            _providers[name] = provider
+        return provider
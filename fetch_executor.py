@@ -0,0 +1,124 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+'''Shared thread pool and per-provider rate limits for market data requests'''
+
+# Requests allowed per window (seconds) for each provider. Override with e.g.
+# RATE_LIMIT_ALPHA_VANTAGE=75/60 for a premium key.
+DEFAULT_LIMITS = {
+    'alpha_vantage': (5, 60),  # free tier: 5 requests/minute
+    'yahoo': (4, 1),
+}
+
+
+def _limit_from_env(provider, default):
+    raw = os.environ.get(f"RATE_LIMIT_{provider.upper()}")
+    if not raw:
+        return default
+    try:
+        count, per = raw.split('/')
+        return int(count), float(per)
+    except ValueError:
+        print(f"DEBUG: Ignoring malformed RATE_LIMIT_{provider.upper()}={raw!r}")
+        return default
+
+
+class TokenBucket:
+    """Token bucket allowing `rate` requests per `per` seconds, with bursts up to `capacity`"""
+
+    def __init__(self, rate, per=1.0, capacity=None):
+        self.fill_rate = rate / per  # tokens per second
+        self.capacity = capacity if capacity is not None else rate
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.fill_rate)
+        self.updated = now
+
+    def acquire(self, tokens=1, timeout=None):
+        """Block until `tokens` are available. Returns False if timeout expires first."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                self._refill()
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return True
+                wait = (tokens - self.tokens) / self.fill_rate
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                wait = min(wait, remaining)
+            time.sleep(wait)
+
+    def drain(self):
+        """Empty the bucket after the provider reports throttling, so callers wait for a refill"""
+        with self._lock:
+            self._refill()
+            self.tokens = 0.0
+
+
+class FetchExecutor:
+    """Thread pool for data requests.
+
+    Each provider gets its own token bucket so concurrent requests run at the
+    provider's allowed rate, and each worker thread keeps one pooled
+    requests.Session per provider.
+    """
+
+    def __init__(self, max_workers=8, limits=None):
+        self.max_workers = max_workers
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='market-data')
+        self._buckets = {}
+        for provider, (rate, per) in (limits or DEFAULT_LIMITS).items():
+            rate, per = _limit_from_env(provider, (rate, per))
+            self._buckets[provider] = TokenBucket(rate, per)
+        self._buckets_lock = threading.Lock()
+        self._local = threading.local()
+
+    def bucket(self, provider):
+        with self._buckets_lock:
+            bucket = self._buckets.get(provider)
+            if bucket is None:
+                rate, per = _limit_from_env(provider, (4, 1))
+                bucket = self._buckets[provider] = TokenBucket(rate, per)
+            return bucket
+
+    def session(self, provider, headers=None):
+        """Return this thread's pooled session for a provider"""
+        sessions = getattr(self._local, 'sessions', None)
+        if sessions is None:
+            sessions = self._local.sessions = {}
+        sess = sessions.get(provider)
+        if sess is None:
+            sess = sessions[provider] = requests.Session()
+            if headers:
+                sess.headers.update(headers)
+        return sess
+
+    def submit(self, fn, *args, provider=None, **kwargs):
+        """Run fn on the pool, first taking a token from `provider`'s bucket if given.
+        Returns a concurrent.futures.Future."""
+        if provider is None:
+            return self._pool.submit(fn, *args, **kwargs)
+
+        def limited():
+            self.bucket(provider).acquire()
+            return fn(*args, **kwargs)
+        return self._pool.submit(limited)
+
+    def map(self, fn, items, *args, provider=None, **kwargs):
+        """Submit fn(item, *args, **kwargs) for every item; returns {item: Future}"""
+        return {item: self.submit(fn, item, *args, provider=provider, **kwargs) for item in items}
+
+
+# Shared instance used by StockData and the data providers
+fetch_executor = FetchExecutor(max_workers=int(os.environ.get('FETCH_WORKERS', 8)))
@@ -0,0 +1,325 @@
+from collections import deque
+import math
+
+import numpy as np
+import pandas as pd
+
+'''Technical indicators: vectorized over a whole backtest, or streaming one bar at a time'''
+
+
+def _window(window):
+    """Bar-count windows stay ints; anything else ('1h', '5D', Timedelta) becomes nanoseconds"""
+    if isinstance(window, (int, np.integer)):
+        return int(window), None
+    return None, pd.Timedelta(window).value
+
+
+def _rolling(times, values, window):
+    count, span_ns = _window(window)
+    series = pd.Series(values, index=pd.DatetimeIndex(times.view('datetime64[ns]')))
+    if count is not None:
+        return series.rolling(count)
+    # Time-based windows cover (t - window, t], same as DataFrame.rolling('1h')
+    return series.rolling(pd.Timedelta(span_ns), min_periods=1)
+
+
+# --- Vectorized: one pass over every bar of a backtest ---
+
+def sma(times, values, window):
+    return _rolling(times, values, window).mean().to_numpy()
+
+
+def ema(values, span):
+    return pd.Series(values).ewm(span=span, adjust=False).mean().to_numpy()
+
+
+def rsi(values, period=14):
+    """Wilder's RSI; NaN for the first bar"""
+    delta = np.diff(values, prepend=np.nan)
+    gains = pd.Series(np.where(delta > 0, delta, 0.0))
+    losses = pd.Series(np.where(delta < 0, -delta, 0.0))
+    avg_gain = gains.iloc[1:].ewm(alpha=1 / period, adjust=False).mean()
+    avg_loss = losses.iloc[1:].ewm(alpha=1 / period, adjust=False).mean()
+    with np.errstate(divide='ignore', invalid='ignore'):
+        out = 100 - 100 / (1 + avg_gain.to_numpy() / avg_loss.to_numpy())
+    out = np.where(avg_loss.to_numpy() == 0, 100.0, out)
+    return np.concatenate([[np.nan], out]) if len(values) else np.empty(0)
+
+
+def bollinger(times, values, window=20, num_std=2.0):
+    """(middle, upper, lower) bands around the rolling mean"""
+    rolling = _rolling(times, values, window)
+    mid = rolling.mean().to_numpy()
+    std = rolling.std().to_numpy()
+    return mid, mid + num_std * std, mid - num_std * std
+
+
+def rolling_high(times, values, window):
+    return _rolling(times, values, window).max().to_numpy()
+
+
+def rolling_low(times, values, window):
+    return _rolling(times, values, window).min().to_numpy()
+
+
+def change_from_start(values):
+    """Percent change of every bar versus the first bar"""
+    if not len(values) or values[0] == 0:
+        return np.full(len(values), np.nan)
+    return (values - values[0]) / values[0] * 100
+
+
+# --- Streaming: O(1) (amortized) work per new bar ---
+
+class _Window:
+    """Bars inside a count- or time-based window with running sum / sum of squares"""
+
+    def __init__(self, window):
+        self.count, self.span_ns = _window(window)
+        self.bars = deque()
+        self.total = 0.0
+        self.total_sq = 0.0
+
+    def push(self, time_ns, value):
+        self.bars.append((time_ns, value))
+        self.total += value
+        self.total_sq += value * value
+        while self.bars and (
+            (self.count is not None and len(self.bars) > self.count)
+            or (self.span_ns is not None and self.bars[0][0] <= time_ns - self.span_ns)
+        ):
+            _, old = self.bars.popleft()
+            self.total -= old
+            self.total_sq -= old * old
+
+    def full(self):
+        return self.count is None or len(self.bars) == self.count
+
+
+class StreamingSMA:
+    def __init__(self, window):
+        self._window = _Window(window)
+
+    def update(self, time_ns, value):
+        w = self._window
+        w.push(time_ns, value)
+        return w.total / len(w.bars) if w.full() else math.nan
+
+
+class StreamingEMA:
+    def __init__(self, span):
+        self.alpha = 2 / (span + 1)
+        self.value = None
+
+    def update(self, time_ns, value):
+        self.value = value if self.value is None else self.value + self.alpha * (value - self.value)
+        return self.value
+
+
+class StreamingRSI:
+    def __init__(self, period=14):
+        self.alpha = 1 / period
+        self.prev = None
+        self.avg_gain = None
+        self.avg_loss = None
+
+    def update(self, time_ns, value):
+        if self.prev is None:
+            self.prev = value
+            return math.nan
+        delta = value - self.prev
+        self.prev = value
+        gain, loss = max(delta, 0.0), max(-delta, 0.0)
+        if self.avg_gain is None:
+            self.avg_gain, self.avg_loss = gain, loss
+        else:
+            self.avg_gain += self.alpha * (gain - self.avg_gain)
+            self.avg_loss += self.alpha * (loss - self.avg_loss)
+        if self.avg_loss == 0:
+            return 100.0
+        return 100 - 100 / (1 + self.avg_gain / self.avg_loss)
+
+
+class StreamingBollinger:
+    def __init__(self, window=20, num_std=2.0):
+        self._window = _Window(window)
+        self.num_std = num_std
+
+    def update(self, time_ns, value):
+        w = self._window
+        w.push(time_ns, value)
+        n = len(w.bars)
+        if not w.full() or n < 2:
+            return (w.total / n if w.full() else math.nan, math.nan, math.nan)
+        mean = w.total / n
+        std = math.sqrt(max(w.total_sq - n * mean * mean, 0.0) / (n - 1))
+        return (mean, mean + self.num_std * std, mean - self.num_std * std)
+
+
+class StreamingExtreme:
+    """Rolling max (or min) with a monotonic deque"""
+
+    def __init__(self, window, highest=True):
+        self.count, self.span_ns = _window(window)
+        self.highest = highest
+        self.candidates = deque()  # (index, time_ns, value), values monotonic
+        self.seen = 0
+
+    def update(self, time_ns, value):
+        better = (lambda a, b: a >= b) if self.highest else (lambda a, b: a <= b)
+        while self.candidates and better(value, self.candidates[-1][2]):
+            self.candidates.pop()
+        self.candidates.append((self.seen, time_ns, value))
+        self.seen += 1
+        while (self.count is not None and self.candidates[0][0] <= self.seen - 1 - self.count) or (
+            self.span_ns is not None and self.candidates[0][1] <= time_ns - self.span_ns
+        ):
+            self.candidates.popleft()
+        if self.count is not None and self.seen < self.count:
+            return math.nan
+        return self.candidates[0][2]
+
+
+class StreamingChange:
+    def __init__(self):
+        self.start = None
+
+    def update(self, time_ns, value):
+        if self.start is None:
+            self.start = value
+        return (value - self.start) / self.start * 100 if self.start else math.nan
+
+
+class IndicatorEngine:
+    """Indicators over one price column of a bar frame.
+
+    compute() runs the vectorized version over every bar once and caches it;
+    at() looks a value up as of a time. For live use, track() an indicator
+    and feed new bars through update(): each tracked indicator then costs O(1)
+    per bar. The source frame is copied into arrays and never modified.
+    """
+
+    NAMES = ('sma', 'ema', 'rsi', 'bollinger', 'high', 'low', 'change')
+
+    def __init__(self, frame=None, column='Close'):
+        if frame is None or frame.empty:
+            self._times = np.empty(0, dtype=np.int64)
+            self._values = np.empty(0, dtype=np.float64)
+        else:
+            self._times = frame.index.as_unit('ns').asi8.copy()
+            self._values = frame[column].to_numpy(dtype=np.float64, copy=True)
+        self._computed = {}
+        self._tracked = {}
+        self._latest = {}
+
+    def __len__(self):
+        return len(self._values)
+
+    @staticmethod
+    def _key(name, params):
+        if name not in IndicatorEngine.NAMES:
+            raise ValueError(f"Unknown indicator '{name}' (expected one of {', '.join(IndicatorEngine.NAMES)})")
+        return (name, tuple(sorted(params.items())))
+
+    def compute(self, name, **params):
+        """Vectorized indicator over every bar (cached)"""
+        key = self._key(name, params)
+        result = self._computed.get(key)
+        if result is None:
+            t, v = self._times, self._values
+            if name == 'sma':
+                result = sma(t, v, params.get('window', 20))
+            elif name == 'ema':
+                result = ema(v, params.get('span', 20))
+            elif name == 'rsi':
+                result = rsi(v, params.get('period', 14))
+            elif name == 'bollinger':
+                result = bollinger(t, v, params.get('window', 20), params.get('num_std', 2.0))
+            elif name == 'high':
+                result = rolling_high(t, v, params.get('window', 20))
+            elif name == 'low':
+                result = rolling_low(t, v, params.get('window', 20))
+            else:
+                result = change_from_start(v)
+            self._computed[key] = result
+        return result
+
+    def index_at(self, time):
+        """Index of the last bar at or before `time`, or None"""
+        ts = pd.Timestamp(time)
+        if ts.tz is not None:
+            ts = ts.tz_localize(None)
+        i = int(np.searchsorted(self._times, ts.as_unit('ns').value, side='right')) - 1
+        return i if i >= 0 else None
+
+    def at(self, name, time, **params):
+        """Indicator value as of `time` (None before the first bar or while warming up)"""
+        i = self.index_at(time)
+        if i is None:
+            return None
+        result = self.compute(name, **params)
+        if isinstance(result, tuple):
+            values = tuple(float(r[i]) for r in result)
+            return None if any(math.isnan(x) for x in values) else values
+        value = float(result[i])
+        return None if math.isnan(value) else value
+
+    # --- Live mode ---
+
+    def track(self, name, **params):
+        """Start maintaining `name` incrementally, warmed up on the bars loaded so far"""
+        key = self._key(name, params)
+        if key in self._tracked:
+            return
+        if name == 'sma':
+            indicator = StreamingSMA(params.get('window', 20))
+        elif name == 'ema':
+            indicator = StreamingEMA(params.get('span', 20))
+        elif name == 'rsi':
+            indicator = StreamingRSI(params.get('period', 14))
+        elif name == 'bollinger':
+            indicator = StreamingBollinger(params.get('window', 20), params.get('num_std', 2.0))
+        elif name == 'high':
+            indicator = StreamingExtreme(params.get('window', 20), highest=True)
+        elif name == 'low':
+            indicator = StreamingExtreme(params.get('window', 20), highest=False)
+        else:
+            indicator = StreamingChange()
+        value = None
+        for time_ns, price in zip(self._times.tolist(), self._values.tolist()):
+            value = indicator.update(time_ns, price)
+        self._tracked[key] = indicator
+        self._latest[key] = value
+
+    def update(self, time, value):
+        """Append one bar and advance every tracked indicator"""
+        ts = pd.Timestamp(time)
+        if ts.tz is not None:
+            ts = ts.tz_localize(None)
+        time_ns = ts.as_unit('ns').value
+        value = float(value)
+        n = len(self._values)
+        buffers = getattr(self, '_buffers', None)
+        if buffers is None or len(buffers[0]) <= n:
+            # Grow geometrically so appending stays O(1) amortized
+            capacity = max(64, 2 * (n + 1))
+            buffers = (np.empty(capacity, dtype=np.int64), np.empty(capacity, dtype=np.float64))
+            buffers[0][:n] = self._times
+            buffers[1][:n] = self._values
+            self._buffers = buffers
+        buffers[0][n] = time_ns
+        buffers[1][n] = value
+        self._times = buffers[0][:n + 1]
+        self._values = buffers[1][:n + 1]
+        self._computed.clear()
+        for key, indicator in self._tracked.items():
+            self._latest[key] = indicator.update(time_ns, value)
+
+    def latest(self, name, **params):
+        """Most recent value of a tracked indicator"""
+        value = self._latest.get(self._key(name, params))
+        if value is None:
+            return None
+        if isinstance(value, tuple):
+            return None if any(math.isnan(x) for x in value) else value
+        return None if math.isnan(value) else value
@@ -1,6 +1,7 @@
 from Portfolio import Portfolio
 from StockData import StockData
-from datetime import datetime, timedelta
+from trading_calendar import trading_calendar
+from datetime import datetime
 from dateutil.relativedelta import relativedelta
 import matplotlib.pyplot as plt
 import matplotlib.dates as mdates
@@ -34,11 +35,8 @@ print(f"Initial positions: {port.positions}")
 # Track daily results
 daily_results = []
 
-# Loop through 60 days of Yahoo data
-for i in range(60):
-    # Move to next day
-    currtime = currtime + timedelta(days=1)
-    
+# Loop through the trading sessions in the next 60 days of Yahoo data
+for i, currtime in enumerate(trading_calendar.daily_schedule(currtime, 60).to_pydatetime()):
     # Update current time for all stock data objects
     for ticker in tickers:
         data[ticker].curtime = currtime
@@ -105,7 +103,7 @@ if len(daily_results) > 1:
     
     print(f"\nPerformance Metrics:")
     print(f"Total Return: {total_return:.2f}%")
-    print(f"Days Simulated: {len(daily_results)}")
+    print(f"Trading Days Simulated: {len(daily_results)}")
     
     # Calculate Sharpe ratio
     sharpe_ratio = port.calculate_sharpe_ratio()
@@ -0,0 +1,171 @@
+from collections.abc import MutableMapping
+
+import numpy as np
+
+'''Array-backed position book: signed share quantities indexed by ticker'''
+
+
+def _shares(value):
+    """Share counts come back as ints when they are whole, like the dicts they replace"""
+    value = float(value)
+    return int(value) if value.is_integer() else value
+
+
+class PositionLedger:
+    """Shares per ticker in ticker-indexed float64 arrays.
+
+    `net` (longs minus shorts) is the one signed vector valuation and the
+    simulator's vectorized steps work on. Hedge shorts are also kept on
+    their own so `positions` / `short_positions` can still be read and written
+    like the {ticker: shares} dicts they used to be (see PositionView); a
+    write adjusts one slot. Tickers keep their slot for the life of the book.
+    """
+
+    def __init__(self, capacity=16):
+        self.tickers = []
+        self._slots = {}
+        self._net = np.zeros(capacity, dtype=np.float64)
+        self._short = np.zeros(capacity, dtype=np.float64)
+        # Whether the ticker is a key of the long / short view (a sold-out
+        # long stays listed with 0 shares, as it did in the dict)
+        self._listed = np.zeros((2, capacity), dtype=bool)
+        self._matrix_columns = None  # (matrix, n_tickers, column index per slot)
+
+    def __len__(self):
+        return len(self.tickers)
+
+    @property
+    def net(self):
+        return self._net[:len(self.tickers)]
+
+    def slot(self, ticker):
+        """Slot index for ticker, adding it to the book if needed"""
+        i = self._slots.get(ticker)
+        if i is None:
+            i = len(self.tickers)
+            if i == len(self._net):
+                self._net = np.concatenate([self._net, np.zeros(i)])
+                self._short = np.concatenate([self._short, np.zeros(i)])
+                self._listed = np.concatenate([self._listed, np.zeros((2, i), dtype=bool)], axis=1)
+            self.tickers.append(ticker)
+            self._slots[ticker] = i
+        return i
+
+    def slots(self, tickers):
+        return np.array([self.slot(ticker) for ticker in tickers], dtype=np.intp)
+
+    # --- Per-side access backing the dict views ---
+
+    def long(self, i):
+        return self._net[i] + self._short[i]
+
+    def set_long(self, ticker, shares):
+        i = self.slot(ticker)
+        self._net[i] = shares - self._short[i]
+        self._listed[0, i] = True
+
+    def set_short(self, ticker, shares):
+        i = self.slot(ticker)
+        self._net[i] -= shares - self._short[i]
+        self._short[i] = shares
+        self._listed[1, i] = True
+
+    def unlist(self, side, ticker):
+        """Drop ticker from a view, flattening that side"""
+        i = self._slots.get(ticker)
+        if i is None or not self._listed[side, i]:
+            raise KeyError(ticker)
+        (self.set_long if side == 0 else self.set_short)(ticker, 0)
+        self._listed[side, i] = False
+
+    def load(self, side, positions):
+        """Replace one side wholesale from a {ticker: shares} dict"""
+        set_side = self.set_long if side == 0 else self.set_short
+        n = len(self.tickers)
+        for i in np.flatnonzero(self._listed[side, :n]):
+            set_side(self.tickers[i], 0)
+        self._listed[side, :n] = False
+        for ticker, shares in positions.items():
+            set_side(ticker, shares)
+
+    # --- Valuation ---
+
+    def _columns(self, matrix):
+        """Matrix column of every slot (-1 where the matrix doesn't have the ticker)"""
+        cached = self._matrix_columns
+        if cached is None or cached[0] is not matrix or cached[1] != len(self.tickers):
+            columns = matrix.columns_of(self.tickers)
+            self._matrix_columns = cached = (matrix, len(self.tickers), columns)
+        return cached[2]
+
+    def value(self, cash, price_of, matrix=None, row=None):
+        """cash + net . prices, or None when a held ticker has no price.
+        Prices come from `row` of a PriceMatrix where it has the ticker, and from
+        price_of(ticker) otherwise."""
+        net = self.net
+        held = np.flatnonzero(net)
+        if not len(held):
+            return cash
+        if matrix is not None and row is not None:
+            columns = self._columns(matrix)[held]
+            missing = columns < 0
+            marks = np.where(missing, np.nan, matrix.values[row, np.maximum(columns, 0)])
+        else:
+            missing = np.ones(len(held), dtype=bool)
+            marks = np.full(len(held), np.nan)
+        for k in np.flatnonzero(missing):
+            price = price_of(self.tickers[held[k]])
+            if price is None:
+                return None
+            marks[k] = price
+        if np.isnan(marks).any():
+            return None
+        return cash + float(net[held] @ marks)
+
+
+class PositionView(MutableMapping):
+    """{ticker: shares} view of one side (long or short) of a PositionLedger"""
+
+    def __init__(self, ledger, side):
+        self._ledger = ledger
+        self._side = side
+
+    def _slot(self, ticker):
+        i = self._ledger._slots.get(ticker)
+        if i is None or not self._ledger._listed[self._side, i]:
+            raise KeyError(ticker)
+        return i
+
+    def __getitem__(self, ticker):
+        i = self._slot(ticker)
+        return _shares(self._ledger.long(i) if self._side == 0 else self._ledger._short[i])
+
+    def __setitem__(self, ticker, shares):
+        if self._side == 0:
+            self._ledger.set_long(ticker, shares)
+        else:
+            self._ledger.set_short(ticker, shares)
+
+    def __delitem__(self, ticker):
+        self._ledger.unlist(self._side, ticker)
+
+    def __iter__(self):
+        ledger = self._ledger
+        for i in np.flatnonzero(ledger._listed[self._side, :len(ledger.tickers)]):
+            yield ledger.tickers[i]
+
+    def __len__(self):
+        return int(self._ledger._listed[self._side, :len(self._ledger.tickers)].sum())
+
+    def copy(self):
+        """Plain dict snapshot"""
+        ledger = self._ledger
+        n = len(ledger.tickers)
+        listed = np.flatnonzero(ledger._listed[self._side, :n])
+        values = ((ledger._net[:n] + ledger._short[:n]) if self._side == 0 else ledger._short[:n])[listed]
+        if np.array_equal(values, np.trunc(values)):
+            values = values.astype(np.int64)
+        return dict(zip([ledger.tickers[i] for i in listed], values.tolist()))
+
+    def __repr__(self):
+        return repr(self.copy())
@@ -0,0 +1,114 @@
+from itertools import compress
+
+import numpy as np
+import pandas as pd
+
+'''Aligned timestamps x tickers price grid shared by a simulation's rules, hedging and valuation'''
+
+
+def _to_ns(value):
+    ts = pd.Timestamp(value)
+    if ts.tz is not None:
+        ts = ts.tz_localize(None)
+    return ts.as_unit('ns').value
+
+
+class PriceMatrix:
+    """Mid prices for every simulation step (rows) and ticker (columns).
+
+    Built once per simulation with an as-of join of each ticker's bars onto
+    the step times: a step gets the last bar at or before it, as long as that
+    bar is within the ticker's lookup tolerance, otherwise NaN.
+    """
+
+    def __init__(self, times, tickers, values):
+        self.times = pd.DatetimeIndex(times)
+        self.tickers = list(tickers)
+        self.values = np.ascontiguousarray(values, dtype=np.float64)
+        self._columns = {ticker: j for j, ticker in enumerate(self.tickers)}
+        self._rows = {int(t): i for i, t in enumerate(self.times.as_unit('ns').asi8)}
+
+    @classmethod
+    def build(cls, times, stocks):
+        """Align {ticker: StockData} onto `times` (one row per simulation step)"""
+        times = pd.DatetimeIndex(times)
+        values = np.full((len(times), len(stocks)), np.nan)
+        for j, stock in enumerate(stocks.values()):
+            values[:, j] = stock.get_prices_asof(times)
+        return cls(times, stocks.keys(), values)
+
+    def __len__(self):
+        return len(self.times)
+
+    def row_of(self, timestamp):
+        """Row index for an exact step time, or None if it isn't a step"""
+        return self._rows.get(_to_ns(timestamp))
+
+    def covers(self, timestamp, ticker):
+        return ticker in self._columns and self.row_of(timestamp) is not None
+
+    def price_at(self, timestamp, ticker):
+        """Price of ticker at a step time; None when there's no bar within tolerance"""
+        price = self.values[self._rows[_to_ns(timestamp)], self._columns[ticker]]
+        return None if np.isnan(price) else float(price)
+
+    def column(self, ticker):
+        return self.values[:, self._columns[ticker]]
+
+    def columns_of(self, tickers):
+        """Column index of each ticker, -1 for tickers the matrix doesn't have"""
+        return np.array([self._columns.get(ticker, -1) for ticker in tickers], dtype=np.intp)
+
+    def gather(self, row, columns):
+        """Prices at `row` for a columns_of() array, NaN where the column is -1"""
+        return np.where(columns >= 0, self.values[row, np.maximum(columns, 0)], np.nan)
+
+    def cursor(self):
+        return BarCursor(self)
+
+
+class BarCursor:
+    """Walks a PriceMatrix one step (row) at a time, starting on row 0"""
+
+    def __init__(self, matrix):
+        self.matrix = matrix
+        self.position = 0
+        self._columns_cache = {}
+
+    def advance(self):
+        """Move to the next step; returns False past the last row"""
+        self.position += 1
+        return self.position < len(self.matrix)
+
+    @property
+    def time(self):
+        return self.matrix.times[self.position]
+
+    @property
+    def row(self):
+        """This step's prices as a float64 array in matrix.tickers order"""
+        return self.matrix.values[self.position]
+
+    def price(self, ticker):
+        if ticker not in self.matrix._columns:
+            return None
+        price = self.row[self.matrix._columns[ticker]]
+        return None if np.isnan(price) else float(price)
+
+    def _columns_for(self, tickers):
+        key = tuple(tickers)
+        columns = self._columns_cache.get(key)
+        if columns is None:
+            columns = self._columns_cache[key] = self.matrix.columns_of(tickers)
+        return columns
+
+    def price_array(self, tickers):
+        """This step's prices for tickers as a float64 array (NaN where missing)"""
+        return self.matrix.gather(self.position, self._columns_for(tickers))
+
+    def prices(self, tickers=None):
+        """{ticker: price} for this step, skipping tickers with no price"""
+        tickers = self.matrix.tickers if tickers is None else list(tickers)
+        values = self.price_array(tickers)
+        have = ~np.isnan(values)
+        return dict(zip(compress(tickers, have), values[have].tolist()))
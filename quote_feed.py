@@ -0,0 +1,321 @@
+import argparse
+import asyncio
+import json
+import os
+import time as _time
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from StockData import data_source, get_stock_data_with_retry, load_many
+from data_provider import get_provider
+
+'''Async quote feeds for streaming (paper-trading / replay) simulations'''
+
+
+class Bar(namedtuple('Bar', 'ticker time open high low close volume')):
+    __slots__ = ()
+
+    @property
+    def mid(self):
+        return (self.high + self.low) / 2
+
+
+def _bars_from_frame(ticker, frame):
+    """[Bar] for every row of a bar frame (timezone-naive index)"""
+    if frame.empty:
+        return []
+    index = frame.index.tz_localize(None) if frame.index.tz is not None else frame.index
+    volume = frame['Volume'] if 'Volume' in frame.columns else pd.Series(0.0, index=frame.index)
+    return [
+        Bar(ticker, t, float(o), float(h), float(l), float(c), float(v))
+        for t, o, h, l, c, v in zip(index, frame['Open'], frame['High'], frame['Low'], frame['Close'], volume)
+    ]
+
+
+def merge_steps(frames):
+    """Combine {ticker: frame} into time-ordered steps [(time, {ticker: Bar})]"""
+    steps = {}
+    for ticker, frame in frames.items():
+        for bar in _bars_from_frame(ticker, frame):
+            steps.setdefault(bar.time, {})[ticker] = bar
+    return sorted(steps.items())
+
+
+class QuoteFeed:
+    """Async source of bars. Iterate with `async for time, bars in feed`,
+    where bars is {ticker: Bar} for every ticker that printed at `time`."""
+
+    total_steps = None  # Known up front for replays, None for live feeds
+
+    def __aiter__(self):
+        return self.steps()
+
+    async def steps(self):
+        raise NotImplementedError
+        yield
+
+    async def close(self):
+        pass
+
+
+class ReplayQuoteFeed(QuoteFeed):
+    """Replays recorded bars in-process.
+
+    speed is market time per wall-clock time: 1 replays in real time, 390
+    plays a 60m session in a minute, 0 pushes bars as fast as they are consumed.
+    """
+
+    def __init__(self, frames, speed=0.0):
+        self._steps = merge_steps(frames)
+        self.speed = float(speed)
+        self.total_steps = len(self._steps)
+
+    @classmethod
+    def from_history(cls, tickers, start_date, end_date, interval='1d', speed=0.0):
+        """Replay the bars the data layer has for a window (bar store, cache or provider)"""
+        data, failures = load_many(tickers, start_date, end_date, interval)
+        for ticker, reason in failures.items():
+            print(f"Warning: No replay data for {ticker}: {reason}")
+        return cls({ticker: stock.stock_data for ticker, stock in data.items()}, speed)
+
+    async def steps(self):
+        previous = None
+        for time, bars in self._steps:
+            if self.speed and previous is not None:
+                await asyncio.sleep((time - previous).total_seconds() / self.speed)
+            previous = time
+            yield time, bars
+
+
+class ReplayServer:
+    """Local TCP server pushing recorded bars as JSON lines.
+
+    A client sends one line, {"tickers": [...]} (empty for all), and then
+    receives {"time": ..., "bars": {ticker: [open, high, low, close, volume]}}
+    per step and finally {"end": true}. Every connection gets its own replay
+    from the first bar, so many simulations can soak-test against one server.
+    """
+
+    def __init__(self, frames, speed=0.0, host='127.0.0.1', port=0):
+        self.feed = ReplayQuoteFeed(frames, speed)
+        self.host = host
+        self.port = port
+        self._server = None
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._serve, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        print(f"DEBUG: Replay server on {self.host}:{self.port} ({self.feed.total_steps} steps, speed {self.feed.speed})")
+        return self.port
+
+    async def serve_forever(self):
+        if self._server is None:
+            await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def _serve(self, reader, writer):
+        try:
+            request = json.loads(await reader.readline() or b'{}')
+            wanted = set(t.upper() for t in request.get('tickers') or [])
+            writer.write(json.dumps({'total_steps': self.feed.total_steps}).encode() + b'\n')
+            async for time, bars in self.feed:
+                payload = {
+                    ticker: [bar.open, bar.high, bar.low, bar.close, bar.volume]
+                    for ticker, bar in bars.items() if not wanted or ticker in wanted
+                }
+                if payload:
+                    writer.write(json.dumps({'time': time.isoformat(), 'bars': payload}).encode() + b'\n')
+                    await writer.drain()
+            writer.write(b'{"end": true}\n')
+            await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+
+class SocketQuoteFeed(QuoteFeed):
+    """Client side of ReplayServer (or anything speaking the same JSON-lines protocol)"""
+
+    def __init__(self, host, port, tickers=()):
+        self.host = host
+        self.port = port
+        self.tickers = list(tickers)
+        self._writer = None
+
+    async def steps(self):
+        reader, self._writer = await asyncio.open_connection(self.host, self.port, limit=2 ** 24)
+        self._writer.write(json.dumps({'tickers': self.tickers}).encode() + b'\n')
+        await self._writer.drain()
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            message = json.loads(line)
+            if message.get('end'):
+                break
+            if 'total_steps' in message:
+                self.total_steps = message['total_steps']
+                continue
+            time = pd.Timestamp(message['time'])
+            yield time, {
+                ticker: Bar(ticker, time, *values)
+                for ticker, values in message['bars'].items()
+            }
+
+    async def close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+
+class PollingQuoteFeed(QuoteFeed):
+    """Live feed that polls the configured data provider for the current
+    session's bars and yields the ones it hasn't seen yet."""
+
+    def __init__(self, tickers, interval='1m', poll_seconds=60, max_seconds=None):
+        self.tickers = list(tickers)
+        self.interval = interval
+        self.poll_seconds = poll_seconds
+        self.max_seconds = max_seconds  # Wall-clock run time; None polls until closed
+        self._last_seen = {}
+
+    def _latest(self, ticker):
+        source = data_source()
+        if source == 'yahoo':
+            frame = get_stock_data_with_retry(ticker, interval=self.interval, period='1d')
+        else:
+            frame = get_provider(source).get_history(ticker, period='1d', interval=self.interval)
+        return _bars_from_frame(ticker, frame)
+
+    async def steps(self):
+        loop = asyncio.get_running_loop()
+        deadline = _time.monotonic() + self.max_seconds if self.max_seconds is not None else None
+        while deadline is None or _time.monotonic() < deadline:
+            results = await asyncio.gather(
+                *(loop.run_in_executor(None, self._latest, ticker) for ticker in self.tickers),
+                return_exceptions=True
+            )
+            fresh = {}
+            for ticker, bars in zip(self.tickers, results):
+                if isinstance(bars, Exception):
+                    print(f"DEBUG: Quote poll failed for {ticker}: {bars}")
+                    continue
+                last = self._last_seen.get(ticker)
+                # The newest bar is still forming, so only completed bars are emitted
+                for bar in bars[:-1]:
+                    if last is None or bar.time > last:
+                        fresh.setdefault(bar.time, {})[ticker] = bar
+                        self._last_seen[ticker] = bar.time
+            for time in sorted(fresh):
+                yield time, fresh[time]
+            await asyncio.sleep(self.poll_seconds)
+
+
+class QuoteBook:
+    """Latest quote per ticker. Stands in for a PriceMatrix (covers / price_at)
+    when prices arrive one bar at a time instead of being aligned up front."""
+
+    def __init__(self):
+        self._last = {}
+
+    def update(self, bar):
+        self._last[bar.ticker] = bar
+
+    def covers(self, timestamp, ticker):
+        return ticker in self._last
+
+    def price_at(self, timestamp, ticker):
+        return self._last[ticker].mid
+
+    def price(self, ticker):
+        bar = self._last.get(ticker)
+        return None if bar is None else bar.mid
+
+    def prices(self, tickers):
+        return {ticker: self._last[ticker].mid for ticker in tickers if ticker in self._last}
+
+    def price_array(self, tickers):
+        return np.array([self._last[t].mid if t in self._last else np.nan for t in tickers], dtype=np.float64)
+
+
+# Hosts a "socket" stream may connect to; anything else is refused so API callers
+# can't point the server at arbitrary addresses
+STREAM_SOCKET_HOSTS = {
+    host.strip().lower()
+    for host in os.environ.get('STREAM_SOCKET_HOSTS', '127.0.0.1,localhost,::1').split(',')
+    if host.strip()
+}
+# Upper bound on how long a "live" stream polls, whatever duration_days asks for
+LIVE_STREAM_MAX_DAYS = float(os.environ.get('LIVE_STREAM_MAX_DAYS', 5))
+
+
+def check_stream_config(config):
+    """Validate a /start_simulation "stream" block and return it with defaults
+    filled in. Raises ValueError for an unknown source, a socket host that isn't
+    in STREAM_SOCKET_HOSTS or a bad port / speed / poll interval."""
+    if not isinstance(config, dict):
+        raise ValueError('stream must be an object like {"source": "replay"}')
+    source = config.get('source', 'replay')
+    if source == 'replay':
+        speed = float(config.get('speed', 0))
+        if not 0 <= speed < float('inf'):
+            raise ValueError("stream speed must be a finite number >= 0")
+        return {'source': source, 'speed': speed}
+    if source == 'socket':
+        host = str(config.get('host', '127.0.0.1'))
+        if host.lower() not in STREAM_SOCKET_HOSTS:
+            raise ValueError(f"stream host '{host}' is not allowed (allowed: {', '.join(sorted(STREAM_SOCKET_HOSTS))})")
+        port = config.get('port')
+        if isinstance(port, bool) or not isinstance(port, int) or not 0 < port < 65536:
+            raise ValueError("stream port must be an integer between 1 and 65535")
+        return {'source': source, 'host': host, 'port': port}
+    if source == 'live':
+        poll_seconds = float(config.get('poll_seconds', 60))
+        if not 1 <= poll_seconds < float('inf'):
+            raise ValueError("stream poll_seconds must be at least 1")
+        return {'source': source, 'poll_seconds': poll_seconds}
+    raise ValueError(f"Unknown stream source '{source}' (expected replay, socket or live)")
+
+
+def create_feed(config, tickers, start_date, duration_days, interval='1d'):
+    """Build a feed from a /start_simulation "stream" block:
+    {"source": "replay" | "socket" | "live", "speed": 0, "host": ..., "port": ..., "poll_seconds": 60}.
+    Live feeds stop after duration_days, at most LIVE_STREAM_MAX_DAYS."""
+    config = check_stream_config(config)
+    source = config['source']
+    if source == 'replay':
+        start = datetime.strptime(start_date, '%Y-%m-%d')
+        end = (start + timedelta(days=duration_days)).strftime('%Y-%m-%d')
+        return ReplayQuoteFeed.from_history(tickers, start_date, end, interval, config['speed'])
+    if source == 'socket':
+        return SocketQuoteFeed(config['host'], config['port'], tickers)
+    max_days = min(duration_days, LIVE_STREAM_MAX_DAYS)
+    return PollingQuoteFeed(tickers, interval, config['poll_seconds'], max_seconds=max_days * 24 * 3600)
+
+
+if __name__ == '__main__':
+    # python quote_feed.py AAPL,MSFT,VOO 2025-07-21 30 --interval 60m --speed 390 --port 8765
+    parser = argparse.ArgumentParser(description='Serve recorded bars to streaming simulations')
+    parser.add_argument('tickers')
+    parser.add_argument('start_date')
+    parser.add_argument('duration_days', type=int)
+    parser.add_argument('--interval', default='1d')
+    parser.add_argument('--speed', type=float, default=0.0)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    args = parser.parse_args()
+
+    start = datetime.strptime(args.start_date, '%Y-%m-%d')
+    end = (start + timedelta(days=args.duration_days)).strftime('%Y-%m-%d')
+    data, _ = load_many(args.tickers.upper().split(','), args.start_date, end, args.interval)
+    server = ReplayServer({t: s.stock_data for t, s in data.items()}, args.speed, args.host, args.port)
+    asyncio.run(server.serve_forever())
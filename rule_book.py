@@ -0,0 +1,47 @@
+import numpy as np
+
+'''Trading rules compiled into arrays so each step's triggers are found in one vectorized pass'''
+
+CONDITIONS = {'greater_than': 1, 'less_than': -1}
+
+
+class RuleBook:
+    """The simulation's {ticker: [rule, ...]} rules as parallel arrays.
+
+    Rules keep their original order (tickers in dict order, then each
+    ticker's rules), so executing triggered() in order matches evaluating
+    the rules one by one. Thresholds are fixed, so whether a rule fires
+    depends only on its ticker's price; position and cash checks stay with
+    the caller.
+    """
+
+    def __init__(self, trading_rules):
+        self.tickers = list(trading_rules)
+        self.rules = []
+        slots, conditions, thresholds = [], [], []
+        for slot, (ticker, rules) in enumerate(trading_rules.items()):
+            for rule in rules:
+                self.rules.append((ticker, rule))
+                slots.append(slot)
+                known = rule.get('action') in ('buy', 'sell')
+                conditions.append(CONDITIONS.get(rule.get('condition'), 0) if known else 0)
+                thresholds.append(float(rule.get('threshold', np.nan)))
+        self.slot = np.array(slots, dtype=np.intp)
+        self.condition = np.array(conditions, dtype=np.int8)
+        self.threshold = np.array(thresholds, dtype=np.float64)
+        self.active = self.condition != 0
+
+    def __len__(self):
+        return int(self.active.sum())
+
+    def triggered(self, prices):
+        """Indices of active rules whose condition holds, given prices aligned to self.tickers"""
+        if not len(self.rules):
+            return np.empty(0, dtype=np.intp)
+        p = prices[self.slot]
+        hit = np.where(self.condition > 0, p > self.threshold, p < self.threshold)
+        return np.flatnonzero(hit & self.active)
+
+    def retire(self, k):
+        """Stop evaluating rule k (a one-time rule that has executed)"""
+        self.active[k] = False
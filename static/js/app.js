@@ -170,7 +170,8 @@ function updateProgress(data) {
     if (data.is_complete) {
         progressText.textContent = 'Simulation Complete!';
     } else {
-        progressText.textContent = `Day ${data.results.length} of ${data.results.length / data.progress} - Running...`;
+        const completed = Math.max(data.results.length - 1, 0);
+        progressText.textContent = `Interval ${completed} of ${data.total_intervals || '?'} trading intervals - Running...`;
     }
 }
 
@@ -801,7 +802,7 @@ function addTicker() {
     tickerInput.className = 'ticker-input mb-2';
     tickerInput.innerHTML = `
         <div class="input-group">
-            <input type="text" class="form-control" placeholder="Ticker (e.g., AAPL)" maxlength="10" style="text-transform: uppercase;" oninput="validateTicker(this)">
+            <input type="text" class="form-control" placeholder="Ticker (e.g., AAPL)" list="tickerSuggestions" autocomplete="off" maxlength="10" style="text-transform: uppercase;" oninput="validateTicker(this)">
             <input type="number" class="form-control" placeholder="Shares" value="100" min="1">
             <button type="button" class="btn btn-outline-danger" onclick="removeTicker(this)">
                 <i class="fas fa-trash"></i>
@@ -870,14 +871,39 @@ function validateTicker(input) {
         return;
     }
     
+    // Suggest matching symbols from the local symbol universe
+    updateTickerSuggestions(ticker);
+    
     // Show loading state
     input.classList.add('is-warning');
     input.title = 'Checking ticker validity...';
     
-    // Validate ticker against Yahoo Finance
+    // Validate ticker (answered locally for known symbols)
     validateTickerWithAPI(ticker, input);
 }
 
+function updateTickerSuggestions(query) {
+    clearTimeout(window.tickerSuggestionTimeout);
+    window.tickerSuggestionTimeout = setTimeout(() => {
+        fetch(`/autocomplete?q=${encodeURIComponent(query)}&limit=10`)
+            .then(response => response.json())
+            .then(data => {
+                const datalist = document.getElementById('tickerSuggestions');
+                if (!datalist) {
+                    return;
+                }
+                datalist.innerHTML = '';
+                (data.results || []).forEach(item => {
+                    const option = document.createElement('option');
+                    option.value = item.symbol;
+                    option.label = `${item.name} (${item.exchange})`;
+                    datalist.appendChild(option);
+                });
+            })
+            .catch(error => console.error('Ticker autocomplete error:', error));
+    }, 100);
+}
+
 function validateTickerWithAPI(ticker, inputElement) {
     // Debounce API calls to avoid too many requests
     clearTimeout(window.tickerValidationTimeout);
@@ -908,7 +934,7 @@ function validateTickerWithAPI(ticker, inputElement) {
                 inputElement.classList.add('is-invalid');
                 inputElement.title = 'Error validating ticker. Please try again.';
             });
-    }, 1000); // 1 second delay to avoid too many API calls
+    }, 300); // Known symbols validate locally, so only a short debounce is needed
 }
 
 async function validateAllTickers() {
@@ -916,16 +942,45 @@ async function validateAllTickers() {
     const tradingRuleTickerInputs = document.querySelectorAll('#tradingRulesContainer .ticker-select');
     
     const allInputs = [...tickerInputs, ...tradingRuleTickerInputs];
-    const validationPromises = [];
+    const pendingInputs = allInputs.filter(input =>
+        input.value.trim() && !input.classList.contains('is-valid') && !input.classList.contains('is-invalid')
+    );
     
-    allInputs.forEach(input => {
-        if (input.value.trim() && !input.classList.contains('is-valid') && !input.classList.contains('is-invalid')) {
-            validationPromises.push(validateTickerWithAPIImmediate(input.value.trim(), input));
-        }
-    });
+    if (pendingInputs.length === 0) {
+        return;
+    }
     
-    if (validationPromises.length > 0) {
-        await Promise.all(validationPromises);
+    // Validate every pending ticker in one round trip
+    try {
+        const response = await fetch('/validate_tickers', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ tickers: pendingInputs.map(input => input.value.trim()) })
+        });
+        const data = await response.json();
+        if (!response.ok || !data.results) {
+            throw new Error(data.error || 'Batch validation failed');
+        }
+        pendingInputs.forEach(input => {
+            const result = data.results[input.value.trim().toUpperCase()];
+            applyTickerValidationResult(input, result || { valid: false });
+        });
+    } catch (error) {
+        console.error('Batch ticker validation error, validating one at a time:', error);
+        await Promise.all(pendingInputs.map(input => validateTickerWithAPIImmediate(input.value.trim(), input)));
+    }
+}
+
+function applyTickerValidationResult(inputElement, data) {
+    if (data.valid) {
+        inputElement.classList.remove('is-warning', 'is-invalid');
+        inputElement.classList.add('is-valid');
+        inputElement.title = `Valid ticker: ${data.name} (${data.exchange})`;
+        inputElement.value = data.ticker;
+    } else {
+        inputElement.classList.remove('is-warning', 'is-valid');
+        inputElement.classList.add('is-invalid');
+        inputElement.title = data.error || 'Ticker not found in Yahoo Finance database';
     }
 }
 
@@ -934,16 +989,7 @@ function validateTickerWithAPIImmediate(ticker, inputElement) {
         fetch(`/validate_ticker/${ticker}`)
             .then(response => response.json())
             .then(data => {
-                if (data.valid) {
-                    inputElement.classList.remove('is-warning', 'is-invalid');
-                    inputElement.classList.add('is-valid');
-                    inputElement.title = `Valid ticker: ${data.name} (${data.exchange})`;
-                    inputElement.value = data.ticker;
-                } else {
-                    inputElement.classList.remove('is-warning', 'is-valid');
-                    inputElement.classList.add('is-invalid');
-                    inputElement.title = data.error || 'Ticker not found in Yahoo Finance database';
-                }
+                applyTickerValidationResult(inputElement, data);
                 resolve();
             })
             .catch(error => {
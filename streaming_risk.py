@@ -0,0 +1,227 @@
+import math
+import os
+
+'''Online risk estimators updated once per simulation bar'''
+
+
+class StreamingRisk:
+    """Risk metrics of a value series, maintained in O(1) per bar.
+
+    Returns use Welford's mean/variance, drawdown a running peak, and beta
+    / correlation an online co-moment with the benchmark's return over the
+    same bar (bars where either side has no return are skipped for the
+    pair). Annualization follows the end-of-run metrics: population
+    standard deviation and `periods` bars per year.
+    """
+
+    def __init__(self, risk_free_rate=0.02, periods=252):
+        self.risk_free_rate = risk_free_rate
+        self.periods = periods
+        self.last_value = None
+        self.last_benchmark = None
+        self.last_return = None  # (portfolio return, benchmark return) of the latest bar
+        # Portfolio returns
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        # Drawdown
+        self.peak = None
+        self.drawdown = 0.0
+        self.max_drawdown = 0.0
+        # Paired portfolio / benchmark returns
+        self.pairs = 0
+        self.pair_mean = 0.0
+        self.bench_mean = 0.0
+        self.pair_m2 = 0.0
+        self.bench_m2 = 0.0
+        self.co_moment = 0.0
+
+    def update(self, value, benchmark_price=None):
+        """Add one bar's portfolio value and benchmark price (None / NaN if unknown)"""
+        r = None
+        if self.last_value:
+            r = value / self.last_value - 1
+            self.n += 1
+            delta = r - self.mean
+            self.mean += delta / self.n
+            self.m2 += delta * (r - self.mean)
+
+        if self.peak is None or value > self.peak:
+            self.peak = value
+        self.drawdown = (self.peak - value) / self.peak if self.peak else 0.0
+        self.max_drawdown = max(self.max_drawdown, self.drawdown)
+
+        if benchmark_price is not None and math.isnan(benchmark_price):
+            benchmark_price = None
+        b = None
+        if benchmark_price and self.last_benchmark:
+            b = benchmark_price / self.last_benchmark - 1
+        if r is not None and b is not None:
+            self.pairs += 1
+            dr = r - self.pair_mean
+            db = b - self.bench_mean
+            self.pair_mean += dr / self.pairs
+            self.bench_mean += db / self.pairs
+            self.pair_m2 += dr * (r - self.pair_mean)
+            self.bench_m2 += db * (b - self.bench_mean)
+            self.co_moment += dr * (b - self.bench_mean)
+
+        self.last_value = value
+        self.last_benchmark = benchmark_price
+        self.last_return = (r, b)
+        return self
+
+    @property
+    def volatility(self):
+        if self.n < 2:
+            return None
+        return math.sqrt(self.m2 / self.n * self.periods)
+
+    @property
+    def sharpe_ratio(self):
+        if self.n < 2 or self.m2 <= 0:
+            return None
+        std = math.sqrt(self.m2 / self.n)
+        return (self.mean - self.risk_free_rate / self.periods) * self.periods / (std * math.sqrt(self.periods))
+
+    @property
+    def beta(self):
+        if self.pairs < 3 or self.bench_m2 <= 0:
+            return None
+        return self.co_moment / self.bench_m2
+
+    @property
+    def correlation(self):
+        if self.pairs < 3 or self.bench_m2 <= 0 or self.pair_m2 <= 0:
+            return None
+        return self.co_moment / math.sqrt(self.pair_m2 * self.bench_m2)
+
+    def snapshot(self):
+        """Current metrics, rounded like final_metrics, for an interval result"""
+        def rounded(value, digits):
+            return round(value, digits) if value is not None else None
+
+        volatility = self.volatility
+        return {
+            'returns': self.n,
+            'volatility_pct': rounded(volatility * 100 if volatility is not None else None, 2),
+            'sharpe_ratio': rounded(self.sharpe_ratio, 3),
+            'drawdown_pct': round(self.drawdown * 100, 2),
+            'max_drawdown_pct': round(self.max_drawdown * 100, 2),
+            'beta': rounded(self.beta, 3),
+            'correlation': rounded(self.correlation, 3),
+        }
+
+
+class RollingBeta:
+    """Beta of portfolio on benchmark returns, updated with one pair per bar.
+
+    window=None keeps every pair (the whole-run beta), window=N only the
+    last N (running sums with a ring buffer), and halflife=H weights pairs
+    exponentially with a half-life of H bars instead. All O(1) per update.
+    beta stays None until at least `min_pairs` of the pairs it covers have a
+    benchmark that actually moved, so a flat or stale benchmark feed never
+    produces a hedge ratio.
+    """
+
+    def __init__(self, window=None, halflife=None, min_pairs=3):
+        if window is not None and halflife is not None:
+            raise ValueError("Give a beta window or a half-life, not both")
+        if window is not None and window < 2:
+            raise ValueError("Beta window must be at least 2 bars")
+        if halflife is not None and halflife <= 0:
+            raise ValueError("Beta half-life must be positive")
+        self.window = window
+        self.halflife = halflife
+        self.min_pairs = min_pairs
+        self.pairs = 0
+        self.moves = 0  # Pairs (in the window) whose benchmark return isn't 0
+        if halflife is not None:
+            self._alpha = 1 - 0.5 ** (1 / halflife)
+            self._mean_r = self._mean_b = self._var_b = self._cov = 0.0
+        else:
+            self._ring = [None] * window if window else None
+            self._sum_r = self._sum_b = self._sum_bb = self._sum_rb = 0.0
+
+    def update(self, r, b):
+        self.pairs += 1
+        if b != 0:
+            self.moves += 1
+        if self.halflife is not None:
+            if self.pairs == 1:
+                self._mean_r, self._mean_b = r, b
+                return self
+            a = self._alpha
+            db = b - self._mean_b
+            dr = r - self._mean_r
+            self._mean_r += a * dr
+            self._mean_b += a * db
+            self._var_b = (1 - a) * (self._var_b + a * db * db)
+            self._cov = (1 - a) * (self._cov + a * dr * db)
+            return self
+        if self._ring is not None:
+            slot = (self.pairs - 1) % self.window
+            old = self._ring[slot]
+            if old is not None:
+                if old[1] != 0:
+                    self.moves -= 1
+                self._sum_r -= old[0]
+                self._sum_b -= old[1]
+                self._sum_bb -= old[1] * old[1]
+                self._sum_rb -= old[0] * old[1]
+            self._ring[slot] = (r, b)
+        self._sum_r += r
+        self._sum_b += b
+        self._sum_bb += b * b
+        self._sum_rb += r * b
+        return self
+
+    @property
+    def beta(self):
+        if self.pairs < self.min_pairs or self.moves < self.min_pairs:
+            return None
+        if self.halflife is not None:
+            return self._cov / self._var_b if self._var_b > 0 else None
+        n = min(self.pairs, self.window) if self.window else self.pairs
+        mean_b = self._sum_b / n
+        var_b = self._sum_bb / n - mean_b * mean_b
+        if var_b <= 1e-18:
+            return None
+        return (self._sum_rb / n - self._sum_r / n * mean_b) / var_b
+
+
+def parse_hedge_beta(config):
+    """Validate hedge beta settings ({"window": bars}, {"halflife": bars} or {}) and
+    return them as RollingBeta keyword arguments. Raises ValueError if invalid."""
+    if not isinstance(config, dict):
+        raise ValueError('hedge_beta must be an object like {"window": 20} or {"halflife": 10}')
+    unknown = set(config) - {'window', 'halflife'}
+    if unknown:
+        raise ValueError(f"Unknown hedge_beta setting(s): {', '.join(sorted(map(str, unknown)))}")
+    settings = {key: value for key, value in config.items() if value is not None}
+    if len(settings) > 1:
+        raise ValueError("hedge_beta takes a window or a half-life, not both")
+    window = settings.get('window')
+    if window is not None:
+        if (isinstance(window, bool) or not isinstance(window, (int, float)) or not math.isfinite(window)
+                or window != int(window) or window < 2):
+            raise ValueError("hedge_beta window must be a finite whole number of bars, at least 2")
+        settings['window'] = int(window)
+    halflife = settings.get('halflife')
+    if halflife is not None:
+        if (isinstance(halflife, bool) or not isinstance(halflife, (int, float)) or not math.isfinite(halflife)
+                or not halflife > 0):
+            raise ValueError("hedge_beta halflife must be a positive, finite number of bars")
+        settings['halflife'] = float(halflife)
+    return settings
+
+
+def default_hedge_beta():
+    """Hedge beta estimator settings from the environment (HEDGE_BETA_WINDOW /
+    HEDGE_BETA_HALFLIFE, in bars); empty means the whole-run beta"""
+    config = {}
+    if os.environ.get('HEDGE_BETA_WINDOW'):
+        config['window'] = float(os.environ['HEDGE_BETA_WINDOW'])
+    if os.environ.get('HEDGE_BETA_HALFLIFE'):
+        config['halflife'] = float(os.environ['HEDGE_BETA_HALFLIFE'])
+    return parse_hedge_beta(config)
@@ -0,0 +1,197 @@
+import csv
+import io
+import os
+import sys
+import threading
+import time
+from bisect import bisect_left, insort
+
+import requests
+
+'''Local symbol universe for instant ticker validation and autocomplete'''
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'symbols.csv')
+FIELDS = ('symbol', 'name', 'exchange', 'type')
+
+# NASDAQ Trader symbol directory, used by refresh() to rebuild the universe file
+NASDAQ_LISTED_URL = 'https://www.nasdaqtrader.com/dynamic/SymDir/nasdaqlisted.txt'
+OTHER_LISTED_URL = 'https://www.nasdaqtrader.com/dynamic/SymDir/otherlisted.txt'
+OTHER_EXCHANGES = {'A': 'NYSE American', 'N': 'NYSE', 'P': 'NYSE Arca', 'Z': 'Cboe BZX', 'V': 'IEX'}
+# Indexes the simulator uses, which the symbol directory doesn't list
+INDEXES = [
+    {'symbol': '^DJI', 'name': 'Dow Jones Industrial Average', 'exchange': 'INDEX', 'type': 'index'},
+    {'symbol': '^GSPC', 'name': 'S&P 500', 'exchange': 'INDEX', 'type': 'index'},
+    {'symbol': '^IXIC', 'name': 'NASDAQ Composite', 'exchange': 'INDEX', 'type': 'index'},
+    {'symbol': '^VIX', 'name': 'CBOE Volatility Index', 'exchange': 'INDEX', 'type': 'index'},
+]
+
+
+class SymbolUniverse:
+    """In-memory index over (symbol, name, exchange, type) records.
+
+    Exact lookups go through a dict; prefix searches bisect into two sorted
+    key lists, one of symbols and one of lower-cased names, so both stay well
+    under a millisecond for a full listing of US equities and ETFs.
+    """
+
+    def __init__(self, records=()):
+        self._lock = threading.Lock()
+        self._by_symbol = {}
+        for record in records:
+            self._by_symbol[record['symbol']] = record
+        self._symbols = sorted(self._by_symbol)
+        self._names = sorted((record['name'].lower(), symbol) for symbol, record in self._by_symbol.items())
+
+    @classmethod
+    def load(cls, path=DEFAULT_PATH):
+        """Read a symbols CSV (symbol,name,exchange,type); a missing file gives an empty universe"""
+        if not os.path.exists(path):
+            print(f"DEBUG: Symbol universe file {path} not found, validation will use the data provider only")
+            return cls()
+        with open(path, newline='', encoding='utf-8') as f:
+            records = [
+                {field: (row.get(field) or '').strip() for field in FIELDS}
+                for row in csv.DictReader(f)
+                if (row.get('symbol') or '').strip()
+            ]
+        for record in records:
+            record['symbol'] = record['symbol'].upper()
+            record['name'] = record['name'] or record['symbol']
+        print(f"DEBUG: Loaded {len(records)} symbols from {path}")
+        return cls(records)
+
+    def __len__(self):
+        return len(self._by_symbol)
+
+    def replace(self, other):
+        """Swap in another universe's records (e.g. a freshly built listing),
+        keeping symbols added since startup that it doesn't have"""
+        with self._lock:
+            by_symbol = dict(other._by_symbol)
+            for symbol, record in self._by_symbol.items():
+                by_symbol.setdefault(symbol, record)
+            self._by_symbol = by_symbol
+            self._symbols = sorted(by_symbol)
+            self._names = sorted((record['name'].lower(), symbol) for symbol, record in by_symbol.items())
+
+    def get(self, symbol):
+        """Return the record for an exact symbol, or None"""
+        return self._by_symbol.get(symbol.upper().strip())
+
+    def add(self, symbol, name=None, exchange='Unknown', type='stock'):
+        """Remember a symbol confirmed by a remote provider (in memory only)"""
+        symbol = symbol.upper().strip()
+        record = {'symbol': symbol, 'name': name or symbol, 'exchange': exchange, 'type': type}
+        with self._lock:
+            if symbol in self._by_symbol:
+                return
+            self._by_symbol[symbol] = record
+            insort(self._symbols, symbol)
+            insort(self._names, (record['name'].lower(), symbol))
+
+    @staticmethod
+    def _prefix_range(keys, prefix, wrap=lambda key: key):
+        """[lo, hi) slice of a sorted key list whose keys start with prefix"""
+        return bisect_left(keys, wrap(prefix)), bisect_left(keys, wrap(prefix + '\uffff'))
+
+    def search(self, query, limit=10):
+        """Symbols starting with `query`, then companies whose name starts with it"""
+        query = query.strip()
+        if not query:
+            return []
+        results, seen = [], set()
+        with self._lock:
+            lo, hi = self._prefix_range(self._symbols, query.upper())
+            for symbol in self._symbols[lo:min(hi, lo + limit)]:
+                results.append(self._by_symbol[symbol])
+                seen.add(symbol)
+            if len(results) < limit:
+                lo, hi = self._prefix_range(self._names, query.lower(), wrap=lambda key: (key,))
+                for _, symbol in self._names[lo:hi]:
+                    if symbol not in seen:
+                        results.append(self._by_symbol[symbol])
+                        seen.add(symbol)
+                        if len(results) >= limit:
+                            break
+        return [dict(record) for record in results]
+
+
+def _read_pipe_file(url):
+    resp = requests.get(url, timeout=30)
+    resp.raise_for_status()
+    # The last line is a "File Creation Time" footer
+    lines = [line for line in resp.text.splitlines() if line and not line.startswith('File Creation Time')]
+    return csv.DictReader(io.StringIO('\n'.join(lines)), delimiter='|')
+
+
+def refresh(path=DEFAULT_PATH):
+    """Rebuild the universe file from the NASDAQ Trader symbol directory"""
+    records = {}
+    for row in _read_pipe_file(NASDAQ_LISTED_URL):
+        if row.get('Test Issue') == 'Y':
+            continue
+        records[row['Symbol']] = {
+            'symbol': row['Symbol'],
+            'name': row['Security Name'],
+            'exchange': 'NASDAQ',
+            'type': 'etf' if row.get('ETF') == 'Y' else 'stock',
+        }
+    for row in _read_pipe_file(OTHER_LISTED_URL):
+        if row.get('Test Issue') == 'Y':
+            continue
+        # Yahoo writes class shares with a dash (BRK.B -> BRK-B)
+        symbol = row['ACT Symbol'].replace('.', '-')
+        records[symbol] = {
+            'symbol': symbol,
+            'name': row['Security Name'],
+            'exchange': OTHER_EXCHANGES.get(row.get('Exchange'), 'Unknown'),
+            'type': 'etf' if row.get('ETF') == 'Y' else 'stock',
+        }
+    for record in INDEXES:
+        records[record['symbol']] = dict(record)
+    # Keep anything else that was added by hand
+    if os.path.exists(path):
+        with open(path, newline='', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                if row['symbol'] not in records:
+                    records[row['symbol']] = {field: row.get(field, '') for field in FIELDS}
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDS)
+        writer.writeheader()
+        for symbol in sorted(records):
+            writer.writerow(records[symbol])
+    os.replace(tmp_path, path)
+    print(f"Wrote {len(records)} symbols to {path}")
+    return len(records)
+
+
+def refresh_in_background(universe, path=DEFAULT_PATH, max_age_days=7):
+    """Rebuild a missing or stale universe file on a daemon thread and swap
+    the new listing into `universe`. Returns the thread, or None when the file
+    is fresh enough. Failures are logged and leave the current universe in place."""
+    if os.path.exists(path) and time.time() - os.path.getmtime(path) < max_age_days * 24 * 3600:
+        return None
+
+    def run():
+        try:
+            refresh(path)
+        except Exception as e:
+            print(f"Warning: Symbol universe refresh failed, unknown tickers will be checked remotely: {e}")
+            return
+        universe.replace(SymbolUniverse.load(path))
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    return thread
+
+
+# Shared instance loaded at startup, used by ticker validation and /autocomplete
+symbol_universe = SymbolUniverse.load(os.environ.get('SYMBOL_UNIVERSE_PATH', DEFAULT_PATH))
+
+
+if __name__ == '__main__':
+    # python symbol_universe.py [path] - refresh the universe file (also run at build time)
+    refresh(sys.argv[1] if len(sys.argv) > 1 else os.environ.get('SYMBOL_UNIVERSE_PATH', DEFAULT_PATH))
@@ -0,0 +1,100 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import analytics
+
+
+@pytest.fixture
+def history():
+    rng = np.random.default_rng(21)
+    times = pd.bdate_range('2023-01-02', periods=300).as_unit('ns')
+    values = 100_000 * np.cumprod(1 + rng.normal(0.0004, 0.01, len(times)))
+    return times, values
+
+
+def test_performance_matches_pandas(history):
+    times, values = history
+    metrics = analytics.performance(times.values, values, risk_free_rate=0.03, periods=252)
+    series = pd.Series(values, index=times)
+    returns = series.pct_change().dropna()
+    excess = returns - 0.03 / 252
+    drawdown = 1 - series / series.cummax()
+
+    assert metrics['returns'] == 299 and metrics['data_points'] == 300
+    assert metrics['total_return'] == pytest.approx(values[-1] / values[0] - 1, rel=1e-12)
+    # Population std, as in the streaming metrics
+    assert metrics['volatility'] == pytest.approx(returns.std(ddof=0) * np.sqrt(252), rel=1e-10)
+    assert metrics['sharpe_ratio'] == pytest.approx(
+        excess.mean() * 252 / (returns.std(ddof=0) * np.sqrt(252)), rel=1e-10)
+    downside = np.sqrt((np.minimum(excess, 0) ** 2).mean())
+    assert metrics['sortino_ratio'] == pytest.approx(excess.mean() * 252 / (downside * np.sqrt(252)), rel=1e-10)
+    assert metrics['max_drawdown'] == pytest.approx(drawdown.max(), rel=1e-12)
+    assert metrics['hit_rate'] == pytest.approx((returns > 0).mean())
+    years = (times[-1] - times[0]) / pd.Timedelta(days=365.25)
+    assert metrics['cagr'] == pytest.approx((values[-1] / values[0]) ** (1 / years) - 1, rel=1e-10)
+    assert metrics['time_period_days'] == (times[-1] - times[0]).days
+
+
+def test_drawdown_duration():
+    times = pd.date_range('2024-01-01', periods=7, freq='D').as_unit('ns')
+    values = np.array([100, 110, 99, 105, 108, 112, 90], dtype=float)
+    metrics = analytics.performance(times.values, values, risk_free_rate=0.0)
+    assert metrics['max_drawdown'] == pytest.approx((112 - 90) / 112)
+    # Underwater from the 110 peak for 3 periods (99, 105, 108)
+    assert metrics['max_drawdown_periods'] == 3
+    assert metrics['max_drawdown_days'] == 3.0
+
+
+def test_degenerate_histories():
+    times = pd.date_range('2024-01-01', periods=3, freq='D').as_unit('ns').values
+    assert analytics.performance(times[:2], [100.0, 101.0]) is None
+    flat = analytics.performance(times, [100.0, 100.0, 100.0])
+    assert flat['volatility'] == 0 and flat['sharpe_ratio'] is None and flat['calmar_ratio'] is None
+    # A zero starting value is skipped as a return base
+    assert analytics.performance(times, [0.0, 100.0, 110.0]) is None
+
+
+def test_periods_per_year():
+    assert analytics.periods_per_year('weekly') == 52
+    assert analytics.periods_per_year('hourly') == 252
+
+
+def test_beta_matches_numpy():
+    rng = np.random.default_rng(4)
+    b = rng.normal(0, 0.01, 250)
+    r = 0.8 * b + rng.normal(0, 0.005, 250)
+    result = analytics.beta(r, b)
+    cov = np.cov(r, b, ddof=0)
+    assert result['beta'] == pytest.approx(cov[0, 1] / cov[1, 1], rel=1e-10)
+    assert result['correlation'] == pytest.approx(np.corrcoef(r, b)[0, 1], rel=1e-10)
+    assert result['r_squared'] == pytest.approx(np.corrcoef(r, b)[0, 1] ** 2, rel=1e-10)
+    assert result['portfolio_volatility'] == pytest.approx(r.std() * np.sqrt(252), rel=1e-10)
+    assert result['benchmark_volatility'] == pytest.approx(b.std() * np.sqrt(252), rel=1e-10)
+    assert analytics.beta(r, np.full(250, 0.001)) is None
+
+
+def test_rolling_beta_matches_pandas_rolling():
+    rng = np.random.default_rng(6)
+    b = rng.normal(0, 0.01, 120)
+    b[40:50] = 0.0  # Flat benchmark over a whole window
+    r = 1.2 * b + rng.normal(0, 0.003, 120)
+    out = analytics.rolling_beta(r, b, window=10)
+    rs, bs = pd.Series(r), pd.Series(b)
+    expected = rs.rolling(10).cov(bs, ddof=0) / bs.rolling(10).var(ddof=0)
+    assert np.isnan(out[:9]).all() and np.isnan(out[49])
+    # A constant (not just zero) benchmark return is flat too
+    assert np.isnan(analytics.rolling_beta(r[:20], np.full(20, 0.001), window=10)[9:]).all()
+    valid = ~np.isnan(expected.to_numpy()) & (bs.rolling(10).var(ddof=0).to_numpy() > 1e-12)
+    np.testing.assert_allclose(out[valid], expected.to_numpy()[valid], rtol=1e-8)
+    assert np.isnan(analytics.rolling_beta(r[:5], b[:5], window=10)).all()
+
+
+def test_aligned_returns_drop_periods_without_prices():
+    values = np.array([100.0, 110.0, 0.0, 50.0, 55.0, 66.0])
+    prices = np.array([10.0, 11.0, 12.0, np.nan, 13.0, 13.0])
+    portfolio, benchmark, keep = analytics.aligned_returns(values, prices)
+    # Period 2 starts from a zero value, 3 ends on and 4 starts from a missing price
+    np.testing.assert_array_equal(keep, [True, True, False, False, True])
+    np.testing.assert_allclose(portfolio, [0.1, -1.0, 0.2])
+    np.testing.assert_allclose(benchmark, [0.1, 12 / 11 - 1, 0.0])
@@ -0,0 +1,135 @@
+import pandas as pd
+import pytest
+
+import bar_cache
+from bar_cache import BarCache, NegativeCache
+
+
+def make_frame(n=10, start=100.0):
+    index = pd.date_range('2025-07-21', periods=n, freq='D')
+    return pd.DataFrame({'Close': [start + i for i in range(n)]}, index=index)
+
+
+def frame_bytes(frame):
+    return int(frame.memory_usage(index=True, deep=True).sum())
+
+
+def test_make_key_normalizes_ticker_and_dates():
+    key = BarCache.make_key(' aapl ', pd.Timestamp('2025-07-21'), None, '1d', 'synthetic')
+    assert key == ('synthetic', 'AAPL', '2025-07-21 00:00:00', None, '1d')
+
+
+def test_get_returns_a_copy_and_counts_hits_and_misses():
+    cache = BarCache()
+    frame = make_frame()
+    cache.put('k', frame)
+    frame.iloc[0, 0] = -1.0  # Mutating the original doesn't reach the cache
+
+    first = cache.get('k')
+    assert first.iloc[0, 0] == 100.0
+    first.iloc[0, 0] = -2.0  # Nor does mutating what get() returned
+    assert cache.get('k').iloc[0, 0] == 100.0
+    assert cache.get('missing') is None
+    assert (cache.hits, cache.misses) == (2, 1)
+
+
+def test_contains_does_not_count_or_reorder():
+    cache = BarCache(max_entries=2)
+    cache.put('a', make_frame())
+    cache.put('b', make_frame())
+    assert 'a' in cache and 'z' not in cache
+    assert (cache.hits, cache.misses) == (0, 0)
+    # 'a' is still least recently used, so it is evicted first
+    cache.put('c', make_frame())
+    assert 'a' not in cache and 'b' in cache and 'c' in cache
+
+
+def test_evicts_least_recently_used_by_entry_count():
+    cache = BarCache(max_entries=2)
+    cache.put('a', make_frame())
+    cache.put('b', make_frame())
+    cache.get('a')  # 'b' is now the least recently used
+    cache.put('c', make_frame())
+    assert cache.get('b') is None
+    assert cache.get('a') is not None and cache.get('c') is not None
+    assert cache.evictions == 1
+
+
+def test_evicts_by_bytes_and_tracks_footprint():
+    size = frame_bytes(make_frame())
+    cache = BarCache(max_entries=100, max_bytes=2 * size)
+    for key in 'abc':
+        cache.put(key, make_frame())
+    assert cache.current_bytes == 2 * size
+    assert 'a' not in cache and 'b' in cache and 'c' in cache
+
+    cache.put('c', make_frame(n=5))  # Replacing an entry swaps its byte count
+    assert cache.current_bytes == size + frame_bytes(make_frame(n=5))
+
+
+def test_oversized_frame_is_not_cached():
+    cache = BarCache(max_bytes=frame_bytes(make_frame(n=5)))
+    cache.put('small', make_frame(n=5))
+    cache.put('big', make_frame(n=1000))
+    assert 'big' not in cache and 'small' in cache
+
+
+def test_stats_and_clear():
+    cache = BarCache()
+    cache.put('a', make_frame())
+    cache.get('a')
+    cache.get('b')
+    stats = cache.stats()
+    assert stats['entries'] == 1 and stats['hit_rate'] == 0.5
+    cache.clear()
+    assert cache.stats()['entries'] == 0 and cache.current_bytes == 0
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 500.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(bar_cache, 'time', clock)
+    return clock
+
+
+def test_negative_entries_expire_after_ttl(clock):
+    cache = NegativeCache(ttl=600)
+    cache.add('k')
+    clock.now += 599.9
+    assert 'k' in cache
+    clock.now += 0.1
+    assert 'k' not in cache
+    assert cache.stats()['entries'] == 0  # Expired entries are dropped on lookup
+    assert cache.hits == 1
+
+
+def test_negative_add_refreshes_expiry_and_discard_removes(clock):
+    cache = NegativeCache(ttl=10)
+    cache.add('k')
+    clock.now += 8
+    cache.add('k')
+    clock.now += 8
+    assert 'k' in cache
+    cache.discard('k')
+    assert 'k' not in cache
+
+
+def test_negative_cache_ttl_zero_disables_it(clock):
+    cache = NegativeCache(ttl=0)
+    cache.add('k')
+    assert 'k' not in cache and cache.stats()['entries'] == 0
+
+
+def test_negative_cache_is_bounded_oldest_first(clock):
+    cache = NegativeCache(ttl=60, max_entries=2)
+    for key in 'abc':
+        cache.add(key)
+    assert 'a' not in cache and 'b' in cache and 'c' in cache
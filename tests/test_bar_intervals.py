@@ -0,0 +1,63 @@
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from bar_intervals import base_interval, resample_bars
+
+
+@pytest.fixture
+def minute_bars():
+    rng = np.random.default_rng(12)
+    days = pd.bdate_range('2024-03-04', periods=3)
+    index = pd.DatetimeIndex([day + pd.Timedelta(minutes=m) for day in days for m in range(570, 960)])
+    index = index.delete(np.arange(100, 130))  # A gap in the data
+    close = 100 + rng.normal(0, 0.1, len(index)).cumsum()
+    return pd.DataFrame({
+        'Open': close + rng.normal(0, 0.05, len(index)),
+        'High': close + rng.uniform(0, 0.2, len(index)),
+        'Low': close - rng.uniform(0, 0.2, len(index)),
+        'Close': close,
+        'Volume': rng.integers(100, 1000, len(index)).astype(float),
+    }, index=index.rename('Datetime'))
+
+
+@pytest.mark.parametrize('interval, rule', [('5m', '5min'), ('15m', '15min'), ('30m', '30min'), ('60m', '60min')])
+def test_resample_matches_pandas(minute_bars, interval, rule):
+    # Buckets anchored at the 9:30 open, empty ones dropped
+    expected = minute_bars.resample(rule, origin=pd.Timestamp('2024-03-04 09:30')).agg({
+        'Open': 'first', 'High': 'max', 'Low': 'min', 'Close': 'last', 'Volume': 'sum',
+    }).dropna(subset=['Close'])
+    derived = resample_bars(minute_bars, interval)
+    pd.testing.assert_frame_equal(derived, expected, check_freq=False, check_index_type=False)
+
+
+def test_hourly_bars_start_on_the_half_hour(minute_bars):
+    derived = resample_bars(minute_bars, '60m')
+    day = derived.loc['2024-03-05']
+    assert list(day.index.strftime('%H:%M')) == ['09:30', '10:30', '11:30', '12:30', '13:30', '14:30', '15:30']
+    assert day['Volume'].iloc[-1] == minute_bars.loc['2024-03-05 15:30':'2024-03-05 15:59', 'Volume'].sum()
+
+
+def test_unsorted_and_empty_input(minute_bars):
+    shuffled = minute_bars.sample(frac=1, random_state=0)
+    pd.testing.assert_frame_equal(resample_bars(shuffled, '15m'), resample_bars(minute_bars, '15m'))
+    assert resample_bars(minute_bars.iloc[:0], '15m').empty
+
+
+def test_base_interval():
+    now = datetime(2024, 6, 14, 12)
+    # Recent short window: build from 1m
+    assert base_interval('15m', '2024-06-10', '2024-06-14', now=now) == '1m'
+    # Longer than one 1m request: 5m
+    assert base_interval('15m', '2024-05-20', '2024-06-14', now=now) == '5m'
+    # 1m no longer kept that far back; 5m isn't either past 60 days
+    assert base_interval('30m', '2024-05-01', '2024-05-03', now=now) == '5m'
+    assert base_interval('90m', '2024-01-02', '2024-01-05', now=now) is None
+    assert base_interval('120m', '2024-06-10', '2024-06-14', now=now) is None
+    # 2m can only come from 1m
+    assert base_interval('2m', '2024-05-01', '2024-05-03', now=now) is None
+    # Already the finest base, or not an intraday interval
+    assert base_interval('1m', '2024-06-10', '2024-06-14', now=now) is None
+    assert base_interval('1d', '2024-06-10', '2024-06-14', now=now) is None
@@ -0,0 +1,114 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from bar_store import BarStore, _merge_ranges, _missing_ranges
+
+
+def daily_bars(start, end):
+    """Weekday bars on [start, end) with Close = day of month"""
+    index = pd.bdate_range(start, pd.Timestamp(end) - pd.Timedelta(days=1))
+    return pd.DataFrame({'Close': index.day.astype('float64')}, index=index)
+
+
+class Fetcher:
+    def __init__(self, empty=False):
+        self.calls = []
+        self.empty = empty
+
+    def __call__(self, start, end):
+        self.calls.append((start, end))
+        return pd.DataFrame() if self.empty else daily_bars(start, end)
+
+
+@pytest.fixture
+def store(tmp_path):
+    return BarStore(root=str(tmp_path), offline=False)
+
+
+def test_merge_ranges_joins_overlapping_and_touching():
+    assert _merge_ranges([[5, 8], [0, 2], [2, 4], [7, 10]]) == [[0, 4], [5, 10]]
+
+
+def test_missing_ranges_returns_the_gaps():
+    coverage = [[2, 4], [6, 8]]
+    assert _missing_ranges(coverage, 0, 10) == [(0, 2), (4, 6), (8, 10)]
+    assert _missing_ranges(coverage, 2, 4) == []
+    assert _missing_ranges(coverage, 3, 7) == [(4, 6)]
+
+
+def test_read_through_fetches_only_the_gaps(store):
+    fetch = Fetcher()
+    first = store.read_through('test', 'AAPL', '1d', '2024-03-04', '2024-03-11', fetch)
+    assert fetch.calls == [(pd.Timestamp('2024-03-04'), pd.Timestamp('2024-03-11'))]
+    assert list(first['Close']) == [4, 5, 6, 7, 8]
+
+    # An overlapping window only asks for the part that isn't on disk
+    second = store.read_through('test', 'AAPL', '1d', '2024-03-06', '2024-03-15', fetch)
+    assert fetch.calls[1:] == [(pd.Timestamp('2024-03-11'), pd.Timestamp('2024-03-15'))]
+    assert list(second['Close']) == [6, 7, 8, 11, 12, 13, 14]
+    assert store.missing('test', 'AAPL', '1d', '2024-03-04', '2024-03-15') == []
+
+    # A fresh store on the same directory serves it without fetching
+    reopened = BarStore(root=store.root, offline=False)
+    third = reopened.read_through('test', 'AAPL', '1d', '2024-03-04', '2024-03-15', fetch)
+    assert len(fetch.calls) == 2
+    expected = daily_bars('2024-03-04', '2024-03-15')
+    assert list(third.index) == list(expected.index)
+    np.testing.assert_array_equal(third['Close'].to_numpy(), expected['Close'].to_numpy())
+
+
+def test_empty_fetch_over_sessions_is_not_marked_covered(store):
+    fetch = Fetcher(empty=True)
+    store.read_through('test', 'MSFT', '1d', '2024-03-04', '2024-03-06', fetch)
+    store.read_through('test', 'MSFT', '1d', '2024-03-04', '2024-03-06', fetch)
+    assert len(fetch.calls) == 2
+    assert store.missing('test', 'MSFT', '1d', '2024-03-04', '2024-03-06') == [
+        (pd.Timestamp('2024-03-04'), pd.Timestamp('2024-03-06'))
+    ]
+
+
+def test_empty_fetch_without_sessions_is_marked_covered(store):
+    fetch = Fetcher(empty=True)
+    # Saturday and Sunday: nothing to fetch, so the answer is final
+    store.read_through('test', 'MSFT', '1d', '2024-03-09', '2024-03-11', fetch)
+    store.read_through('test', 'MSFT', '1d', '2024-03-09', '2024-03-11', fetch)
+    assert len(fetch.calls) == 1
+
+
+def test_failed_fetch_keeps_earlier_gaps(store):
+    store.read_through('test', 'NVDA', '1d', '2024-03-06', '2024-03-08', Fetcher())
+
+    def fetch(start, end):
+        if start > pd.Timestamp('2024-03-06'):
+            raise RuntimeError('throttled')
+        return daily_bars(start, end)
+
+    with pytest.raises(RuntimeError):
+        store.read_through('test', 'NVDA', '1d', '2024-03-04', '2024-03-12', fetch)
+    # The gap before the stored range was fetched and kept; the one after wasn't
+    assert store.missing('test', 'NVDA', '1d', '2024-03-04', '2024-03-12') == [
+        (pd.Timestamp('2024-03-08'), pd.Timestamp('2024-03-12'))
+    ]
+    assert list(store.read('test', 'NVDA', '1d', '2024-03-04', '2024-03-12')['Close']) == [4, 5, 6, 7]
+
+
+def test_offline_mode_never_fetches(store):
+    store.read_through('test', 'AAPL', '1d', '2024-03-04', '2024-03-06', Fetcher())
+    offline = BarStore(root=store.root, offline=True)
+    fetch = Fetcher()
+    frame = offline.read_through('test', 'AAPL', '1d', '2024-03-04', '2024-03-15', fetch)
+    assert fetch.calls == []
+    assert list(frame['Close']) == [4, 5]
+    offline.write('test', 'AAPL', '1d', daily_bars('2024-03-11', '2024-03-12'), '2024-03-11', '2024-03-12')
+    assert len(store.read('test', 'AAPL', '1d', '2024-03-04', '2024-03-15')) == 2
+
+
+def test_write_merges_and_prefers_new_bars(store):
+    store.write('test', 'AAPL', '1d', daily_bars('2024-03-04', '2024-03-07'), '2024-03-04', '2024-03-07')
+    revised = daily_bars('2024-03-06', '2024-03-09')
+    revised['Close'] = revised['Close'] * 10
+    store.write('test', 'AAPL', '1d', revised, '2024-03-06', '2024-03-09')
+    frame = store.read('test', 'AAPL', '1d', '2024-03-01', '2024-03-31')
+    assert frame.index.is_monotonic_increasing
+    np.testing.assert_array_equal(frame['Close'].to_numpy(), [4, 5, 60, 70, 80])
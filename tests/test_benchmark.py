@@ -0,0 +1,103 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import benchmark
+from bar_cache import NegativeCache
+from benchmark import BenchmarkSeries, BenchmarkService
+
+
+def daily_frame():
+    index = pd.DatetimeIndex(['2024-07-01', '2024-07-02', '2024-07-03', '2024-07-05', '2024-07-08']).as_unit('ns')
+    close = np.array([100.0, 102.0, 101.0, 104.0, 103.0])
+    return pd.DataFrame({'High': close + 1, 'Low': close - 1, 'Close': close}, index=index)
+
+
+@pytest.fixture
+def series():
+    return BenchmarkSeries('^GSPC', daily_frame())
+
+
+def test_daily_times_get_their_own_bar_mid(series):
+    times = pd.DatetimeIndex(['2024-07-01', '2024-07-03', '2024-07-05'])
+    np.testing.assert_allclose(series.prices(times), [100.0, 101.0, 104.0])
+    # The July 4th holiday is within a day of the 3rd's bar, a Sunday isn't within a day of Friday's
+    np.testing.assert_allclose(series.prices(pd.DatetimeIndex(['2024-07-04', '2024-07-07'])), [101.0, np.nan])
+    assert series.price(pd.Timestamp('2024-06-28')) is None
+
+
+def test_intraday_times_get_the_previous_sessions_close(series):
+    times = pd.DatetimeIndex(['2024-07-02 10:30', '2024-07-02 15:30', '2024-07-05 09:30', '2024-07-08 12:30'])
+    # Never the same day's bar, whose High / Low span the whole session
+    np.testing.assert_allclose(series.prices(times), [100.0, 100.0, 101.0, 104.0])
+    assert series.price(pd.Timestamp('2024-07-01 10:30')) is None
+
+
+def test_returns(series):
+    times = pd.DatetimeIndex(['2024-07-01', '2024-07-02', '2024-07-03', '2024-07-07'])
+    np.testing.assert_allclose(series.returns(times), [0.02, 101 / 102 - 1, np.nan])
+
+
+def test_empty_series():
+    empty = BenchmarkSeries('^GSPC', pd.DataFrame())
+    assert len(empty) == 0
+    assert np.isnan(empty.prices(pd.DatetimeIndex(['2024-07-01']))).all()
+
+
+class LoadLog(list):
+    """Tickers loaded so far; `frames` are returned (in order) before the default history"""
+
+    def __init__(self):
+        super().__init__()
+        self.frames = []
+
+    def __call__(self, ticker, start, end, interval):
+        self.append(ticker)
+        return self.frames.pop(0) if self.frames else daily_frame()
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def loads(monkeypatch):
+    log = LoadLog()
+    monkeypatch.setattr(benchmark, 'load_bars', log)
+    monkeypatch.setattr(benchmark, 'data_source', lambda: 'test')
+    return log
+
+
+def test_service_loads_each_series_once(loads):
+    service = BenchmarkService()
+    assert service.price('^gspc', pd.Timestamp('2024-07-02')) == 102.0
+    service.prices('^GSPC', pd.DatetimeIndex(['2024-07-03']))
+    service.price('VOO', pd.Timestamp('2024-07-02'))
+    assert loads == ['^GSPC', 'VOO']
+    assert service.stats() == {'series': {'test:^GSPC': 5, 'test:VOO': 5}, 'loads': 2}
+
+
+def test_empty_load_is_only_kept_for_the_negative_ttl(loads, monkeypatch):
+    monkeypatch.setattr(benchmark, 'negative_cache', NegativeCache(ttl=60))
+    clock = FakeClock()
+    monkeypatch.setattr(benchmark, 'time', clock)
+    loads.frames.append(pd.DataFrame())
+    service = BenchmarkService()
+    assert service.price('^GSPC', pd.Timestamp('2024-07-02')) is None
+    assert service.price('^GSPC', pd.Timestamp('2024-07-02')) is None
+    assert loads == ['^GSPC']
+    clock.now += 61
+    assert service.price('^GSPC', pd.Timestamp('2024-07-02')) == 102.0
+    assert loads == ['^GSPC', '^GSPC']
+
+
+def test_empty_load_is_retried_when_negative_caching_is_off(loads, monkeypatch):
+    monkeypatch.setattr(benchmark, 'negative_cache', NegativeCache(ttl=0))
+    loads.frames.append(pd.DataFrame())
+    service = BenchmarkService()
+    assert service.price('^GSPC', pd.Timestamp('2024-07-02')) is None
+    assert service.price('^GSPC', pd.Timestamp('2024-07-02')) == 102.0
@@ -0,0 +1,141 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_provider import AlphaVantageProvider, DataProviderError, SyntheticDataProvider
+
+
+def parse(text):
+    return json.loads(text, object_pairs_hook=AlphaVantageProvider._bar_values)
+
+
+def bar(**fields):
+    return {f"{i}. {name}": value for i, (name, value) in enumerate(fields.items(), 1)}
+
+
+DAILY_ADJUSTED = {
+    "Meta Data": {"1. Information": "Daily Time Series with Splits and Dividend Events", "2. Symbol": "IBM"},
+    "Time Series (Daily)": {
+        "2025-07-22": {"1. open": "10", "2. high": "12", "3. low": "9", "4. close": "11",
+                       "5. adjusted close": "10.5", "6. volume": "1000",
+                       "7. dividend amount": "0.0000", "8. split coefficient": "1.0"},
+        "2025-07-21": {"1. open": "9", "2. high": "10", "3. low": "8", "4. close": "9.5",
+                       "5. adjusted close": "9.25", "6. volume": "2000",
+                       "7. dividend amount": "0.0000", "8. split coefficient": "1.0"},
+    },
+}
+
+
+def test_daily_adjusted_maps_fields_by_name():
+    data = parse(json.dumps(DAILY_ADJUSTED))
+    frame = AlphaVantageProvider._bars_frame(data["Time Series (Daily)"], AlphaVantageProvider.DAILY_FIELDS, "Date")
+    assert list(frame.columns) == ["Open", "High", "Low", "Close", "Adj Close", "Volume"]
+    assert [str(t.date()) for t in frame.index] == ["2025-07-21", "2025-07-22"]  # Ascending
+    np.testing.assert_array_equal(frame.loc["2025-07-21"].to_numpy(), [9, 10, 8, 9.5, 9.25, 2000])
+    np.testing.assert_array_equal(frame["Volume"].to_numpy(), [2000, 1000])
+
+
+def test_field_order_does_not_matter():
+    series = {
+        "2025-07-22 10:00:00": {"5. volume": "7", "4. close": "11", "1. open": "10", "3. low": "9", "2. high": "12"},
+        "2025-07-22 09:30:00": {"1. open": "1", "2. high": "2", "3. low": "0.5", "4. close": "1.5", "5. volume": "3"},
+    }
+    frame = AlphaVantageProvider._bars_frame(
+        parse(json.dumps(series)), AlphaVantageProvider.INTRADAY_FIELDS, "Datetime"
+    )
+    np.testing.assert_array_equal(frame["Close"].to_numpy(), [1.5, 11])
+    np.testing.assert_array_equal(frame["Volume"].to_numpy(), [3, 7])
+
+
+def test_missing_field_fails_instead_of_shifting_columns():
+    # TIME_SERIES_DAILY (not adjusted) has no adjusted close, and volume is field 5
+    series = {"2025-07-22": {"1. open": "10", "2. high": "12", "3. low": "9", "4. close": "11", "5. volume": "1000"}}
+    with pytest.raises(DataProviderError, match="5. adjusted close"):
+        AlphaVantageProvider._bars_frame(parse(json.dumps(series)), AlphaVantageProvider.DAILY_FIELDS, "Date")
+
+
+def test_blank_values_become_zero():
+    series = {
+        "2025-07-22": bar(open="10", high="12", low="9", close="11", volume=""),
+        "2025-07-21": bar(open="9", high="10", low="8", close="9.5", volume="5"),
+    }
+    frame = AlphaVantageProvider._bars_frame(
+        parse(json.dumps(series)), AlphaVantageProvider.INTRADAY_FIELDS, "Datetime"
+    )
+    np.testing.assert_array_equal(frame["Volume"].to_numpy(), [5, 0])
+
+
+def test_empty_series_gives_an_empty_frame():
+    frame = AlphaVantageProvider._bars_frame({}, AlphaVantageProvider.INTRADAY_FIELDS, "Datetime")
+    assert frame.empty and list(frame.columns) == ["Open", "High", "Low", "Close", "Volume"]
+
+
+def test_non_bar_objects_stay_dicts():
+    data = parse('{"Note": "Thank you for using Alpha Vantage!", "Error Message": {"code": 1}}')
+    assert data == {"Note": "Thank you for using Alpha Vantage!", "Error Message": {"code": 1}}
+
+
+def test_synthetic_prices_do_not_depend_on_the_window():
+    provider = SyntheticDataProvider(seed=7)
+    full = provider.get_history("AAA", "2024-01-01", "2024-07-01")
+    part = SyntheticDataProvider(seed=7).get_history("AAA", "2024-03-01", "2024-04-01")
+    pd.testing.assert_frame_equal(part, full.loc["2024-03-01":"2024-03-29"])
+    other_seed = SyntheticDataProvider(seed=8).get_history("AAA", "2024-03-01", "2024-04-01")
+    assert not np.allclose(part["Close"], other_seed["Close"])
+
+
+def test_synthetic_daily_moments_follow_the_model():
+    provider = SyntheticDataProvider(seed=3, drift=0.08, volatility=0.25, correlation=0.5)
+    a = provider.get_history("AAA", "2000-01-01", "2040-01-01")
+    b = provider.get_history("BBB", "2000-01-01", "2040-01-01")
+    assert len(a) > 10_000
+    assert (a["High"] >= a[["Open", "Close"]].max(axis=1)).all()
+    assert (a["Low"] <= a[["Open", "Close"]].min(axis=1)).all()
+    ra, rb = np.diff(np.log(a["Close"])), np.diff(np.log(b["Close"]))
+    # ~10k daily draws: sampling error is about 1% on vol and 0.01 on correlation
+    assert ra.std() * np.sqrt(252) == pytest.approx(0.25, rel=0.03)
+    assert np.corrcoef(ra, rb)[0, 1] == pytest.approx(0.5, abs=0.03)
+
+
+def test_synthetic_intraday_bars_bridge_the_daily_close():
+    provider = SyntheticDataProvider(seed=1)
+    daily = provider.get_history("AAA", "2024-03-04", "2024-03-09")
+    bars = provider.get_history("AAA", "2024-03-04", "2024-03-09", interval="30m")
+    assert len(bars) == 5 * 13
+    assert bars.index[0] == pd.Timestamp("2024-03-04 09:30")
+    last = bars.groupby(bars.index.normalize())["Close"].last()
+    np.testing.assert_allclose(last.to_numpy(), daily["Close"].to_numpy(), rtol=1e-12)
+    first = bars.groupby(bars.index.normalize())["Open"].first()
+    np.testing.assert_allclose(first.to_numpy(), daily["Open"].to_numpy(), rtol=1e-12)
+    pd.testing.assert_frame_equal(bars, provider.get_history("AAA", "2024-03-04", "2024-03-09", interval="30m"))
+
+
+def test_replay_serves_recorded_bars(tmp_path):
+    frame = pd.DataFrame({"Open": [1.0, 2.0], "High": [2.0, 3.0], "Low": [0.5, 1.5],
+                          "Close": [1.5, 2.5], "Volume": [10.0, 20.0]},
+                         index=pd.DatetimeIndex(["2024-03-05", "2024-03-04"], name="Date"))
+    frame.to_csv(tmp_path / "AAA_1d.csv")
+    provider = SyntheticDataProvider(mode="replay", replay_dir=str(tmp_path))
+    bars = provider.get_history("aaa", "2024-03-01", "2024-03-10")
+    assert list(bars.index) == [pd.Timestamp("2024-03-04"), pd.Timestamp("2024-03-05")]
+    assert list(bars["Close"]) == [2.5, 1.5]
+    assert provider.validate_ticker("AAA")["valid"]
+    assert not provider.validate_ticker("BBB")["valid"]
+    assert provider.get_history("BBB", "2024-03-01", "2024-03-10").empty
+
+
+def test_synthetic_rejects_bad_settings():
+    with pytest.raises(DataProviderError):
+        SyntheticDataProvider(mode="random")
+    with pytest.raises(DataProviderError):
+        SyntheticDataProvider(mode="replay")
+    with pytest.raises(DataProviderError):
+        SyntheticDataProvider().get_history("AAA", "2024-03-04", "2024-03-05", interval="1q")
+
+
+def test_synthetic_empty_windows_are_dated_frames():
+    provider = SyntheticDataProvider()
+    weekend = provider.get_history("AAA", "2024-03-09", "2024-03-11", interval="5m")
+    assert weekend.empty and isinstance(weekend.index, pd.DatetimeIndex)
@@ -0,0 +1,79 @@
+import pytest
+
+import fetch_executor
+from fetch_executor import FetchExecutor, TokenBucket, _limit_from_env
+
+
+class FakeClock:
+    """Stands in for the time module: sleeping just advances monotonic()"""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(fetch_executor, 'time', clock)
+    return clock
+
+
+def test_bucket_allows_a_burst_then_paces_at_the_rate(clock):
+    bucket = TokenBucket(5, per=60)  # 5 requests a minute
+    for _ in range(5):
+        bucket.acquire()
+    assert clock.sleeps == []
+    bucket.acquire()
+    assert clock.sleeps == [pytest.approx(12.0)]  # One token every 12 s
+    for _ in range(3):
+        bucket.acquire()
+    assert clock.now - 1000.0 == pytest.approx(48.0)
+
+
+def test_refill_is_capped_at_capacity(clock):
+    bucket = TokenBucket(4, per=1)
+    bucket.acquire(4)
+    clock.now += 100
+    bucket.acquire(4)
+    assert clock.sleeps == []
+    bucket.acquire()
+    assert clock.sleeps == [pytest.approx(0.25)]
+
+
+def test_acquire_times_out(clock):
+    bucket = TokenBucket(1, per=10)
+    assert bucket.acquire()
+    assert bucket.acquire(timeout=3) is False
+    assert clock.now - 1000.0 == pytest.approx(3.0)
+    assert bucket.acquire(timeout=7)
+
+
+def test_drain_makes_callers_wait_for_a_refill(clock):
+    bucket = TokenBucket(2, per=1)
+    bucket.drain()
+    bucket.acquire()
+    assert clock.sleeps == [pytest.approx(0.5)]
+
+
+def test_limit_from_env(monkeypatch):
+    monkeypatch.setenv('RATE_LIMIT_TESTPROVIDER', '75/60')
+    assert _limit_from_env('testprovider', (5, 60)) == (75, 60.0)
+    monkeypatch.setenv('RATE_LIMIT_TESTPROVIDER', 'lots')
+    assert _limit_from_env('testprovider', (5, 60)) == (5, 60)
+
+
+def test_executor_runs_at_the_providers_rate(clock):
+    executor = FetchExecutor(max_workers=2, limits={'slow': (2, 10)})
+    futures = executor.map(lambda item: item * 2, [1, 2, 3], provider='slow')
+    assert {item: future.result() for item, future in futures.items()} == {1: 2, 2: 4, 3: 6}
+    # Two tokens up front, the third after 5 s
+    assert sum(clock.sleeps) == pytest.approx(5.0)
+    assert executor.bucket('slow').fill_rate == pytest.approx(0.2)
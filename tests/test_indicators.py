@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import indicators
+from indicators import IndicatorEngine
+
+
+@pytest.fixture
+def prices():
+    rng = np.random.default_rng(7)
+    # Irregular intraday times so time-based windows differ from bar counts
+    gaps = rng.choice([1, 1, 1, 5, 30], size=300)
+    index = pd.Timestamp('2024-03-04 09:30') + pd.to_timedelta(np.cumsum(gaps), unit='min')
+    return pd.Series(100 + rng.normal(size=300).cumsum(), index=pd.DatetimeIndex(index).as_unit('ns'))
+
+
+def reference(series, name, window):
+    rolling = series.rolling(window) if isinstance(window, int) else series.rolling(window, min_periods=1)
+    if name == 'sma':
+        return rolling.mean().to_numpy()
+    if name == 'high':
+        return rolling.max().to_numpy()
+    if name == 'low':
+        return rolling.min().to_numpy()
+    mid, std = rolling.mean().to_numpy(), rolling.std().to_numpy()
+    return mid, mid + 2 * std, mid - 2 * std
+
+
+@pytest.mark.parametrize('name', ['sma', 'high', 'low', 'bollinger'])
+@pytest.mark.parametrize('window', [20, '1h'])
+def test_vectorized_matches_pandas_rolling(prices, name, window):
+    engine = IndicatorEngine(prices.to_frame('Close'))
+    np.testing.assert_allclose(engine.compute(name, window=window), reference(prices, name, window), equal_nan=True)
+
+
+def test_ema_and_rsi_match_pandas(prices):
+    engine = IndicatorEngine(prices.to_frame('Close'))
+    np.testing.assert_allclose(engine.compute('ema', span=12), prices.ewm(span=12, adjust=False).mean())
+
+    delta = prices.diff()
+    gain = delta.clip(lower=0).iloc[1:].ewm(alpha=1 / 14, adjust=False).mean()
+    loss = (-delta).clip(lower=0).iloc[1:].ewm(alpha=1 / 14, adjust=False).mean()
+    expected = np.concatenate([[np.nan], (100 - 100 / (1 + gain / loss)).to_numpy()])
+    np.testing.assert_allclose(engine.compute('rsi', period=14), expected, equal_nan=True)
+
+
+@pytest.mark.parametrize('name, params', [
+    ('sma', {'window': 20}), ('sma', {'window': '1h'}), ('ema', {'span': 12}), ('rsi', {'period': 14}),
+    ('bollinger', {'window': 20}), ('bollinger', {'window': '30min'}), ('high', {'window': 20}),
+    ('low', {'window': '1h'}), ('change', {}),
+])
+def test_streaming_matches_vectorized(prices, name, params):
+    live = IndicatorEngine(prices.iloc[:100].to_frame('Close'))
+    live.track(name, **params)
+    streamed = []
+    for time, value in prices.iloc[100:].items():
+        live.update(time, value)
+        streamed.append(live.latest(name, **params))
+
+    full = IndicatorEngine(prices.to_frame('Close'))
+    for i, value in enumerate(streamed, start=100):
+        expected = full.at(name, prices.index[i], **params)
+        if expected is None:
+            assert value is None
+        else:
+            np.testing.assert_allclose(value, expected, rtol=1e-9)
+    # The appended bars are the engine's history too
+    assert len(live) == len(prices)
+    np.testing.assert_allclose(live.compute(name, **params), full.compute(name, **params), equal_nan=True)
+
+
+def test_at_looks_up_as_of_a_time(prices):
+    engine = IndicatorEngine(prices.to_frame('Close'))
+    assert engine.at('sma', prices.index[0] - pd.Timedelta(minutes=1), window=5) is None
+    assert engine.at('sma', prices.index[3], window=5) is None  # Still warming up
+    between = prices.index[10] + (prices.index[11] - prices.index[10]) / 2
+    assert engine.at('sma', between, window=5) == pytest.approx(prices.iloc[6:11].mean())
+    with pytest.raises(ValueError):
+        engine.compute('macd')
+
+
+def test_change_from_start():
+    np.testing.assert_allclose(indicators.change_from_start(np.array([50.0, 55.0, 45.0])), [0, 10, -10])
+    assert np.isnan(indicators.change_from_start(np.array([0.0, 1.0]))).all()
@@ -0,0 +1,99 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from position_ledger import PositionLedger, PositionView
+from price_matrix import PriceMatrix
+
+
+def book():
+    ledger = PositionLedger(capacity=2)
+    return ledger, PositionView(ledger, 0), PositionView(ledger, 1)
+
+
+def test_net_is_longs_minus_shorts():
+    ledger, longs, shorts = book()
+    longs['AAA'] = 10
+    longs['BBB'] = 4
+    shorts['VOO'] = 3
+    shorts['AAA'] = 2.5
+    assert ledger.tickers == ['AAA', 'BBB', 'VOO']
+    np.testing.assert_array_equal(ledger.net, [7.5, 4.0, -3.0])
+    # Each side still reads back as it was written
+    assert longs.copy() == {'AAA': 10, 'BBB': 4}
+    assert shorts.copy() == {'VOO': 3, 'AAA': 2.5}
+    assert isinstance(longs['AAA'], int) and shorts['AAA'] == 2.5
+
+
+def test_views_behave_like_the_dicts_they_replace():
+    ledger, longs, shorts = book()
+    longs['AAA'] = 5
+    longs['AAA'] = 0  # Sold out but still listed
+    assert 'AAA' in longs and longs['AAA'] == 0 and len(longs) == 1
+    del longs['AAA']
+    assert 'AAA' not in longs and len(longs) == 0
+    with pytest.raises(KeyError):
+        longs['AAA']
+    with pytest.raises(KeyError):
+        del shorts['AAA']
+    # The ticker keeps its slot
+    assert ledger.slot('AAA') == 0
+
+
+def test_load_replaces_one_side_only():
+    ledger, longs, shorts = book()
+    longs.update({'AAA': 1, 'BBB': 2})
+    shorts['VOO'] = 7
+    ledger.load(0, {'CCC': 3})
+    assert longs.copy() == {'CCC': 3}
+    assert shorts.copy() == {'VOO': 7}
+    np.testing.assert_array_equal(ledger.net, [0.0, 0.0, -7.0, 3.0])
+
+
+def test_grows_past_capacity():
+    ledger, longs, _ = book()
+    for n in range(50):
+        longs[f'T{n}'] = n + 1
+    assert len(ledger) == 50 and len(ledger._net) >= 50
+    np.testing.assert_array_equal(ledger.net, np.arange(1, 51))
+    assert longs['T49'] == 50
+
+
+def test_value_matches_a_manual_sum():
+    rng = np.random.default_rng(3)
+    ledger, longs, shorts = book()
+    tickers = [f'T{n}' for n in range(20)]
+    prices = dict(zip(tickers, rng.uniform(10, 500, len(tickers))))
+    for ticker in tickers:
+        longs[ticker] = int(rng.integers(0, 100))
+    shorts['T3'] = 40
+    shorts['T7'] = 12.5
+    expected = 1000.0 + sum(
+        (longs[t] - shorts.get(t, 0)) * prices[t] for t in tickers)
+    assert ledger.value(1000.0, prices.get) == pytest.approx(expected, rel=1e-12)
+
+
+def test_value_prefers_the_matrix_and_falls_back_to_price_of():
+    ledger, longs, shorts = book()
+    longs['AAA'] = 10
+    longs['OFF'] = 2  # Not in the matrix
+    shorts['BBB'] = 4
+    times = pd.DatetimeIndex(['2024-01-02', '2024-01-03'])
+    matrix = PriceMatrix(times, ['AAA', 'BBB'], [[100.0, 50.0], [110.0, np.nan]])
+    lookups = []
+
+    def price_of(ticker):
+        lookups.append(ticker)
+        return 30.0
+
+    assert ledger.value(0.0, price_of, matrix, 0) == 10 * 100.0 + 2 * 30.0 - 4 * 50.0
+    assert lookups == ['OFF']
+    # A held ticker with no bar in the row can't be valued
+    assert ledger.value(0.0, price_of, matrix, 1) is None
+    assert ledger.value(0.0, lambda ticker: None) is None
+
+
+def test_flat_book_is_worth_its_cash():
+    ledger, longs, _ = book()
+    longs['AAA'] = 0
+    assert ledger.value(123.0, lambda ticker: None) == 123.0
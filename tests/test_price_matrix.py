@@ -0,0 +1,82 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from StockData import StockData
+from price_matrix import PriceMatrix
+
+
+def bars(index, seed):
+    rng = np.random.default_rng(seed)
+    close = 100 + rng.normal(size=len(index)).cumsum()
+    return pd.DataFrame({
+        'Open': close, 'High': close + rng.uniform(0, 1, len(index)),
+        'Low': close - rng.uniform(0, 1, len(index)), 'Close': close, 'Volume': 1000.0,
+    }, index=pd.DatetimeIndex(index).as_unit('ns'))
+
+
+def expected_asof(frame, times, tolerance):
+    """Reference as-of join: last bar at or before each time, within tolerance"""
+    mids = pd.DataFrame({'time': frame.index, 'mid': (frame['High'] + frame['Low']) / 2})
+    steps = pd.DataFrame({'time': pd.DatetimeIndex(times).as_unit('ns')})
+    joined = pd.merge_asof(steps, mids, on='time', direction='backward', tolerance=tolerance)
+    return joined['mid'].to_numpy()
+
+
+@pytest.fixture
+def stocks():
+    days = pd.bdate_range('2024-03-01', '2024-04-30')
+    gappy = days.delete([5, 6, 7, 20])  # Missing sessions (halts, bad data)
+    late = days[10:]  # Listed part way through
+    return {
+        'AAA': StockData.from_frame('AAA', bars(days, 1)),
+        'GAP': StockData.from_frame('GAP', bars(gappy, 2)),
+        'NEW': StockData.from_frame('NEW', bars(late, 3)),
+    }
+
+
+def test_build_matches_a_reference_asof_join(stocks):
+    times = pd.bdate_range('2024-02-28', '2024-05-03').append(pd.DatetimeIndex(['2024-05-05']))
+    matrix = PriceMatrix.build(times, stocks)
+    assert matrix.values.shape == (len(times), 3)
+    for ticker, stock in stocks.items():
+        np.testing.assert_allclose(
+            matrix.column(ticker), expected_asof(stock.stock_data, times, pd.Timedelta(days=1)), equal_nan=True
+        )
+    # Daily bars are only carried for a day, so GAP has no price on its missing sessions
+    assert matrix.price_at(pd.Timestamp('2024-03-11'), 'GAP') is None
+    assert matrix.price_at(pd.Timestamp('2024-03-01'), 'NEW') is None  # Not listed yet
+
+
+def test_intraday_steps_never_see_later_bars():
+    index = pd.date_range('2024-03-04 09:30', periods=7, freq='60min')
+    stock = StockData.from_frame('X', bars(index, 4))
+    steps = pd.DatetimeIndex(['2024-03-04 09:00', '2024-03-04 10:45', '2024-03-04 15:30', '2024-03-04 17:00', '2024-03-04 18:00'])
+    matrix = PriceMatrix.build(steps, {'X': stock})
+    mids = (stock.stock_data['High'] + stock.stock_data['Low']).to_numpy() / 2
+    np.testing.assert_allclose(matrix.column('X'), [np.nan, mids[1], mids[6], mids[6], np.nan], equal_nan=True)
+    np.testing.assert_allclose(matrix.column('X'), expected_asof(stock.stock_data, steps, pd.Timedelta(hours=2)),
+                               equal_nan=True)
+
+
+def test_lookups_and_cursor(stocks):
+    times = pd.bdate_range('2024-03-01', '2024-03-08')
+    matrix = PriceMatrix.build(times, stocks)
+    assert matrix.row_of(times[2]) == 2 and matrix.row_of('2024-03-02') is None
+    assert matrix.covers(times[0], 'AAA') and not matrix.covers(times[0], 'ZZZ')
+    assert matrix.price_at(times[0], 'NEW') is None
+
+    columns = matrix.columns_of(['GAP', 'ZZZ', 'AAA'])
+    np.testing.assert_array_equal(columns, [1, -1, 0])
+    gathered = matrix.gather(3, columns)
+    assert gathered[0] == matrix.values[3, 1] and np.isnan(gathered[1]) and gathered[2] == matrix.values[3, 0]
+
+    cursor = matrix.cursor()
+    assert cursor.time == times[0]
+    assert cursor.advance() and cursor.time == times[1]
+    assert cursor.price('AAA') == matrix.values[1, 0]
+    assert cursor.prices(['AAA', 'NEW', 'ZZZ']) == {'AAA': matrix.values[1, 0]}
+    np.testing.assert_array_equal(cursor.price_array(['AAA', 'GAP']), matrix.values[1, :2])
+    while cursor.advance():
+        pass
+    assert cursor.position == len(matrix)
@@ -0,0 +1,122 @@
+import asyncio
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import quote_feed
+from quote_feed import (
+    PollingQuoteFeed, QuoteBook, ReplayQuoteFeed, ReplayServer, SocketQuoteFeed, check_stream_config, merge_steps,
+)
+
+
+def bars(times, start):
+    close = start + np.arange(len(times), dtype=np.float64)
+    return pd.DataFrame(
+        {'Open': close, 'High': close + 1, 'Low': close - 1, 'Close': close, 'Volume': 10.0},
+        index=pd.DatetimeIndex(times),
+    )
+
+
+@pytest.fixture
+def frames():
+    times = pd.date_range('2024-03-04 09:30', periods=4, freq='60min')
+    return {'AAA': bars(times, 100.0), 'BBB': bars(times[1:], 50.0)}
+
+
+async def collect(feed):
+    steps = [(time, bars) async for time, bars in feed]
+    await feed.close()
+    return steps
+
+
+def test_merge_steps_orders_by_time(frames):
+    steps = merge_steps(frames)
+    assert [len(bars) for _, bars in steps] == [1, 2, 2, 2]
+    assert steps[1][1]['BBB'].mid == 50.0
+
+
+def test_socket_feed_receives_the_replay(frames):
+    async def run():
+        server = ReplayServer(frames)
+        port = await server.start()
+        try:
+            feed = SocketQuoteFeed('127.0.0.1', port, ['bbb'])
+            steps = await collect(feed)
+        finally:
+            await server.close()
+        return feed, steps
+
+    feed, steps = asyncio.run(run())
+    assert feed.total_steps == 4
+    assert [list(bars) for _, bars in steps] == [['BBB']] * 3  # Only the subscribed ticker
+    assert steps[-1][0] == pd.Timestamp('2024-03-04 12:30')
+    assert steps[-1][1]['BBB'].close == 52.0
+
+
+def test_replay_feed_and_quote_book(frames):
+    steps = asyncio.run(collect(ReplayQuoteFeed(frames)))
+    book = QuoteBook()
+    for _, step in steps:
+        for bar in step.values():
+            book.update(bar)
+    assert book.prices(['AAA', 'BBB', 'CCC']) == {'AAA': 103.0, 'BBB': 52.0}
+    assert book.covers(None, 'AAA') and not book.covers(None, 'CCC')
+    np.testing.assert_array_equal(book.price_array(['BBB', 'CCC']), [52.0, np.nan])
+
+
+@pytest.mark.parametrize('config, error', [
+    ({'source': 'socket', 'host': '169.254.169.254', 'port': 80}, 'not allowed'),
+    ({'source': 'socket', 'host': 'internal.example.com', 'port': 8765}, 'not allowed'),
+    ({'source': 'socket', 'port': 70000}, 'port'),
+    ({'source': 'socket', 'port': '8765'}, 'port'),
+    ({'source': 'live', 'poll_seconds': 0}, 'poll_seconds'),
+    ({'source': 'replay', 'speed': -1}, 'speed'),
+    ({'source': 'ftp'}, 'Unknown stream source'),
+    (['socket'], 'must be an object'),
+])
+def test_bad_stream_configs_are_rejected(config, error):
+    with pytest.raises(ValueError, match=error):
+        check_stream_config(config)
+
+
+def test_stream_config_defaults():
+    assert check_stream_config({}) == {'source': 'replay', 'speed': 0.0}
+    assert check_stream_config({'source': 'socket', 'host': 'LOCALHOST', 'port': 8765})['host'] == 'LOCALHOST'
+    assert check_stream_config({'source': 'live'}) == {'source': 'live', 'poll_seconds': 60.0}
+
+
+def test_live_feeds_stop_at_the_duration_cap(monkeypatch):
+    monkeypatch.setattr(quote_feed, 'LIVE_STREAM_MAX_DAYS', 2)
+    feed = quote_feed.create_feed({'source': 'live'}, ['AAA'], '2024-03-04', 30)
+    assert feed.max_seconds == 2 * 24 * 3600
+    feed = quote_feed.create_feed({'source': 'live'}, ['AAA'], '2024-03-04', 1)
+    assert feed.max_seconds == 24 * 3600
+
+
+def test_polling_feed_emits_completed_bars_until_its_deadline(frames, monkeypatch):
+    class Clock:
+        now = 0.0
+
+        def monotonic(self):
+            return self.now
+
+    clock = Clock()
+    monkeypatch.setattr(quote_feed, '_time', clock)
+
+    async def no_wait(seconds):
+        clock.now += seconds
+
+    monkeypatch.setattr(quote_feed.asyncio, 'sleep', no_wait)
+    feed = PollingQuoteFeed(['AAA'], poll_seconds=60, max_seconds=150)
+    polls = []
+
+    def latest(ticker):
+        polls.append(clock.now)
+        return quote_feed._bars_from_frame(ticker, frames[ticker].iloc[:len(polls) + 1])
+
+    feed._latest = latest
+    steps = asyncio.run(collect(feed))
+    assert polls == [0.0, 60.0, 120.0]
+    # The newest bar of each poll is still forming, so it is held back
+    assert [time.hour for time, _ in steps] == [9, 10, 11]
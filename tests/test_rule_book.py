@@ -0,0 +1,63 @@
+import numpy as np
+
+from rule_book import RuleBook
+
+
+def fires(rule, price):
+    """The one-rule-at-a-time check RuleBook replaces"""
+    if rule.get('action') not in ('buy', 'sell') or price is None or np.isnan(price):
+        return False
+    if rule.get('condition') == 'greater_than':
+        return price > rule['threshold']
+    if rule.get('condition') == 'less_than':
+        return price < rule['threshold']
+    return False
+
+
+def random_rules(rng, n_tickers=500):
+    rules = {}
+    for n in range(n_tickers):
+        rules[f'T{n}'] = [
+            {'action': str(rng.choice(['buy', 'sell'])), 'condition': str(rng.choice(['greater_than', 'less_than'])),
+             'threshold': float(rng.uniform(50, 150)), 'shares': 1}
+            for _ in range(int(rng.integers(0, 4)))
+        ]
+    return rules
+
+
+def test_triggered_matches_a_rule_by_rule_loop():
+    rng = np.random.default_rng(19)
+    trading_rules = random_rules(rng)
+    book = RuleBook(trading_rules)
+    assert book.tickers == list(trading_rules)
+    for _ in range(20):
+        prices = rng.uniform(40, 160, len(book.tickers))
+        prices[rng.choice(len(prices), 25, replace=False)] = np.nan  # No bar this step
+        expected = [k for k, (ticker, rule) in enumerate(book.rules)
+                    if fires(rule, prices[book.tickers.index(ticker)])]
+        assert book.triggered(prices).tolist() == expected
+
+
+def test_rules_keep_their_order_and_can_be_retired():
+    trading_rules = {
+        'AAA': [{'action': 'buy', 'condition': 'less_than', 'threshold': 10},
+                {'action': 'sell', 'condition': 'greater_than', 'threshold': 20}],
+        'BBB': [{'action': 'buy', 'condition': 'less_than', 'threshold': 100, 'one_time': True}],
+    }
+    book = RuleBook(trading_rules)
+    assert [ticker for ticker, _ in book.rules] == ['AAA', 'AAA', 'BBB']
+    assert book.triggered(np.array([5.0, 50.0])).tolist() == [0, 2]
+    book.retire(2)
+    assert len(book) == 2
+    assert book.triggered(np.array([25.0, 50.0])).tolist() == [1]
+
+
+def test_unknown_actions_and_conditions_never_fire():
+    book = RuleBook({
+        'AAA': [{'action': 'hold', 'condition': 'less_than', 'threshold': 1e9},
+                {'action': 'buy', 'condition': 'equals', 'threshold': 5},
+                {'action': 'buy', 'condition': 'less_than'}],  # No threshold
+    })
+    assert len(book) == 1  # Only the last is evaluated, against a NaN threshold
+    assert book.triggered(np.array([5.0])).tolist() == []
+    assert RuleBook({}).triggered(np.array([])).tolist() == []
@@ -0,0 +1,70 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from single_flight import SingleFlight
+
+
+def test_concurrent_callers_share_one_call():
+    flight = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def fetch(key):
+        calls.append(key)
+        started.set()
+        release.wait(5)
+        return {'key': key}
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        leader = pool.submit(flight.do, 'AAPL', fetch, 'AAPL')
+        started.wait(5)
+        followers = [pool.submit(flight.do, 'AAPL', fetch, 'AAPL') for _ in range(3)]
+        while flight.stats()['deduplicated'] < 3:
+            threading.Event().wait(0.001)
+        release.set()
+        results = [leader.result(5)] + [f.result(5) for f in followers]
+
+    assert calls == ['AAPL']
+    assert all(result is results[0] for result in results)
+    assert flight.stats() == {'executed': 1, 'deduplicated': 3, 'in_flight': 0}
+
+
+def test_followers_get_the_leaders_exception():
+    flight = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+
+    def fetch():
+        started.set()
+        release.wait(5)
+        raise ConnectionError('throttled')
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        leader = pool.submit(flight.do, 'k', fetch)
+        started.wait(5)
+        follower = pool.submit(flight.do, 'k', fetch)
+        while flight.stats()['deduplicated'] < 1:
+            threading.Event().wait(0.001)
+        release.set()
+        for future in (leader, follower):
+            with pytest.raises(ConnectionError):
+                future.result(5)
+
+
+def test_nothing_is_remembered_after_the_call():
+    flight = SingleFlight()
+    counter = iter(range(10))
+    assert flight.do('k', lambda: next(counter)) == 0
+    assert flight.do('k', lambda: next(counter)) == 1
+    with pytest.raises(ValueError):
+        flight.do('k', lambda: int('x'))
+    assert flight.do('k', lambda: next(counter)) == 2
+    assert flight.stats()['in_flight'] == 0
+
+
+def test_different_keys_run_independently():
+    flight = SingleFlight()
+    assert flight.do('a', str.upper, 'x') == 'X'
+    assert flight.do('b', str.upper, 'y') == 'Y'
+    assert flight.stats()['executed'] == 2
@@ -0,0 +1,95 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from StockData import StockData
+
+HOUR = 3600 * 10 ** 9
+
+
+def bars(index, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 100 + rng.normal(size=len(index)).cumsum()
+    return pd.DataFrame({
+        'Open': close, 'High': close + rng.uniform(0, 1, len(index)),
+        'Low': close - rng.uniform(0, 1, len(index)), 'Close': close, 'Volume': 1000.0,
+    }, index=pd.DatetimeIndex(index).as_unit('ns'))
+
+
+def nearest_reference(frame, times, tolerance_ns):
+    """Brute-force closest bar (earlier bar on ties) within tolerance"""
+    bar_times = frame.index.as_unit('ns').asi8
+    mids = ((frame['High'] + frame['Low']) / 2).to_numpy()
+    out = []
+    for t in pd.DatetimeIndex(times).as_unit('ns').asi8:
+        diffs = np.abs(bar_times - t)
+        i = int(np.argmin(diffs))  # First minimum is the earlier bar
+        out.append(mids[i] if diffs[i] <= tolerance_ns else np.nan)
+    return np.array(out)
+
+
+@pytest.fixture
+def intraday():
+    days = pd.bdate_range('2024-03-04', periods=5)
+    index = pd.DatetimeIndex([day + pd.Timedelta(minutes=m) for day in days
+                              for m in range(9 * 60 + 30, 16 * 60, 30)])
+    return bars(index, seed=2)
+
+
+def test_get_prices_matches_a_brute_force_nearest_lookup(intraday):
+    stock = StockData.from_frame('AAA', intraday)
+    rng = np.random.default_rng(3)
+    start = intraday.index[0].value - 4 * HOUR
+    times = pd.to_datetime(np.sort(rng.integers(start, intraday.index[-1].value + 4 * HOUR, 500)))
+    times = times.append(intraday.index[::7]).append(intraday.index[:3] + pd.Timedelta(minutes=15))
+    np.testing.assert_array_equal(stock.get_prices(times), nearest_reference(intraday, times, 2 * HOUR))
+
+
+def test_get_price_at_curtime(intraday):
+    stock = StockData.from_frame('AAA', intraday)
+    mids = ((intraday['High'] + intraday['Low']) / 2).to_numpy()
+    stock.curtime = intraday.index[4]
+    assert stock.get_price() == mids[4]
+    # Half way between two bars goes to the earlier one
+    stock.curtime = intraday.index[4] + pd.Timedelta(minutes=15)
+    assert stock.get_price() == mids[4]
+    stock.curtime = intraday.index[4] + pd.Timedelta(minutes=16)
+    assert stock.get_price() == mids[5]
+    # Overnight gap is beyond the 2 hour intraday tolerance
+    stock.curtime = intraday.index[0] + pd.Timedelta(hours=11)
+    assert stock.get_price() is None
+    stock.curtime = pd.Timestamp(intraday.index[0], tz='UTC')
+    assert stock.get_price() == mids[0]
+
+
+def test_daily_bars_use_a_one_day_tolerance():
+    frame = bars(pd.bdate_range('2024-03-04', periods=10), seed=4)
+    stock = StockData.from_frame('AAA', frame)
+    times = pd.date_range('2024-03-01', '2024-03-20', freq='6h')
+    np.testing.assert_array_equal(stock.get_prices(times), nearest_reference(frame, times, 24 * HOUR))
+
+
+def test_get_prices_asof_never_looks_ahead(intraday):
+    stock = StockData.from_frame('AAA', intraday)
+    times = intraday.index[:4] + pd.Timedelta(minutes=29)
+    mids = ((intraday['High'] + intraday['Low']) / 2).to_numpy()
+    np.testing.assert_array_equal(stock.get_prices_asof(times), mids[:4])
+    assert np.isnan(stock.get_prices_asof([intraday.index[0] - pd.Timedelta(minutes=1)])[0])
+
+
+def test_append_bar_extends_lookups(intraday):
+    stock = StockData.from_frame('AAA', intraday.iloc[:10])
+    stock.get_prices(intraday.index[:1])  # Index the first bars
+    for time, row in intraday.iloc[10:].iterrows():
+        assert stock.append_bar(time, row['Open'], row['High'], row['Low'], row['Close'], row['Volume'])
+    assert not stock.append_bar(intraday.index[5], 1.0, 1.0, 1.0, 1.0)
+    times = intraday.index + pd.Timedelta(minutes=5)
+    np.testing.assert_array_equal(stock.get_prices(times), nearest_reference(intraday, times, 2 * HOUR))
+    pd.testing.assert_frame_equal(stock.stock_data, intraday, check_freq=False)
+
+
+def test_empty_frame():
+    stock = StockData.from_frame('AAA', bars(pd.DatetimeIndex([])))
+    stock.curtime = pd.Timestamp('2024-03-04')
+    assert stock.get_price() is None
+    assert np.isnan(stock.get_prices(['2024-03-04'])).all()
@@ -0,0 +1,153 @@
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from streaming_risk import RollingBeta, StreamingRisk, parse_hedge_beta
+
+
+@pytest.fixture
+def paths():
+    rng = np.random.default_rng(8)
+    n = 400
+    bench = 4000 * np.cumprod(1 + rng.normal(0.0003, 0.01, n))
+    bench_returns = np.diff(bench) / bench[:-1]
+    returns = 1.3 * bench_returns + rng.normal(0, 0.004, n - 1)
+    values = 100_000 * np.concatenate([[1.0], np.cumprod(1 + returns)])
+    return values, bench
+
+
+def test_streaming_risk_matches_numpy(paths):
+    values, bench = paths
+    risk = StreamingRisk(risk_free_rate=0.02, periods=252)
+    for value, price in zip(values, bench):
+        risk.update(value, price)
+    r = np.diff(values) / values[:-1]
+    b = np.diff(bench) / bench[:-1]
+
+    assert risk.n == len(r)
+    assert risk.mean == pytest.approx(r.mean(), rel=1e-10)
+    assert risk.m2 / risk.n == pytest.approx(np.var(r), rel=1e-10)
+    assert risk.volatility == pytest.approx(r.std() * math.sqrt(252), rel=1e-10)
+    assert risk.sharpe_ratio == pytest.approx((r.mean() - 0.02 / 252) * 252 / (r.std() * math.sqrt(252)), rel=1e-10)
+    cov = np.cov(r, b, ddof=0)
+    assert risk.beta == pytest.approx(cov[0, 1] / cov[1, 1], rel=1e-10)
+    assert risk.correlation == pytest.approx(np.corrcoef(r, b)[0, 1], rel=1e-10)
+    peaks = np.maximum.accumulate(values)
+    assert risk.max_drawdown == pytest.approx(((peaks - values) / peaks).max(), rel=1e-12)
+    assert risk.drawdown == pytest.approx((peaks[-1] - values[-1]) / peaks[-1], rel=1e-12)
+
+
+def test_beta_pairs_skip_bars_without_a_benchmark_price(paths):
+    values, bench = paths
+    bench = bench.copy()
+    bench[[10, 11, 50]] = np.nan
+    risk = StreamingRisk()
+    for i, (value, price) in enumerate(zip(values, bench)):
+        risk.update(value, None if i == 50 else price)  # None and NaN both mean unknown
+    # A pair needs a return on both sides over the same bar
+    r = np.diff(values) / values[:-1]
+    b = np.diff(bench) / bench[:-1]
+    keep = ~np.isnan(b)
+    cov = np.cov(r[keep], b[keep], ddof=0)
+    assert risk.pairs == keep.sum() == len(r) - 5
+    assert risk.beta == pytest.approx(cov[0, 1] / cov[1, 1], rel=1e-10)
+    assert risk.n == len(r)
+
+
+def test_snapshot_before_enough_data():
+    risk = StreamingRisk().update(100.0, 10.0).update(90.0, 10.0)
+    snapshot = risk.snapshot()
+    assert snapshot['returns'] == 1
+    assert snapshot['volatility_pct'] is None and snapshot['beta'] is None
+    assert snapshot['drawdown_pct'] == snapshot['max_drawdown_pct'] == 10.0
+
+
+def pairs_of(paths):
+    values, bench = paths
+    return np.diff(values) / values[:-1], np.diff(bench) / bench[:-1]
+
+
+def test_whole_run_and_window_beta_match_pandas(paths):
+    r, b = pairs_of(paths)
+    whole, windowed = RollingBeta(), RollingBeta(window=30)
+    expected = (pd.Series(r).rolling(30).cov(pd.Series(b), ddof=0)
+                / pd.Series(b).rolling(30).var(ddof=0)).to_numpy()
+    for i in range(len(r)):
+        whole.update(r[i], b[i])
+        windowed.update(r[i], b[i])
+        if i >= 29:
+            assert windowed.beta == pytest.approx(expected[i], rel=1e-8)
+    cov = np.cov(r, b, ddof=0)
+    assert whole.beta == pytest.approx(cov[0, 1] / cov[1, 1], rel=1e-10)
+
+
+def test_ewma_beta_matches_pandas_ewm(paths):
+    r, b = pairs_of(paths)
+    beta = RollingBeta(halflife=10)
+    rs, bs = pd.Series(r), pd.Series(b)
+    ewm_b = bs.ewm(halflife=10, adjust=False)
+    expected = (rs.ewm(halflife=10, adjust=False).cov(bs, bias=True) / ewm_b.var(bias=True)).to_numpy()
+    for i in range(len(r)):
+        beta.update(r[i], b[i])
+        if i >= 2:
+            assert beta.beta == pytest.approx(expected[i], rel=1e-8)
+
+
+def test_ewma_weights_recent_pairs():
+    beta = RollingBeta(halflife=5)
+    rng = np.random.default_rng(1)
+    b = rng.normal(0, 0.01, 200)
+    for x in b[:100]:
+        beta.update(0.5 * x, x)
+    for x in b[100:]:
+        beta.update(2.0 * x, x)
+    assert beta.beta == pytest.approx(2.0, abs=0.01)
+
+
+def test_no_beta_from_a_flat_benchmark():
+    for kwargs in ({}, {'window': 5}, {'halflife': 3}):
+        beta = RollingBeta(**kwargs)
+        for r in (0.01, -0.02, 0.015, 0.0, 0.01):
+            beta.update(r, 0.0)
+        assert beta.beta is None and beta.moves == 0
+    # Two moves are not enough for min_pairs=3
+    beta = RollingBeta(window=10)
+    for r, b in ((0.01, 0.0), (0.02, 0.01), (-0.01, -0.005), (0.0, 0.0)):
+        beta.update(r, b)
+    assert beta.pairs == 4 and beta.moves == 2 and beta.beta is None
+    beta.update(0.03, 0.02)
+    assert beta.beta is not None
+
+
+def test_window_forgets_evicted_moves():
+    beta = RollingBeta(window=4)
+    for r, b in ((0.01, 0.01), (-0.02, -0.01), (0.03, 0.02), (0.0, 0.0)):
+        beta.update(r, b)
+    assert beta.moves == 3 and beta.beta is not None
+    for _ in range(3):
+        beta.update(0.01, 0.0)
+    assert beta.moves == 0 and beta.beta is None
+
+
+def test_rolling_beta_rejects_bad_settings():
+    with pytest.raises(ValueError):
+        RollingBeta(window=10, halflife=5)
+    with pytest.raises(ValueError):
+        RollingBeta(window=1)
+    with pytest.raises(ValueError):
+        RollingBeta(halflife=0)
+
+
+def test_parse_hedge_beta():
+    assert parse_hedge_beta({}) == {}
+    assert parse_hedge_beta({'window': 20.0}) == {'window': 20}
+    assert parse_hedge_beta({'halflife': 7, 'window': None}) == {'halflife': 7.0}
+    for bad in (None, [], 'window', {'windows': 20}, {'window': 20, 'halflife': 5},
+                {'window': 1}, {'window': 2.5}, {'window': True}, {'window': '20'},
+                {'window': float('inf')}, {'window': float('nan')},
+                {'halflife': 0}, {'halflife': -1}, {'halflife': float('inf')},
+                {'halflife': float('nan')}, {'halflife': False}):
+        with pytest.raises(ValueError):
+            parse_hedge_beta(bad)
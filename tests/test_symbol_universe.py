@@ -0,0 +1,88 @@
+import csv
+import io
+import os
+
+import pytest
+
+import symbol_universe
+from symbol_universe import SymbolUniverse
+
+FIXTURE = os.path.join(os.path.dirname(__file__), 'fixtures', 'symbols.csv')
+
+
+@pytest.fixture
+def universe():
+    return SymbolUniverse.load(FIXTURE)
+
+
+def test_load_and_exact_lookup(universe):
+    assert len(universe) == 72
+    assert universe.get(' aapl ') == {'symbol': 'AAPL', 'name': 'Apple Inc.', 'exchange': 'NASDAQ', 'type': 'stock'}
+    assert universe.get('NOPE') is None
+
+
+def test_missing_file_gives_an_empty_universe(tmp_path):
+    assert len(SymbolUniverse.load(str(tmp_path / 'none.csv'))) == 0
+
+
+def test_search_by_symbol_prefix_then_name(universe):
+    symbols = [r['symbol'] for r in universe.search('am', limit=10)]
+    assert symbols[:2] == ['AMD', 'AMGN']  # Symbol matches first, in order
+    assert 'AXP' in symbols  # Then "American Express Company" by name
+    assert [r['symbol'] for r in universe.search('apple')] == ['AAPL']
+    assert len(universe.search('a', limit=3)) == 3
+    assert universe.search('  ') == []
+
+
+def test_add_and_replace_keep_the_indexes_sorted(universe):
+    universe.add('AAAA', 'Aardvark Holdings')
+    universe.add('AAPL', 'Should not overwrite')
+    assert universe.search('AA', limit=2)[0]['symbol'] == 'AAAA'
+    assert universe.get('AAPL')['name'] == 'Apple Inc.'
+
+    fresh = SymbolUniverse([{'symbol': 'ZZZ', 'name': 'Zed Corp', 'exchange': 'NYSE', 'type': 'stock'}])
+    universe.replace(fresh)
+    # The new listing wins, symbols added since startup are kept
+    assert universe.get('ZZZ') is not None and universe.get('AAAA') is not None
+    assert [r['symbol'] for r in universe.search('zed')] == ['ZZZ']
+
+
+def pipe_file(text):
+    return csv.DictReader(io.StringIO(text), delimiter='|')
+
+
+def test_refresh_builds_the_listing(tmp_path, monkeypatch):
+    files = {
+        symbol_universe.NASDAQ_LISTED_URL: (
+            "Symbol|Security Name|Market Category|Test Issue|Financial Status|Round Lot Size|ETF|NextShares\n"
+            "AAPL|Apple Inc. - Common Stock|Q|N|N|100|N|N\n"
+            "QQQ|Invesco QQQ Trust|G|N|N|100|Y|N\n"
+            "ZXZZT|NASDAQ TEST STOCK|G|Y|N|100|N|N\n"
+        ),
+        symbol_universe.OTHER_LISTED_URL: (
+            "ACT Symbol|Security Name|Exchange|CQS Symbol|ETF|Round Lot Size|Test Issue|NASDAQ Symbol\n"
+            "BRK.B|Berkshire Hathaway Inc. Class B|N|BRK.B|N|100|N|BRK.B\n"
+        ),
+    }
+    monkeypatch.setattr(symbol_universe, '_read_pipe_file', lambda url: pipe_file(files[url]))
+    path = str(tmp_path / 'symbols.csv')
+    assert symbol_universe.refresh(path) == 3 + len(symbol_universe.INDEXES)
+
+    built = SymbolUniverse.load(path)
+    assert built.get('QQQ')['type'] == 'etf'
+    assert built.get('BRK-B')['exchange'] == 'NYSE'
+    assert built.get('ZXZZT') is None
+    assert built.get('^GSPC')['type'] == 'index'
+
+
+def test_refresh_in_background_skips_a_fresh_file_and_survives_failures(tmp_path, monkeypatch):
+    universe = SymbolUniverse.load(FIXTURE)
+    assert symbol_universe.refresh_in_background(universe, FIXTURE, max_age_days=10 ** 6) is None
+
+    def offline(url):
+        raise ConnectionError('no network')
+
+    monkeypatch.setattr(symbol_universe, '_read_pipe_file', offline)
+    thread = symbol_universe.refresh_in_background(universe, str(tmp_path / 'symbols.csv'))
+    thread.join(5)
+    assert len(universe) == 72
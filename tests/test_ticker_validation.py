@@ -0,0 +1,157 @@
+import os
+import threading
+
+import pytest
+
+import ticker_validation
+from symbol_universe import SymbolUniverse
+from ticker_validation import TickerValidator
+
+FIXTURE = os.path.join(os.path.dirname(__file__), 'fixtures', 'symbols.csv')
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(ticker_validation, 'time', clock)
+    monkeypatch.setattr(ticker_validation, 'data_source', lambda: 'yahoo')
+    return clock
+
+
+@pytest.fixture
+def probes(monkeypatch):
+    """Stand-in for the Yahoo chart probe: tickers starting with X don't exist"""
+    calls = []
+
+    def probe(ticker):
+        calls.append(ticker)
+        if ticker.startswith('X'):
+            return {'valid': False, 'ticker': ticker, 'error': 'Ticker not found in Yahoo Finance database'}
+        return {'valid': True, 'ticker': ticker, 'name': f'{ticker} Corp', 'exchange': 'NYSE',
+                'source': 'yfinance_chart'}
+
+    monkeypatch.setattr(TickerValidator, '_probe_yahoo', staticmethod(probe))
+    return calls
+
+
+def validator(**kwargs):
+    return TickerValidator(universe=SymbolUniverse.load(FIXTURE), **kwargs)
+
+
+def test_universe_symbols_need_no_probe(clock, probes):
+    result = validator().validate(' aapl ')
+    assert result == {'valid': True, 'ticker': 'AAPL', 'name': 'Apple Inc.', 'exchange': 'NASDAQ',
+                      'source': 'symbol_universe'}
+    assert probes == []
+
+
+def test_invalid_results_expire(clock, probes):
+    v = validator(ttl=3600, invalid_ttl=60)
+    assert not v.validate('XXXX')['valid']
+    clock.now += 59
+    assert not v.validate('XXXX')['valid']
+    assert probes == ['XXXX'] and v.stats()['hits'] == 1
+    clock.now += 2
+    v.validate('XXXX')
+    assert probes == ['XXXX', 'XXXX']
+
+
+def test_valid_yahoo_answers_join_the_universe(clock, probes):
+    v = validator()
+    assert v.validate('ZZZZ')['source'] == 'yfinance_chart'
+    clock.now += 10 ** 6
+    assert v.validate('ZZZZ') == {'valid': True, 'ticker': 'ZZZZ', 'name': 'ZZZZ Corp',
+                                  'exchange': 'NYSE', 'source': 'symbol_universe'}
+    assert probes == ['ZZZZ']
+
+
+def test_valid_provider_answers_expire_after_ttl(clock, monkeypatch):
+    calls = []
+
+    class Provider:
+        def validate_ticker(self, ticker):
+            calls.append(ticker)
+            return {'valid': True, 'ticker': ticker, 'name': ticker, 'exchange': 'Synthetic', 'source': 'synthetic'}
+
+    monkeypatch.setattr(ticker_validation, 'data_source', lambda: 'synthetic')
+    monkeypatch.setattr(ticker_validation, 'get_provider', lambda source: Provider())
+    v = validator(ttl=3600, invalid_ttl=60)
+    v.validate('AAPL')  # The universe only answers for Yahoo
+    clock.now += 3599
+    v.validate('AAPL')
+    assert calls == ['AAPL']
+    clock.now += 2
+    v.validate('AAPL')
+    assert calls == ['AAPL', 'AAPL']
+
+
+def test_errors_are_not_cached(clock, monkeypatch):
+    calls = []
+
+    def failing(ticker):
+        calls.append(ticker)
+        raise ConnectionError('throttled')
+
+    monkeypatch.setattr(TickerValidator, '_probe_yahoo', staticmethod(failing))
+    v = validator()
+    for _ in range(2):
+        result = v.validate('ZZZZ')
+        assert not result['valid'] and 'throttled' in result['error']
+    assert calls == ['ZZZZ', 'ZZZZ'] and v.stats()['entries'] == 0
+
+
+def test_cache_is_bounded_lru(clock, probes):
+    v = validator(max_entries=3)
+    for ticker in ('XA', 'XB', 'XC'):
+        v.validate(ticker)
+    v.validate('XA')  # Most recently used now
+    v.validate('XD')  # Evicts XB
+    assert v.stats()['entries'] == 3
+    del probes[:]
+    for ticker in ('XA', 'XC', 'XD', 'XB'):
+        v.validate(ticker)
+    assert probes == ['XB']
+
+
+def test_returned_results_are_copies(clock, probes):
+    v = validator()
+    v.validate('XXXX')['valid'] = True
+    assert not v.validate('XXXX')['valid']
+
+
+def test_concurrent_validations_share_one_probe(clock, monkeypatch):
+    release = threading.Event()
+    calls = []
+
+    def slow(ticker):
+        calls.append(ticker)
+        release.wait(5)
+        return {'valid': False, 'ticker': ticker, 'error': 'nope'}
+
+    monkeypatch.setattr(TickerValidator, '_probe_yahoo', staticmethod(slow))
+    v = validator()
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(v.validate('XQ'))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    while not calls:
+        pass
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert calls == ['XQ'] and len(results) == 8
+
+
+def test_validate_many_skips_bad_entries(clock, probes):
+    results = validator().validate_many(['msft', 'MSFT ', 'XX', '', None, 42, 'ZZZ'])
+    assert list(results) == ['MSFT', 'XX', 'ZZZ']
+    assert results['MSFT']['source'] == 'symbol_universe'
+    assert not results['XX']['valid'] and results['ZZZ']['valid']
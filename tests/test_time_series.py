@@ -0,0 +1,70 @@
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from time_series import TimeSeriesBuffer
+
+
+def test_matches_a_pandas_series_through_growth_and_out_of_order_writes():
+    rng = np.random.default_rng(11)
+    times = pd.date_range('2024-01-02 09:30', periods=300, freq='min')
+    order = rng.permutation(len(times))
+    buffer = TimeSeriesBuffer(capacity=4)
+    reference = {}
+    for k in order:
+        value = float(rng.normal(100_000, 500))
+        buffer[times[k]] = value
+        reference[times[k]] = value
+    # Rewrite some existing points, including the latest one
+    for k in list(rng.choice(len(times), 20, replace=False)) + [len(times) - 1]:
+        buffer[times[k].to_pydatetime()] = reference[times[k]] = float(k)
+
+    expected = pd.Series(reference).sort_index()
+    assert len(buffer) == 300 and len(buffer._times) >= 300
+    pd.testing.assert_series_equal(buffer.to_series(), expected, check_freq=False, check_index_type=False)
+    assert buffer.last() == expected.iloc[-1]
+
+
+def test_append_and_overwrite_latest():
+    buffer = TimeSeriesBuffer(capacity=1)
+    assert buffer.last() is None
+    buffer.append('2024-01-02', 1.0)
+    buffer.append('2024-01-03', 2.0)
+    buffer['2024-01-03'] = 2.5
+    assert len(buffer) == 2
+    np.testing.assert_array_equal(buffer.values, [1.0, 2.5])
+    assert list(buffer.index) == [pd.Timestamp('2024-01-02'), pd.Timestamp('2024-01-03')]
+
+
+def test_lookup_accepts_any_timestamp_form():
+    buffer = TimeSeriesBuffer()
+    buffer[datetime(2024, 1, 2, 10)] = 5.0
+    assert buffer['2024-01-02 10:00'] == 5.0
+    assert buffer[pd.Timestamp('2024-01-02 10:00', tz='UTC')] == 5.0
+    assert '2024-01-02 10:00' in buffer
+    assert '2024-01-02 10:01' not in buffer
+    with pytest.raises(KeyError):
+        buffer['2024-01-01']
+    with pytest.raises(KeyError):
+        TimeSeriesBuffer()['2024-01-01']
+
+
+def test_views_are_read_only_and_track_writes():
+    buffer = TimeSeriesBuffer()
+    buffer['2024-01-02'] = 1.0
+    with pytest.raises(ValueError):
+        buffer.values[0] = 0.0
+    with pytest.raises(ValueError):
+        buffer.timestamps[0] = np.datetime64('2020-01-01')
+    assert buffer.timestamps.dtype == np.dtype('datetime64[ns]')
+
+
+def test_version_changes_on_every_write():
+    buffer = TimeSeriesBuffer()
+    versions = [buffer.version]
+    for timestamp in ('2024-01-03', '2024-01-03', '2024-01-02', '2024-01-02'):
+        buffer[timestamp] = 1.0
+        versions.append(buffer.version)
+    assert len(set(versions)) == len(versions)
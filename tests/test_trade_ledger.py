@@ -0,0 +1,117 @@
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from trade_ledger import TradeLedger
+
+T0 = datetime(2024, 3, 4, 10, 0)
+
+
+def random_trades(n, seed=5):
+    rng = np.random.default_rng(seed)
+    return [
+        (str(rng.choice(['BUY', 'SELL', 'SHORT', 'COVER'])), str(rng.choice(['AAA', 'BBB', 'CCC'])),
+         float(rng.integers(1, 50)), float(rng.uniform(10, 200)))
+        for _ in range(n)
+    ]
+
+
+def ledger_of(trades, hedge=False):
+    ledger = TradeLedger(hedge=hedge)
+    for action, ticker, shares, price in trades:
+        ledger.append(action, ticker, shares, price, T0)
+    return ledger
+
+
+def test_cash_flow_signs():
+    ledger = ledger_of([('BUY', 'AAA', 10, 100.0), ('SELL', 'AAA', 4, 110.0),
+                        ('SHORT', 'VOO', 2, 400.0), ('COVER', 'VOO', 1, 390.0)])
+    assert ledger.cash_flow() == pytest.approx(-1000.0 + 440.0 + 800.0 - 390.0)
+    assert TradeLedger().cash_flow() == 0.0
+
+
+def test_aggregates_match_a_loop_over_the_trades():
+    trades = random_trades(500)
+    ledger = ledger_of(trades)
+    # Grown well past the initial 64-row capacity without losing a trade
+    assert len(ledger) == 500
+    assert [(r['action'], r['ticker'], r['shares'], r['price']) for r in ledger] == trades
+
+    sign = {'BUY': -1, 'SELL': 1, 'SHORT': 1, 'COVER': -1}
+    assert ledger.cash_flow() == pytest.approx(sum(sign[a] * s * p for a, _, s, p in trades), rel=1e-12)
+    assert ledger.turnover() == pytest.approx(sum(s * p for _, _, s, p in trades), rel=1e-12)
+    by_ticker = ledger.turnover(by_ticker=True)
+    fees = ledger.fees(rate=0.002, by_ticker=True)
+    for ticker in ('AAA', 'BBB', 'CCC'):
+        expected = sum(s * p for _, t, s, p in trades if t == ticker)
+        assert by_ticker[ticker] == pytest.approx(expected, rel=1e-12)
+        assert fees[ticker] == pytest.approx(expected * 0.002, rel=1e-12)
+    for action in ('BUY', 'SELL', 'SHORT', 'COVER'):
+        assert ledger.count(action) == sum(a == action for a, _, _, _ in trades)
+
+
+def test_realized_pnl_against_average_entry():
+    ledger = ledger_of([
+        ('BUY', 'AAA', 10, 100.0), ('BUY', 'AAA', 10, 120.0),  # avg 110
+        ('SELL', 'AAA', 5, 130.0),
+        ('SHORT', 'BBB', 4, 50.0), ('SHORT', 'BBB', 4, 40.0),  # avg 45
+        ('COVER', 'BBB', 6, 42.0),
+    ])
+    pnl = ledger.realized_pnl()
+    assert pnl['AAA'] == pytest.approx(5 * (130.0 - 110.0))
+    assert pnl['BBB'] == pytest.approx(6 * (45.0 - 42.0))
+
+
+def test_margin_used_counts_only_margin_taken():
+    ledger = TradeLedger(hedge=True)
+    ledger.append('SHORT', 'VOO', 10, 400.0, T0, margin=2000.0)
+    ledger.append('COVER', 'VOO', 5, 410.0, T0, margin=-1000.0)
+    ledger.append('SHORT', 'VOO', 2, 405.0, T0, margin=405.0)
+    assert ledger.margin_used() == 2405.0
+
+
+def test_records_round_trip_and_legacy_shapes():
+    ledger = TradeLedger(hedge=True)
+    ledger.append('SHORT', 'VOO', 10, 400.0, T0, cash_after=5000.0, margin=2000.0)
+    ledger.append('COVER', 'VOO', 2.5, 410.0, T0, margin=-500.0)
+    record = ledger[0]
+    assert record == {'action': 'SHORT', 'ticker': 'VOO', 'price': 400.0, 'shares': 10, 'value': 4000.0,
+                      'timestamp': T0, 'cash_after': 5000.0, 'margin': 2000.0, 'is_hedge': True}
+    assert ledger[-1]['cash_after'] is None and ledger[-1]['shares'] == 2.5
+    with pytest.raises(IndexError):
+        ledger[2]
+
+    legacy = ledger.api_records()
+    assert legacy == [
+        {'timestamp': T0, 'ticker': 'VOO', 'action': 'short', 'shares': 10, 'price': 400.0,
+         'value': 4000.0, 'margin_used': 2000.0},
+        {'timestamp': T0, 'ticker': 'VOO', 'action': 'buy', 'shares': 2.5, 'price': 410.0,
+         'value': 1025.0, 'margin_released': 500.0},
+    ]
+    # The legacy hedge shape ('buy' for covers, margin_released) reads back the same
+    rebuilt = TradeLedger.from_records(legacy, hedge=True)
+    assert [r['action'] for r in rebuilt] == ['SHORT', 'COVER']
+    np.testing.assert_array_equal(rebuilt.column('margin'), [2000.0, -500.0])
+    assert rebuilt.cash_flow() == ledger.cash_flow()
+
+
+def test_plain_ledger_api_records_are_records():
+    ledger = ledger_of([('BUY', 'AAA', 3, 10.0)])
+    assert ledger.api_records() == ledger.records()
+    assert ledger.api_records()[0]['is_hedge'] is False
+
+
+def test_columns_are_read_only_views():
+    ledger = ledger_of([('BUY', 'AAA', 3, 10.0)])
+    with pytest.raises(ValueError):
+        ledger.column('price')[0] = 1.0
+
+
+def test_to_frame():
+    trades = random_trades(20, seed=9)
+    frame = ledger_of(trades).to_frame()
+    assert list(frame['action'].astype(str)) == [a for a, _, _, _ in trades]
+    assert list(frame['ticker'].astype(str)) == [t for _, t, _, _ in trades]
+    np.testing.assert_allclose(frame['value'], [s * p for _, _, s, p in trades])
+    assert (frame['timestamp'] == T0).all()
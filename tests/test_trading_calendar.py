@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from trading_calendar import TradingCalendar, session_days
+
+
+@pytest.fixture(scope='module')
+def calendar():
+    return TradingCalendar(first_year=2020, last_year=2026)
+
+
+@pytest.mark.parametrize('year, sessions', [(2021, 252), (2022, 251), (2023, 250), (2024, 252), (2025, 250)])
+def test_sessions_per_year_match_nyse(calendar, year, sessions):
+    assert len(calendar.sessions(f'{year}-01-01', f'{year}-12-31')) == sessions
+
+
+@pytest.mark.parametrize('day', [
+    '2024-01-01', '2024-01-15', '2024-02-19', '2024-03-29', '2024-05-27', '2024-06-19',
+    '2024-07-04', '2024-09-02', '2024-11-28', '2024-12-25',
+    '2022-06-20',  # Juneteenth on a Sunday, observed Monday
+    '2022-12-26',  # Christmas on a Sunday, observed Monday
+    '2025-01-09',  # National day of mourning
+])
+def test_holidays_are_not_sessions(calendar, day):
+    assert not calendar.is_session(day)
+
+
+def test_saturday_new_year_is_not_made_up_on_friday(calendar):
+    assert calendar.is_session('2021-12-31')
+    assert calendar.is_session('2024-07-05')  # The day after a Thursday July 4th
+
+
+def test_early_closes(calendar):
+    for day in ('2024-07-03', '2024-11-29', '2024-12-24'):
+        assert calendar.session_close(day) == pd.Timestamp(day) + pd.Timedelta(hours=13)
+    assert calendar.session_close('2024-07-02') == pd.Timestamp('2024-07-02 16:00')
+
+
+def test_bar_times_stop_at_the_close(calendar):
+    times = calendar.bar_times('2024-07-03', '2024-07-05', '60m')
+    hours = [t.strftime('%m-%d %H:%M') for t in times]
+    # Half day: 09:30 - 13:00, then a full day after the holiday
+    assert hours[:4] == ['07-03 09:30', '07-03 10:30', '07-03 11:30', '07-03 12:30']
+    assert hours[4:] == [f'07-05 {h:02d}:30' for h in range(9, 16)]
+
+
+def test_next_and_previous_sessions(calendar):
+    assert calendar.next_session('2024-03-29') == pd.Timestamp('2024-04-01')  # Good Friday
+    assert calendar.next_session('2024-04-01') == pd.Timestamp('2024-04-01')
+    days = pd.DatetimeIndex(['2024-04-01', '2024-07-05', '2024-07-08']).as_unit('ns').asi8
+    previous = calendar.previous_sessions(days).view('datetime64[ns]')
+    assert list(pd.DatetimeIndex(previous).strftime('%Y-%m-%d')) == ['2024-03-28', '2024-07-03', '2024-07-05']
+
+
+def test_schedules(calendar):
+    daily = calendar.daily_schedule('2024-07-01', 7)
+    assert list(daily.strftime('%m-%d')) == ['07-02', '07-03', '07-05', '07-08']
+    intraday = calendar.intraday_schedule(pd.Timestamp('2024-07-03 09:30'), 3)
+    assert intraday[0] == pd.Timestamp('2024-07-03 10:30')
+    assert len(intraday) == 3 + 7
+    np.testing.assert_array_equal(session_days(intraday), [1] * 3 + [2] * 7)
@@ -0,0 +1,134 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import yfinance as yf
+
+from StockData import YAHOO_HEADERS, data_source
+from data_provider import get_provider
+from fetch_executor import fetch_executor
+from single_flight import SingleFlight
+from symbol_universe import symbol_universe
+
+'''Cached ticker validation backed by a cheap one-bar history probe'''
+
+
+class TickerValidator:
+    """Validates ticker symbols and remembers the answer.
+
+    Symbols in the local universe are answered from memory. Unknown ones are
+    checked remotely: Yahoo is probed with a 5-day daily chart request, whose metadata carries
+    the name and exchange, instead of the much slower quoteSummary call behind
+    Ticker.info. Valid results are kept for `ttl` seconds, invalid ones for
+    `invalid_ttl`; errors (network, throttling) are never cached. At most
+    `max_entries` results are kept, least recently used evicted first.
+    """
+
+    def __init__(self, ttl=24 * 3600, invalid_ttl=600, universe=None, max_entries=4096):
+        self.universe = universe if universe is not None else symbol_universe
+        self.ttl = ttl
+        self.invalid_ttl = invalid_ttl
+        self.max_entries = max_entries
+        self._results = OrderedDict()  # {(source, ticker): (result, expiry)}, LRU order
+        self._lock = threading.Lock()
+        self._flight = SingleFlight()
+        self.hits = 0
+        self.misses = 0
+
+    def _cached(self, key):
+        with self._lock:
+            entry = self._results.get(key)
+            if entry is not None and entry[1] > time.monotonic():
+                self._results.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self._results.pop(key, None)
+            self.misses += 1
+            return None
+
+    def _store(self, key, result):
+        ttl = self.ttl if result['valid'] else self.invalid_ttl
+        with self._lock:
+            self._results.pop(key, None)
+            self._results[key] = (result, time.monotonic() + ttl)
+            while len(self._results) > self.max_entries:
+                self._results.popitem(last=False)
+
+    @staticmethod
+    def _probe_yahoo(ticker):
+        fetch_executor.bucket('yahoo').acquire()
+        stock = yf.Ticker(ticker, session=fetch_executor.session('yahoo', YAHOO_HEADERS))
+        bars = stock.history(period='5d', interval='1d')
+        if bars.empty:
+            return {
+                'valid': False,
+                'ticker': ticker,
+                'error': 'Ticker not found in Yahoo Finance database'
+            }
+        meta = stock.history_metadata or {}
+        return {
+            'valid': True,
+            'ticker': ticker,
+            'name': meta.get('shortName') or meta.get('longName') or ticker,
+            'exchange': meta.get('fullExchangeName') or meta.get('exchangeName') or 'Unknown',
+            'source': 'yfinance_chart'
+        }
+
+    def _probe(self, source, ticker):
+        if source == 'yahoo':
+            result = self._probe_yahoo(ticker)
+        else:
+            result = get_provider(source).validate_ticker(ticker)
+            if not result.get('valid'):
+                result.setdefault('error', f'Ticker not found ({source})')
+        if result['valid'] and source == 'yahoo':
+            self.universe.add(ticker, result['name'], result['exchange'])
+        self._store((source, ticker), result)
+        return result
+
+    def validate(self, ticker):
+        """Return the validation result dict for one ticker"""
+        ticker = ticker.upper().strip()
+        source = data_source()
+        if source == 'yahoo':
+            record = self.universe.get(ticker)
+            if record is not None:
+                return {
+                    'valid': True,
+                    'ticker': ticker,
+                    'name': record['name'],
+                    'exchange': record['exchange'],
+                    'source': 'symbol_universe'
+                }
+        key = (source, ticker)
+        cached = self._cached(key)
+        if cached is not None:
+            return dict(cached)
+        try:
+            return dict(self._flight.do(key, self._probe, *key))
+        except Exception as e:
+            return {
+                'valid': False,
+                'ticker': ticker,
+                'error': f'Error validating ticker: {str(e)}'
+            }
+
+    def validate_many(self, tickers):
+        """Validate several tickers concurrently; returns {ticker: result}.
+        Entries that aren't non-empty strings are skipped."""
+        tickers = list(dict.fromkeys(t.upper().strip() for t in tickers if isinstance(t, str) and t.strip()))
+        futures = fetch_executor.map(self.validate, tickers)
+        return {ticker: future.result() for ticker, future in futures.items()}
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._results), 'hits': self.hits, 'misses': self.misses}
+
+
+# Shared instance used by the /validate_ticker endpoints
+ticker_validator = TickerValidator(
+    ttl=float(os.environ.get('TICKER_VALIDATION_TTL', 24 * 3600)),
+    invalid_ttl=float(os.environ.get('TICKER_VALIDATION_INVALID_TTL', 600)),
+    max_entries=int(os.environ.get('TICKER_VALIDATION_MAX_ENTRIES', 4096)),
+)
@@ -0,0 +1,101 @@
+import numpy as np
+import pandas as pd
+
+'''Growable, time-ordered (timestamp, value) buffer for portfolio value history'''
+
+
+def _to_ns(timestamp):
+    ts = pd.Timestamp(timestamp)
+    if ts.tz is not None:
+        ts = ts.tz_localize(None)
+    return ts.as_unit('ns').value
+
+
+class TimeSeriesBuffer:
+    """Timestamps (epoch ns) and float64 values in preallocated arrays, kept sorted.
+
+    Recording a later timestamp appends and re-recording the latest one
+    overwrites it, both O(1) amortized; an earlier timestamp is placed by
+    binary search. `timestamps` / `values` are read-only views of the
+    buffers, so metrics and plots read the history without copying it.
+    Keys may be datetimes, pd.Timestamps or date strings. `version` changes
+    on every write, for caching anything derived from the history.
+    """
+
+    def __init__(self, capacity=256):
+        self._times = np.empty(capacity, dtype=np.int64)
+        self._values = np.empty(capacity, dtype=np.float64)
+        self._size = 0
+        self.version = 0
+
+    def __len__(self):
+        return self._size
+
+    def _grow(self):
+        n = self._size
+        self._times = np.concatenate([self._times, np.empty(max(n, 1), dtype=np.int64)])
+        self._values = np.concatenate([self._values, np.empty(max(n, 1), dtype=np.float64)])
+
+    def __setitem__(self, timestamp, value):
+        t = _to_ns(timestamp)
+        n = self._size
+        self.version += 1
+        if n and t <= self._times[n - 1]:
+            if t == self._times[n - 1]:
+                self._values[n - 1] = value
+                return
+            i = int(np.searchsorted(self._times[:n], t))
+            if self._times[i] == t:
+                self._values[i] = value
+                return
+        else:
+            i = n
+        if n == len(self._times):
+            self._grow()
+        if i < n:
+            self._times[i + 1:n + 1] = self._times[i:n]
+            self._values[i + 1:n + 1] = self._values[i:n]
+        self._times[i] = t
+        self._values[i] = value
+        self._size = n + 1
+
+    append = __setitem__
+
+    def __getitem__(self, timestamp):
+        t = _to_ns(timestamp)
+        i = int(np.searchsorted(self._times[:self._size], t))
+        if i == self._size or self._times[i] != t:
+            raise KeyError(timestamp)
+        return float(self._values[i])
+
+    def __contains__(self, timestamp):
+        try:
+            self[timestamp]
+        except KeyError:
+            return False
+        return True
+
+    def last(self):
+        """Most recent value, or None when empty"""
+        return float(self._values[self._size - 1]) if self._size else None
+
+    @property
+    def timestamps(self):
+        """datetime64[ns] view, oldest first"""
+        view = self._times[:self._size].view('datetime64[ns]')
+        view.flags.writeable = False
+        return view
+
+    @property
+    def values(self):
+        view = self._values[:self._size]
+        view.flags.writeable = False
+        return view
+
+    @property
+    def index(self):
+        """timestamps as a DatetimeIndex (for strftime and friends)"""
+        return pd.DatetimeIndex(self.timestamps, copy=False)
+
+    def to_series(self):
+        return pd.Series(self.values, index=self.index, copy=False)
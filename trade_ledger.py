@@ -0,0 +1,233 @@
+from collections.abc import Sequence
+
+import numpy as np
+import pandas as pd
+
+'''Append-only columnar trade log with vectorized aggregates and Arrow / Parquet export'''
+
+# Action codes stored in the `action` column
+ACTIONS = ('BUY', 'SELL', 'SHORT', 'COVER')
+BUY, SELL, SHORT, COVER = range(len(ACTIONS))
+_ACTION_CODES = {name: code for code, name in enumerate(ACTIONS)}
+
+COLUMNS = {
+    'timestamp': np.int64,   # epoch ns, timezone-naive
+    'ticker': np.int32,      # index into TradeLedger.tickers
+    'action': np.int8,       # index into ACTIONS
+    'shares': np.float64,
+    'price': np.float64,
+    'value': np.float64,     # price * shares, always positive
+    'cash_after': np.float64,
+    'margin': np.float64,    # hedge margin taken (+) or released (-)
+}
+
+
+def _to_ns(timestamp):
+    ts = pd.Timestamp(timestamp)
+    if ts.tz is not None:
+        ts = ts.tz_localize(None)
+    return ts.as_unit('ns').value
+
+
+class TradeLedger(Sequence):
+    """Trades as one contiguous numpy array per column.
+
+    Appends write one slot per column and the buffers grow geometrically,
+    so a trade costs O(1) amortized and about 50 bytes. Indexing or
+    iterating gives plain dicts with one fixed set of keys (action, ticker,
+    price, shares, value, timestamp, cash_after, margin, is_hedge) for
+    JSON responses; aggregates work on the columns directly.
+    """
+
+    def __init__(self, hedge=False, capacity=64):
+        self.hedge = hedge
+        self.tickers = []
+        self._ticker_codes = {}
+        self._columns = {name: np.empty(capacity, dtype=dtype) for name, dtype in COLUMNS.items()}
+        self._size = 0
+
+    @classmethod
+    def from_records(cls, records, hedge=False):
+        """Build a ledger from trade dicts (as returned by iteration, or the older
+        ad-hoc shapes using 'total_value' / lower-case actions / 'buy' for covers)"""
+        ledger = cls(hedge=hedge)
+        for record in records:
+            action = str(record['action']).upper()
+            if hedge and action == 'BUY':
+                action = 'COVER'
+            margin = record.get('margin', record.get('margin_used', -record.get('margin_released', 0.0)))
+            ledger.append(action, record['ticker'], record['shares'], record['price'], record['timestamp'],
+                          record.get('cash_after', np.nan), margin)
+        return ledger
+
+    def __len__(self):
+        return self._size
+
+    def column(self, name):
+        """Read-only view of one column (no copy)"""
+        view = self._columns[name][:self._size]
+        view.flags.writeable = False
+        return view
+
+    def append(self, action, ticker, shares, price, timestamp, cash_after=np.nan, margin=0.0):
+        n = self._size
+        if n == len(self._columns['timestamp']):
+            for name, values in self._columns.items():
+                grown = np.empty(2 * n, dtype=values.dtype)
+                grown[:n] = values
+                self._columns[name] = grown
+        code = self._ticker_codes.get(ticker)
+        if code is None:
+            code = self._ticker_codes[ticker] = len(self.tickers)
+            self.tickers.append(ticker)
+        columns = self._columns
+        columns['timestamp'][n] = _to_ns(timestamp)
+        columns['ticker'][n] = code
+        columns['action'][n] = _ACTION_CODES[action]
+        columns['shares'][n] = shares
+        columns['price'][n] = price
+        columns['value'][n] = price * shares
+        columns['cash_after'][n] = cash_after
+        columns['margin'][n] = margin
+        self._size = n + 1
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(self._size))]
+        if i < 0:
+            i += self._size
+        if not 0 <= i < self._size:
+            raise IndexError('trade index out of range')
+        c = self._columns
+        shares = float(c['shares'][i])
+        cash_after = float(c['cash_after'][i])
+        return {
+            'action': ACTIONS[c['action'][i]],
+            'ticker': self.tickers[c['ticker'][i]],
+            'price': float(c['price'][i]),
+            'shares': int(shares) if shares.is_integer() else shares,
+            'value': float(c['value'][i]),
+            'timestamp': pd.Timestamp(int(c['timestamp'][i])).to_pydatetime(),
+            'cash_after': None if np.isnan(cash_after) else cash_after,
+            'margin': float(c['margin'][i]),
+            'is_hedge': self.hedge,
+        }
+
+    def records(self):
+        return [self[i] for i in range(self._size)]
+
+    def api_records(self):
+        """Trades in the shape the /simulation_results JSON has always returned:
+        hedge trades with action 'short' / 'buy' and 'margin_used' /
+        'margin_released', other trades as records() gives them"""
+        if not self.hedge:
+            return self.records()
+        records = []
+        for record in self.records():
+            short = record['action'] == 'SHORT'
+            legacy = {
+                'timestamp': record['timestamp'],
+                'ticker': record['ticker'],
+                'action': 'short' if short else 'buy',
+                'shares': record['shares'],
+                'price': record['price'],
+                'value': record['value'],
+            }
+            if short:
+                legacy['margin_used'] = record['margin']
+            else:
+                legacy['margin_released'] = -record['margin']
+            records.append(legacy)
+        return records
+
+    # --- Aggregates ---
+
+    def _by_ticker(self, weights, mask=None):
+        codes = self.column('ticker')
+        if mask is not None:
+            codes, weights = codes[mask], weights[mask]
+        totals = np.bincount(codes, weights=weights, minlength=len(self.tickers))
+        return dict(zip(self.tickers, totals.tolist()))
+
+    def count(self, action=None):
+        if action is None:
+            return self._size
+        return int(np.count_nonzero(self.column('action') == _ACTION_CODES[action]))
+
+    def turnover(self, by_ticker=False):
+        """Traded notional (sum of price * shares)"""
+        values = self.column('value')
+        return self._by_ticker(values) if by_ticker else float(values.sum())
+
+    def fees(self, rate=0.001, by_ticker=False):
+        """Trading costs at `rate` of notional per trade (commission + spread)"""
+        if by_ticker:
+            return {ticker: value * rate for ticker, value in self.turnover(by_ticker=True).items()}
+        return self.turnover() * rate
+
+    def cash_flow(self):
+        """Net cash from the trades: sells and shorts in, buys and covers out"""
+        sign = np.where(np.isin(self.column('action'), (SELL, SHORT)), 1.0, -1.0)
+        return float(sign @ self.column('value'))
+
+    def margin_used(self):
+        """Total hedge margin taken by short sales (releases not netted)"""
+        margin = self.column('margin')
+        return float(margin[margin > 0].sum())
+
+    def realized_pnl(self):
+        """Realized P&L per ticker against the period's average entry price:
+        sells against the average buy price, covers against the average
+        short price. Open quantities are not marked."""
+        action = self.column('action')
+        shares, value = self.column('shares'), self.column('value')
+        n = len(self.tickers)
+
+        def totals(code, column):
+            mask = action == code
+            return np.bincount(self.column('ticker')[mask], weights=column[mask], minlength=n)
+
+        buy_shares, buy_value = totals(BUY, shares), totals(BUY, value)
+        sell_shares, sell_value = totals(SELL, shares), totals(SELL, value)
+        short_shares, short_value = totals(SHORT, shares), totals(SHORT, value)
+        cover_shares, cover_value = totals(COVER, shares), totals(COVER, value)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            avg_buy = np.where(buy_shares > 0, buy_value / buy_shares, 0.0)
+            avg_short = np.where(short_shares > 0, short_value / short_shares, 0.0)
+        pnl = (sell_value - avg_buy * sell_shares) + (avg_short * cover_shares - cover_value)
+        return dict(zip(self.tickers, pnl.tolist()))
+
+    # --- Export ---
+
+    def to_frame(self):
+        return pd.DataFrame({
+            'timestamp': self.column('timestamp').view('datetime64[ns]'),
+            'ticker': pd.Categorical.from_codes(self.column('ticker'), categories=self.tickers),
+            'action': pd.Categorical.from_codes(self.column('action'), categories=ACTIONS),
+            'shares': self.column('shares'),
+            'price': self.column('price'),
+            'value': self.column('value'),
+            'cash_after': self.column('cash_after'),
+            'margin': self.column('margin'),
+        })
+
+    def to_arrow(self):
+        """pyarrow Table over the ledger's buffers (numeric columns are not copied)"""
+        try:
+            import pyarrow as pa
+        except ImportError as e:
+            raise ImportError("Arrow / Parquet export requires pyarrow (pip install pyarrow)") from e
+        return pa.table({
+            'timestamp': pa.array(self.column('timestamp').view('datetime64[ns]')),
+            'ticker': pa.DictionaryArray.from_arrays(pa.array(self.column('ticker')), pa.array(self.tickers, pa.string())),
+            'action': pa.DictionaryArray.from_arrays(pa.array(self.column('action')), pa.array(ACTIONS, pa.string())),
+            'shares': pa.array(self.column('shares')),
+            'price': pa.array(self.column('price')),
+            'value': pa.array(self.column('value')),
+            'cash_after': pa.array(self.column('cash_after')),
+            'margin': pa.array(self.column('margin')),
+        })
+
+    def to_parquet(self, path):
+        import pyarrow.parquet as pq
+        pq.write_table(self.to_arrow(), path)
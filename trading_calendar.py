@@ -0,0 +1,148 @@
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+from pandas.tseries.holiday import (
+    AbstractHolidayCalendar,
+    GoodFriday,
+    Holiday,
+    USLaborDay,
+    USMartinLutherKingJr,
+    USMemorialDay,
+    USPresidentsDay,
+    USThanksgivingDay,
+    nearest_workday,
+    sunday_to_monday,
+)
+
+'''NYSE trading calendar: session days and intraday bar times for a date range'''
+
+
+class NYSEHolidayCalendar(AbstractHolidayCalendar):
+    rules = [
+        # A Saturday New Year's Day is not made up on the Friday before
+        Holiday('New Years Day', month=1, day=1, observance=sunday_to_monday),
+        USMartinLutherKingJr,
+        USPresidentsDay,
+        GoodFriday,
+        USMemorialDay,
+        Holiday('Juneteenth', month=6, day=19, start_date='2022-01-01', observance=nearest_workday),
+        Holiday('Independence Day', month=7, day=4, observance=nearest_workday),
+        USLaborDay,
+        USThanksgivingDay,
+        Holiday('Christmas', month=12, day=25, observance=nearest_workday),
+    ]
+
+
+# One-off closures (9/11, Hurricane Sandy, national days of mourning)
+SPECIAL_CLOSURES = [
+    '2001-09-11', '2001-09-12', '2001-09-13', '2001-09-14',
+    '2004-06-11', '2007-01-02', '2012-10-29', '2012-10-30',
+    '2018-12-05', '2025-01-09',
+]
+
+MARKET_OPEN = timedelta(hours=9, minutes=30)
+MARKET_CLOSE = timedelta(hours=16)
+EARLY_CLOSE = timedelta(hours=13)
+
+
+class TradingCalendar:
+    """Precomputed exchange sessions between first_year and last_year.
+
+    Session days are kept as a sorted datetime64[ns] array, so range queries
+    are two searchsorted calls. Times are exchange-local and naive, matching
+    the bar frames StockData keeps.
+    """
+
+    def __init__(self, first_year=1990, last_year=2045):
+        start, end = f"{first_year}-01-01", f"{last_year}-12-31"
+        holidays = NYSEHolidayCalendar().holidays(start, end).union(pd.DatetimeIndex(SPECIAL_CLOSURES))
+        days = pd.bdate_range(start, end)
+        self._sessions = days[~days.isin(holidays)].as_unit('ns')
+        self._session_ns = self._sessions.asi8
+
+        # 1pm closes: July 3rd, the day after Thanksgiving and Christmas Eve
+        thanksgiving = NYSEHolidayCalendar().holidays(start, end, return_name=True)
+        thanksgiving = thanksgiving[thanksgiving == 'Thanksgiving Day'].index
+        candidates = pd.DatetimeIndex(
+            [f"{year}-07-03" for year in range(first_year, last_year + 1)]
+            + [f"{year}-12-24" for year in range(first_year, last_year + 1)]
+        ).union(thanksgiving + timedelta(days=1))
+        early = candidates[candidates.isin(self._sessions)]
+        self._closes = np.where(
+            self._sessions.isin(early),
+            (self._sessions + EARLY_CLOSE).asi8,
+            (self._sessions + MARKET_CLOSE).asi8,
+        )
+
+    @staticmethod
+    def _day_ns(value):
+        ts = pd.Timestamp(value)
+        if ts.tz is not None:
+            ts = ts.tz_localize(None)
+        return ts.normalize().as_unit('ns').value
+
+    def _range(self, start, end):
+        lo = np.searchsorted(self._session_ns, self._day_ns(start), side='left')
+        hi = np.searchsorted(self._session_ns, self._day_ns(end), side='right')
+        return lo, hi
+
+    def is_session(self, day):
+        day_ns = self._day_ns(day)
+        i = np.searchsorted(self._session_ns, day_ns)
+        return i < len(self._session_ns) and self._session_ns[i] == day_ns
+
+    def sessions(self, start, end):
+        """Session days from start to end, both inclusive"""
+        lo, hi = self._range(start, end)
+        return self._sessions[lo:hi]
+
+    def next_session(self, day):
+        """First session on or after day"""
+        i = np.searchsorted(self._session_ns, self._day_ns(day), side='left')
+        return self._sessions[min(i, len(self._sessions) - 1)]
+
+    def previous_sessions(self, days_ns):
+        """Epoch-ns midnight of the last session before each day (epoch-ns midnights)"""
+        i = np.searchsorted(self._session_ns, days_ns, side='left') - 1
+        return self._session_ns[np.maximum(i, 0)]
+
+    def session_close(self, day):
+        i = np.searchsorted(self._session_ns, self._day_ns(day))
+        return pd.Timestamp(self._closes[i])
+
+    def bar_times(self, start, end, interval='60m'):
+        """Start times of the intraday bars of every session from start to end
+        (by date, both inclusive), aligned to the 9:30 open like Yahoo's bars.
+        The last bar of a session may be shorter (15:30-16:00 for 60m)."""
+        lo, hi = self._range(start, end)
+        step = pd.Timedelta(interval.replace('m', 'min'))
+        bars_per_session = -(-(MARKET_CLOSE - MARKET_OPEN) // step)  # ceil
+        offsets = np.arange(bars_per_session, dtype=np.int64) * step.value
+        opens = self._session_ns[lo:hi] + pd.Timedelta(MARKET_OPEN).value
+        times = opens[:, None] + offsets[None, :]
+        times = times[times < self._closes[lo:hi][:, None]]
+        return pd.DatetimeIndex(times.view('datetime64[ns]'))
+
+    def daily_schedule(self, start, duration_days):
+        """Sessions after `start` within the next `duration_days` calendar days"""
+        start = pd.Timestamp(start).normalize()
+        return self.sessions(start + timedelta(days=1), start + timedelta(days=duration_days))
+
+    def intraday_schedule(self, start, duration_days, interval='60m'):
+        """Bar times after `start` over `duration_days` calendar days starting on start's date"""
+        start = pd.Timestamp(start)
+        times = self.bar_times(start, start.normalize() + timedelta(days=duration_days - 1), interval)
+        return times[times > start]
+
+
+# Shared instance used by the simulation loops
+trading_calendar = TradingCalendar()
+
+
+def session_days(times):
+    """1-based session number of each time within the schedule it came from"""
+    days = pd.DatetimeIndex(times).normalize()
+    unique_days = days.unique()
+    return np.searchsorted(unique_days.asi8, days.asi8) + 1
+